@@ -7,8 +7,13 @@ import sys
 import os
 import re
 import json
-import shutil
+import math
+import itertools
+import threading
+import multiprocessing
+import time
 import version
+from collections import OrderedDict, deque
 from pathlib import Path
 from PyQt6.QtWidgets import (
     QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
@@ -16,15 +21,40 @@ from PyQt6.QtWidgets import (
     QLineEdit, QMessageBox, QScrollArea, QGridLayout, QFrame,
     QSplitter, QGroupBox, QButtonGroup, QRadioButton, QTabWidget,
     QComboBox, QSpinBox, QDoubleSpinBox, QProgressBar, QDialogButtonBox,
-    QTableWidget, QTableWidgetItem, QHeaderView, QSlider, QCheckBox,
+    QTableView, QHeaderView, QSlider, QCheckBox,
     QDialog, QTextEdit, QPlainTextEdit
 )
-from PyQt6.QtCore import Qt, QSize, pyqtSignal, QRunnable, QThreadPool, QObject, QRegularExpression
+from PyQt6.QtCore import (
+    Qt, QSize, pyqtSignal, QRunnable, QThreadPool, QObject,
+    QByteArray, QBuffer, QIODevice, QTimer, QThread, QSettings, QPointF, QRectF
+)
 from PyQt6.QtGui import (
-    QPixmap, QIcon, QFont, QImage, QImageReader, QTextCharFormat, 
-    QColor, QTextCursor, QSyntaxHighlighter, QTextDocument
+    QPixmap, QIcon, QFont, QImage, QImageReader, QImageIOHandler, QTextCharFormat,
+    QColor, QTextCursor, QSyntaxHighlighter, QTextDocument, QPainter, QTransform
 )
 import ctypes
+import numpy as np
+from thumbnail_cache import ThumbnailDiskCache, default_cache_dir
+from image_headers import read_image_info
+from streaming_resize import can_read_strips, png_proxy, png_region
+from resize_engine import (
+    BatchResizeEngine, DEFAULT_MEMORY_BUDGET, POT_FUNCTIONS, MAX_DIMENSION
+)
+from size_estimator import SizeEstimator
+from png_optimizer import optimize_png_job, png_job_memory, PNG_REPORT_NAME
+from batch_manifest import BatchManifest, incremental_resize_job
+from batch_journal import BatchJournal
+from resize_model import ResizeTableModel
+from folder_scanner import FolderScanner, MetadataCache
+from text_index import MappedText, TextIndexer
+from usage_counter import UsageCounter
+from file_operations import FileOperationEngine, move_jobs, without_paths, write_move_manifest
+from quarantine import new_session, list_sessions, restore_jobs, purge_in_background, discard_if_empty
+from numpy_resampler import RESAMPLERS, RESAMPLE_QT, shutdown_process_pool
+from output_encoding import (
+    OUTPUT_FORMATS, LOSSY_FORMATS, OPTIMIZE_TARGET_SIZE, OPTIMIZE_ERROR_BUDGET, DEFAULT_OUTPUT_SETTINGS,
+    output_path
+)
 
 def resource_path(relative_path):
     """ Get absolute path to resource, works for dev and for PyInstaller """
@@ -37,71 +67,596 @@ def resource_path(relative_path):
     return os.path.join(base_path, relative_path)
 
 
+def read_exif_thumbnail(file_path, data=None):
+    """Retourne les octets JPEG de la miniature EXIF embarquée (ou None)
+    data : contenu du fichier déjà lu (évite une relecture disque)"""
+    if data is not None:
+        head = data[:65536 + 4]
+    else:
+        try:
+            with open(file_path, 'rb') as f:
+                head = f.read(65536 + 4)
+        except OSError:
+            return None
+    if head[:2] != b'\xff\xd8':
+        return None
+
+    # Parcours des segments jusqu'à APP1 "Exif"
+    pos = 2
+    while pos + 4 <= len(head) and head[pos] == 0xFF:
+        marker = head[pos + 1]
+        length = int.from_bytes(head[pos + 2:pos + 4], 'big')
+        if marker == 0xE1 and head[pos + 4:pos + 10] == b'Exif\x00\x00':
+            tiff = head[pos + 10:pos + 2 + length]
+            break
+        if marker in (0xDA, 0xD9):  # Début des données image : pas d'EXIF
+            return None
+        pos += 2 + length
+    else:
+        return None
+
+    if tiff[:2] not in (b'II', b'MM'):
+        return None
+    order = 'little' if tiff[:2] == b'II' else 'big'
+
+    def u16(off):
+        return int.from_bytes(tiff[off:off + 2], order)
+
+    def u32(off):
+        return int.from_bytes(tiff[off:off + 4], order)
+
+    try:
+        # IFD0 -> IFD1 (miniature)
+        ifd0 = u32(4)
+        ifd1 = u32(ifd0 + 2 + u16(ifd0) * 12)
+        if ifd1 == 0:
+            return None
+        offset = length = None
+        for i in range(u16(ifd1)):
+            entry = ifd1 + 2 + i * 12
+            tag = u16(entry)
+            if tag == 0x0201:  # JPEGInterchangeFormat
+                offset = u32(entry + 8)
+            elif tag == 0x0202:  # JPEGInterchangeFormatLength
+                length = u32(entry + 8)
+        if offset and length and offset + length <= len(tiff):
+            return bytes(tiff[offset:offset + length])
+    except IndexError:
+        pass
+    return None
+
+
+def rotates_quarter(transformation):
+    return bool(transformation & QImageIOHandler.Transformation.TransformationRotate90)
+
+
+def apply_transformation(image, transformation):
+    """Applique une orientation EXIF (QImageIOHandler.Transformation) comme
+    QImageReader.setAutoTransform : miroir, retournement puis rotation de 90°"""
+    if image.isNull() or transformation == QImageIOHandler.Transformation.TransformationNone:
+        return image
+    mirror = transformation & QImageIOHandler.Transformation.TransformationMirror
+    flip = transformation & QImageIOHandler.Transformation.TransformationFlip
+    matrix = QTransform(-1 if mirror else 1, 0, 0, -1 if flip else 1, 0, 0)
+    if rotates_quarter(transformation):
+        matrix = matrix * QTransform().rotate(90)
+    return image.transformed(matrix)
+
+
+def transformation_matrix(transformation, width, height):
+    """QTransform des coordonnées source (width x height) vers l'image
+    orientée par apply_transformation"""
+    mirror = transformation & QImageIOHandler.Transformation.TransformationMirror
+    flip = transformation & QImageIOHandler.Transformation.TransformationFlip
+    matrix = QTransform(-1 if mirror else 1, 0, 0, -1 if flip else 1, width if mirror else 0, height if flip else 0)
+    if rotates_quarter(transformation):
+        matrix = matrix * QTransform(0, 1, -1, 0, height, 0)  # Quart de tour horaire
+    return matrix
+
+
+STRIP_DECODE_BYTES = 64 * 1024 * 1024  # PNG décodés au-delà : lecture par bandes (png_proxy)
+IO_READ_BYTES = 16 * 1024 * 1024  # Fichiers lus en mémoire par l'étape I/O ; au-delà, le décodeur lit lui-même
+
+
+def load_scaled_image(file_path, width, height, data=None):
+    """Charge une image réduite à width x height (KeepAspectRatio) sans
+    décoder la pleine résolution quand le format le permet.
+
+    - miniature EXIF embarquée si elle est assez grande et de même ratio
+    - sinon décodage à taille réduite via QImageReader.setScaledSize
+      (mise à l'échelle DCT pour le JPEG, décodage réduit pour le WebP)
+    - gros PNG : réduction bande par bande, sans image pleine résolution
+
+    data : octets du fichier déjà lus par l'étape I/O ; le décodage se fait
+    alors depuis la mémoire, sans accès disque.
+    """
+    if data is not None:
+        buffer = QBuffer()
+        buffer.setData(QByteArray(data))
+        buffer.open(QIODevice.OpenModeFlag.ReadOnly)
+        reader = QImageReader(buffer)
+    else:
+        reader = QImageReader(file_path)
+    reader.setAutoTransform(True)
+    size = reader.size()
+
+    if size.isValid() and (size.width() > width or size.height() > height):
+        target = size.scaled(width, height, Qt.AspectRatioMode.KeepAspectRatio)
+
+        if reader.format() == b'jpeg':
+            thumb_data = read_exif_thumbnail(file_path, data)
+            if thumb_data:
+                # La miniature EXIF n'est pas orientée : même Orientation que l'image
+                thumb = apply_transformation(QImage.fromData(thumb_data, "JPG"), reader.transformation())
+                oriented = size.transposed() if rotates_quarter(reader.transformation()) else size
+                oriented_target = oriented.scaled(width, height, Qt.AspectRatioMode.KeepAspectRatio)
+                if (not thumb.isNull() and thumb.width() >= oriented_target.width()
+                        and thumb.height() >= oriented_target.height()
+                        and abs(thumb.width() / thumb.height() - oriented.width() / oriented.height()) < 0.01):
+                    return thumb.scaled(width, height, Qt.AspectRatioMode.KeepAspectRatio,
+                                        Qt.TransformationMode.SmoothTransformation)
+
+        if (reader.format() == b'png' and size.width() * size.height() * 4 > STRIP_DECODE_BYTES
+                and can_read_strips(read_image_info(file_path))):
+            # PNG (sans ScaledSize) trop gros pour un décodage entier : réduit bande par bande
+            factor = max(1, min(size.width() // (target.width() * 2), size.height() // (target.height() * 2)))
+            try:
+                image, _ = png_proxy(file_path, factor, checkpoint_rows=None)
+            except (OSError, ValueError, MemoryError):
+                return QImage()
+            return image.scaled(width, height, Qt.AspectRatioMode.KeepAspectRatio,
+                                Qt.TransformationMode.SmoothTransformation)
+
+        if reader.supportsOption(QImageIOHandler.ImageOption.ScaledSize):
+            # Décodage à 2x la cible puis lissage final : qualité équivalente
+            # au scaled() sur la pleine résolution
+            decode_size = QSize(min(size.width(), target.width() * 2),
+                                min(size.height(), target.height() * 2))
+            reader.setScaledSize(decode_size)
+
+    image = reader.read()
+    if image.isNull():
+        return image
+    if image.size() != image.size().scaled(width, height, Qt.AspectRatioMode.KeepAspectRatio):
+        image = image.scaled(width, height, Qt.AspectRatioMode.KeepAspectRatio,
+                             Qt.TransformationMode.SmoothTransformation)
+    return image
+
+
+# Niveaux de la pyramide de miniatures (largeur de la boîte, hauteur = 4/5)
+THUMBNAIL_LEVELS = (64, 150, 384, 1024)
+DEFAULT_THUMBNAIL_LEVEL = 150
+
+
+def thumbnail_box(level):
+    """Boîte englobante (largeur, hauteur) d'un niveau de miniature"""
+    return level, level * 4 // 5
+
+
+def build_thumbnail_pyramid(image, level):
+    """Dérive les niveaux inférieurs à level, chacun réduit depuis le précédent"""
+    pyramid = {level: image}
+    previous = image
+    for lower in sorted((l for l in THUMBNAIL_LEVELS if l < level), reverse=True):
+        width, height = thumbnail_box(lower)
+        if previous.width() > width or previous.height() > height:
+            previous = previous.scaled(width, height, Qt.AspectRatioMode.KeepAspectRatio,
+                                       Qt.TransformationMode.SmoothTransformation)
+        pyramid[lower] = previous
+    return pyramid
+
+
+class ImageMemoryCache:
+    """Cache RAM des miniatures, LRU borné en octets"""
+    def __init__(self, max_bytes=512 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._images = OrderedDict()
+        self._bytes = 0
+
+    def get(self, key):
+        image = self._images.get(key)
+        if image is not None:
+            self._images.move_to_end(key)
+        return image
+
+    def __contains__(self, key):
+        return key in self._images
+
+    def __setitem__(self, key, image):
+        old = self._images.pop(key, None)
+        if old is not None:
+            self._bytes -= old.sizeInBytes()
+        self._images[key] = image
+        self._bytes += image.sizeInBytes()
+        while self._bytes > self.max_bytes and len(self._images) > 1:
+            _, evicted = self._images.popitem(last=False)
+            self._bytes -= evicted.sizeInBytes()
+
+    def __len__(self):
+        return len(self._images)
+
+    def clear(self):
+        self._images.clear()
+        self._bytes = 0
+
+
+def format_dimensions(file_info):
+    if file_info.get('width'):
+        return f"{file_info['width']}x{file_info['height']}"
+    return "?"
+
+
+def app_settings():
+    """Réglages persistants de l'application (registre sous Windows)"""
+    return QSettings("OlivierSud", "TextureCleaner")
+
+
+def decode_region(file_path, source_rect, size):
+    """Décode la zone source_rect (coordonnées image) à la taille size.
+    Réservé aux formats qui gèrent ClipRect (JPEG...) : seule la zone est
+    décodée ; les autres décoderaient l'image entière."""
+    reader = QImageReader(file_path)
+    reader.setClipRect(source_rect)
+    reader.setScaledSize(size)
+    return reader.read()
+
+
+def encode_png(image):
+    """Encode un QImage en PNG (octets), utilisable depuis un worker"""
+    data = QByteArray()
+    buffer = QBuffer(data)
+    buffer.open(QIODevice.OpenModeFlag.WriteOnly)
+    image.save(buffer, "PNG")
+    buffer.close()
+    return bytes(data)
+
+
 class WorkerSignals(QObject):
     """Signaux pour le worker de chargement d'image"""
     finished = pyqtSignal(QImage)
+    levels = pyqtSignal(object)  # {niveau: QImage} produits par un même décodage
     error = pyqtSignal()
 
-class ThumbnailLoader(QRunnable):
-    """Worker pour charger les images en arrière-plan"""
-    def __init__(self, file_path, width, height):
+
+class ProxySignals(QObject):
+    """Signaux du décodage de l'image réduite d'une visionneuse"""
+    finished = pyqtSignal(QImage, object)  # image, points de reprise (ou None)
+    error = pyqtSignal()
+
+class PipelineStage:
+    """Pool de threads d'une étape du pipeline, avec compteurs (thread-safe)"""
+    def __init__(self, name, pool):
+        self.name = name
+        self.pool = pool
+        self._lock = threading.Lock()
+        self.queued = 0
+        self.active = 0
+        self.completed = 0
+        self._busy = 0.0
+        self._window_start = time.perf_counter()
+
+    def start(self, fn, *args, error=None):
+        """error() est appelé si fn lève une exception (libère l'appelant)"""
+        with self._lock:
+            self.queued += 1
+        self.pool.start(_StageTask(self, fn, args, error))
+
+    def _begin(self):
+        with self._lock:
+            self.queued -= 1
+            self.active += 1
+        return time.perf_counter()
+
+    def _end(self, started):
+        with self._lock:
+            self.active -= 1
+            self.completed += 1
+            self._busy += time.perf_counter() - started
+
+    def snapshot(self):
+        """Retourne (en file, actifs, threads, utilisation 0-1) depuis le
+        dernier appel ; les tâches en cours comptent comme occupées"""
+        now = time.perf_counter()
+        with self._lock:
+            elapsed = now - self._window_start
+            threads = self.pool.maxThreadCount()
+            busy = self._busy
+            self._busy = 0.0
+            self._window_start = now
+            queued, active = self.queued, self.active
+        utilization = min(1.0, busy / (elapsed * threads)) if elapsed > 0 and threads > 0 else 0.0
+        if active and utilization == 0.0:
+            utilization = active / threads
+        return queued, active, threads, utilization
+
+
+class _StageTask(QRunnable):
+    def __init__(self, stage, fn, args, error=None):
         super().__init__()
-        self.file_path = file_path
-        self.width = width
-        self.height = height
-        self.signals = WorkerSignals()
+        self.stage = stage
+        self.fn = fn
+        self.args = args
+        self.error = error
 
     def run(self):
+        started = self.stage._begin()
         try:
-            if os.path.exists(self.file_path):
-                # Chargement de l'image (QImage est thread-safe, QPixmap non)
-                image = QImage(self.file_path)
-                if not image.isNull():
-                    # Redimensionnement haute qualité
-                    scaled_image = image.scaled(
-                        self.width, self.height,
-                        Qt.AspectRatioMode.KeepAspectRatio,
-                        Qt.TransformationMode.SmoothTransformation
-                    )
-                    self.signals.finished.emit(scaled_image)
-                else:
-                    self.signals.error.emit()
-            else:
-                self.signals.error.emit()
+            self.fn(*self.args)
+        except Exception as e:
+            print(f"Erreur pipeline ({self.stage.name}): {e}")
+            if self.error is not None:
+                try:
+                    self.error()
+                except RuntimeError:
+                    pass  # Signaux détruits entre-temps
+        finally:
+            self.stage._end(started)
+
+
+class ImagePipeline(QObject):
+    """Pipeline de chargement d'images en deux étapes :
+    - I/O : petit pool qui lit les octets des fichiers (et le cache disque)
+    - Décodage : pool dimensionné sur les cœurs, décode depuis la mémoire
+
+    Un montage réseau lent bloque ainsi les threads I/O sans immobiliser
+    les threads de décodage. Tailles réglables via QSettings.
+    """
+    DEFAULT_IO_THREADS = 4
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        settings = app_settings()
+        io_threads = int(settings.value('pipeline/io_threads', self.DEFAULT_IO_THREADS))
+        decode_threads = int(settings.value('pipeline/decode_threads', QThread.idealThreadCount()))
+
+        self.io = PipelineStage("I/O", QThreadPool(self))
+        self.decode = PipelineStage("Décodage", QThreadPool(self))
+        self.set_thread_counts(io_threads, decode_threads)
+
+    def set_thread_counts(self, io_threads, decode_threads):
+        self.io.pool.setMaxThreadCount(max(1, io_threads))
+        self.decode.pool.setMaxThreadCount(max(1, decode_threads))
+
+    def save_settings(self):
+        settings = app_settings()
+        settings.setValue('pipeline/io_threads', self.io.pool.maxThreadCount())
+        settings.setValue('pipeline/decode_threads', self.decode.pool.maxThreadCount())
+
+    def load_thumbnail(self, file_path, level, signals, disk_cache=None):
+        """Charge la miniature d'un niveau de la pyramide ; résultat émis sur
+        signals (WorkerSignals déjà connectés par l'appelant : la chaîne peut
+        finir très vite)"""
+        self.io.start(self._read_thumbnail, file_path, level, disk_cache, signals, error=signals.error.emit)
+
+    def _read_thumbnail(self, file_path, level, disk_cache, signals):
+        try:
+            if not os.path.exists(file_path):
+                signals.error.emit()
+                return
+            # Cache disque : pas de décodage de l'image source
+            if disk_cache is not None and disk_cache.enabled:
+                cached = disk_cache.get(ThumbnailDiskCache.make_key(file_path, *thumbnail_box(level)))
+                if cached:
+                    self.decode.start(self._decode_cached, cached, level, signals, error=signals.error.emit)
+                    return
+            # Gros fichier : pas chargé entier, le décodeur n'en lit que l'utile
+            # (en-tête, miniature EXIF, décodage réduit ou bandes)
+            data = None
+            if os.path.getsize(file_path) <= IO_READ_BYTES:
+                with open(file_path, 'rb') as f:
+                    data = f.read()
+            self.decode.start(self._decode_thumbnail, file_path, data, level, disk_cache, signals,
+                              error=signals.error.emit)
+        except Exception:
+            signals.error.emit()
+
+    def _decode_cached(self, data, level, signals):
+        image = QImage.fromData(data, "PNG")
+        if image.isNull():
+            signals.error.emit()
+        else:
+            signals.levels.emit({level: image})
+            signals.finished.emit(image)
+
+    def _decode_thumbnail(self, file_path, data, level, disk_cache, signals):
+        try:
+            # Un seul décodage, directement à taille réduite, pour toute la
+            # pyramide sous le niveau demandé (QImage est thread-safe, QPixmap non)
+            image = load_scaled_image(file_path, *thumbnail_box(level), data=data)
         except Exception:
-            self.signals.error.emit()
+            image = QImage()
+        if image.isNull():
+            signals.error.emit()
+            return
+        pyramid = build_thumbnail_pyramid(image, level)
+        signals.levels.emit(pyramid)
+        signals.finished.emit(image)
+        if disk_cache is not None and disk_cache.enabled:
+            for lvl, lvl_image in pyramid.items():
+                key = ThumbnailDiskCache.make_key(file_path, *thumbnail_box(lvl))
+                # L'écriture dans le pack repasse par l'étape I/O
+                self.io.start(disk_cache.put, key, encode_png(lvl_image))
+
+    def shutdown(self, timeout_ms=3000):
+        for stage in (self.io, self.decode):
+            stage.pool.clear()
+        for stage in (self.io, self.decode):
+            stage.pool.waitForDone(timeout_ms)
+
+
+class ThumbnailPreloader(QObject):
+    """Planificateur des chargements de miniatures.
+
+    - une seule requête en vol par chemin (les demandes suivantes s'y greffent)
+    - nombre de chargements simultanés plafonné pour ne pas inonder le pool
+    - préchauffage du cache par petites tranches quand l'UI est au repos
+    """
+    def __init__(self, pipeline, cache, disk_cache=None,
+                 max_in_flight=None, max_warm=1000, warm_batch=2, parent=None):
+        super().__init__(parent)
+        self.pipeline = pipeline
+        self.cache = cache  # (chemin, niveau) -> QImage
+        self.disk_cache = disk_cache
+        self._max_in_flight = max_in_flight  # None : suit la taille actuelle des pools
+        self.max_warm = max_warm
+        self.warm_batch = warm_batch
+
+        self._in_flight = {}  # (chemin, niveau) -> [(on_loaded, on_error), ...]
+        self._signals = {}  # (chemin, niveau) -> WorkerSignals (gardés en vie jusqu'à la livraison)
+        self._pending = OrderedDict()  # demandes de l'UI en attente d'un créneau
+        self._warm_queue = deque()  # préchargement de fond
+
+        # Timer "idle" : ne préchauffe que lorsque la boucle d'événements est libre
+        self._idle_timer = QTimer(self)
+        self._idle_timer.setInterval(25)
+        self._idle_timer.timeout.connect(self._warm_tick)
+
+    @property
+    def max_in_flight(self):
+        """Assez de requêtes pour occuper les deux étapes du pipeline ; relu à
+        chaque admission, les pools pouvant être redimensionnés"""
+        if self._max_in_flight:
+            return self._max_in_flight
+        return max(2, self.pipeline.io.pool.maxThreadCount() + self.pipeline.decode.pool.maxThreadCount())
+
+    def cached(self, path, level=DEFAULT_THUMBNAIL_LEVEL):
+        return self.cache.get((path, level))
+
+    def nearest_cached(self, path, level):
+        """Meilleur niveau déjà en cache : le plus petit >= level, sinon le plus grand"""
+        larger = [l for l in THUMBNAIL_LEVELS if l >= level]
+        smaller = [l for l in THUMBNAIL_LEVELS if l < level]
+        for lvl in larger + smaller[::-1]:
+            image = self.cache.get((path, lvl))
+            if image is not None:
+                return image
+        return None
+
+    def request(self, path, on_loaded, on_error=None, level=DEFAULT_THUMBNAIL_LEVEL):
+        """Demande prioritaire (widget visible)"""
+        key = (path, level)
+        image = self.cache.get(key)
+        if image is not None:
+            on_loaded(image)
+            return
+        callbacks = (on_loaded, on_error)
+        if key in self._in_flight:
+            self._in_flight[key].append(callbacks)
+        elif key in self._pending:
+            self._pending[key].append(callbacks)
+            self._pending.move_to_end(key, last=False)
+        else:
+            self._pending[key] = [callbacks]
+            self._pending.move_to_end(key, last=False)
+        self._pump()
+
+    def warm(self, paths):
+        """Remplace la file de préchargement (bornée à max_warm chemins)"""
+        self._warm_queue = deque(itertools.islice(
+            ((p, DEFAULT_THUMBNAIL_LEVEL) for p in paths if (p, DEFAULT_THUMBNAIL_LEVEL) not in self.cache),
+            self.max_warm))
+        if self._warm_queue:
+            self._idle_timer.start()
+        else:
+            self._idle_timer.stop()
+
+    def stop(self):
+        self._warm_queue.clear()
+        self._pending.clear()
+        self._idle_timer.stop()
+
+    def pools_resized(self):
+        """Pools agrandis : admet tout de suite les demandes en attente"""
+        self._pump()
+
+    def _pump(self):
+        max_in_flight = self.max_in_flight
+        while self._pending and len(self._in_flight) < max_in_flight:
+            key, callbacks = self._pending.popitem(last=False)
+            self._start(key, callbacks)
+
+    def _warm_tick(self):
+        # Les demandes de l'UI passent avant, et on garde la moitié des créneaux libres
+        budget = self.warm_batch
+        warm_slots = max(1, self.max_in_flight // 2)
+        while (budget > 0 and self._warm_queue and not self._pending
+               and len(self._in_flight) < warm_slots):
+            key = self._warm_queue.popleft()
+            if key in self.cache or key in self._in_flight:
+                continue
+            self._start(key, [])
+            budget -= 1
+        if not self._warm_queue:
+            self._idle_timer.stop()
+
+    def _start(self, key, callbacks):
+        self._in_flight[key] = callbacks
+        path, level = key
+        signals = WorkerSignals()
+        signals.levels.connect(lambda levels, p=path: self._on_levels(p, levels))
+        signals.finished.connect(lambda img, k=key: self._on_finished(k, img))
+        signals.error.connect(lambda k=key: self._on_error(k))
+        self._signals[key] = signals
+        self.pipeline.load_thumbnail(path, level, signals, self.disk_cache)
+
+    def _on_levels(self, path, levels):
+        # Toute la pyramide issue du décodage va en cache
+        for level, image in levels.items():
+            self.cache[(path, level)] = image
+
+    def _on_finished(self, key, image):
+        self._signals.pop(key, None)
+        for on_loaded, _ in self._in_flight.pop(key, []):
+            try:
+                on_loaded(image)
+            except RuntimeError:
+                pass  # Widget détruit entre-temps (dialogue fermé)
+        self._pump()
+
+    def _on_error(self, key):
+        self._signals.pop(key, None)
+        for _, on_error in self._in_flight.pop(key, []):
+            if on_error is not None:
+                try:
+                    on_error()
+                except RuntimeError:
+                    pass
+        self._pump()
 
 
 class ImageThumbnail(QFrame):
     """Widget pour afficher une miniature d'image avec bouton de suppression"""
     deleteRequested = pyqtSignal(str)
     
-    def __init__(self, file_path, file_name, file_size, pool=None, cache=None, show_delete=False):
+    def __init__(self, file_path, file_name, file_size, preloader=None, show_delete=False,
+                 level=DEFAULT_THUMBNAIL_LEVEL):
         super().__init__()
         self.file_path = file_path
         self.file_name = file_name
         self.file_size = file_size
         self.marked_for_deletion = False
-        self.pool = pool
-        self.cache = cache
+        self.preloader = preloader
+        self.level = level
+        box_w, box_h = thumbnail_box(level)
         
         self.setFrameStyle(QFrame.Shape.Box | QFrame.Shadow.Raised)
         self.setLineWidth(2)
-        self.setMaximumWidth(180)
+        self.setMaximumWidth(box_w + 30)
         
         layout = QVBoxLayout()
         layout.setSpacing(5)
         
         # Image
         self.image_label = QLabel()
-        self.image_label.setFixedSize(150, 120)
+        self.image_label.setFixedSize(box_w, box_h)
         self.image_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
         self.image_label.setStyleSheet("background-color: #2e2e4e; border-radius: 5px;")
         
         # Vérifier le cache
-        if self.cache and self.file_path in self.cache:
-            self.image_label.setPixmap(QPixmap.fromImage(self.cache[self.file_path]))
-        elif self.pool:
+        cached_image = self.preloader.cached(self.file_path, level) if self.preloader else None
+        if cached_image is not None:
+            self.image_label.setPixmap(QPixmap.fromImage(cached_image))
+        elif self.preloader:
             # Placeholder initial
             self.loading_label = QLabel("Chargement...")
             self.loading_label.setStyleSheet("color: #aaa; font-size: 10px;")
@@ -117,11 +672,11 @@ class ImageThumbnail(QFrame):
         layout.addWidget(self.image_label)
         
         # Nom du fichier
-        name_label = QLabel(file_name)
-        name_label.setWordWrap(True)
-        name_label.setStyleSheet("font-size: 11px; color: #f1f1f1;")
-        name_label.setMaximumWidth(150)
-        layout.addWidget(name_label)
+        self.name_label = QLabel(file_name)
+        self.name_label.setWordWrap(True)
+        self.name_label.setStyleSheet("font-size: 11px; color: #f1f1f1;")
+        self.name_label.setMaximumWidth(box_w)
+        layout.addWidget(self.name_label)
         
         # Taille du fichier
         size_label = QLabel(self.format_file_size(file_size))
@@ -151,18 +706,35 @@ class ImageThumbnail(QFrame):
         self.update_style()
 
     def load_image_async(self):
-        """Lance le chargement asynchrone"""
-        loader = ThumbnailLoader(self.file_path, 150, 120)
-        loader.signals.finished.connect(self.on_image_loaded)
-        loader.signals.error.connect(self.on_image_error)
-        self.pool.start(loader)
+        """Lance le chargement asynchrone (dédupliqué par le preloader)"""
+        level = self.level
+        self.preloader.request(self.file_path, lambda image: self.on_image_loaded(image, level),
+                               self.on_image_error, level=level)
 
-    def on_image_loaded(self, image):
-        """Callback quand l'image est chargée"""
-        # Mettre en cache
-        if self.cache is not None:
-            self.cache[self.file_path] = image
+    def set_level(self, level):
+        """Zoom : affiche tout de suite le niveau en cache le plus proche,
+        puis affine en arrière-plan avec le niveau exact"""
+        if level == self.level:
+            return
+        self.level = level
+        box_w, box_h = thumbnail_box(level)
+        self.setMaximumWidth(box_w + 30)
+        self.image_label.setFixedSize(box_w, box_h)
+        self.name_label.setMaximumWidth(box_w)
+
+        if not self.preloader:
+            self.load_image_sync()
+            return
+        nearest = self.preloader.nearest_cached(self.file_path, level)
+        if nearest is not None:
+            self.image_label.setPixmap(QPixmap.fromImage(nearest.scaled(
+                box_w, box_h, Qt.AspectRatioMode.KeepAspectRatio, Qt.TransformationMode.FastTransformation)))
+        self.load_image_async()
 
+    def on_image_loaded(self, image, level=None):
+        """Callback quand l'image est chargée"""
+        if level is not None and level != self.level:
+            return  # Réponse d'un ancien niveau de zoom
         # Supprimer le placeholder
         if self.image_label.layout():
              # Nettoyage brutal mais efficace pour ce cas simple
@@ -181,11 +753,9 @@ class ImageThumbnail(QFrame):
     def load_image_sync(self):
         """Chargement synchrone (ancien comportement)"""
         if os.path.exists(self.file_path):
-            pixmap = QPixmap(self.file_path)
-            if not pixmap.isNull():
-                scaled_pixmap = pixmap.scaled(150, 120, Qt.AspectRatioMode.KeepAspectRatio, 
-                                              Qt.TransformationMode.SmoothTransformation)
-                self.image_label.setPixmap(scaled_pixmap)
+            image = load_scaled_image(self.file_path, *thumbnail_box(self.level))
+            if not image.isNull():
+                self.image_label.setPixmap(QPixmap.fromImage(image))
                 # Enlever le placeholder
                 if self.image_label.layout():
                      QWidget().setLayout(self.image_label.layout())
@@ -246,6 +816,346 @@ class ImageThumbnail(QFrame):
         return f"{size:.2f} {sizes[i]}"
 
 
+class TiledImageView(QWidget):
+    """Visionneuse asynchrone pour les très grandes textures.
+
+    Affiche tout de suite la miniature en cache (étirée), puis le niveau 1024
+    décodé en arrière-plan. En zoomant, seules les tuiles visibles sont
+    décodées au niveau de détail utile (puissance de 2, jusqu'au 1:1) et
+    gardées dans un cache LRU borné : la mémoire ne dépend pas de la taille
+    de la texture.
+
+    Source du détail selon le format :
+    - 'clip' : tuiles décodées par QImageReader (ClipRect + ScaledSize)
+    - 'full' : sans ClipRect mais petite, décodée une fois en entier
+    - 'strips' : gros PNG lu une fois par bandes -> image réduite (sert de
+      base) et points de reprise ; les tuiles plus fines sont relues à partir
+      du point de reprise le plus proche
+    - None : autre format trop gros, seule la miniature est affichée
+
+    Coordonnées de la vue et des tuiles : image orientée (EXIF), comme la
+    miniature ; chaque tuile est décodée dans la zone source correspondante
+    puis orientée (apply_transformation).
+    """
+    TILE_SIZE = 512
+    TILE_CACHE_BYTES = 160 * 1024 * 1024
+    MAX_PENDING_TILES = 8
+    MAX_FULL_DECODE_BYTES = 64 * 1024 * 1024  # Sans ClipRect : plafond du décodage entier / de l'image réduite
+    MAX_SCALE = 8.0
+    zoomChanged = pyqtSignal(float)
+
+    def __init__(self, image_path, pipeline, preloader, parent=None):
+        super().__init__(parent)
+        self.image_path = image_path
+        self.pipeline = pipeline
+        self.setMinimumSize(750, 450)
+        self.setCursor(Qt.CursorShape.OpenHandCursor)
+
+        reader = QImageReader(image_path)
+        source_size = reader.size()
+        self.transformation = reader.transformation()
+        self.image_size = source_size.transposed() if rotates_quarter(self.transformation) else source_size
+        self._to_source = transformation_matrix(self.transformation, source_size.width(),
+                                                source_size.height()).inverted()[0]
+        self.error = None
+        if not os.path.exists(image_path):
+            self.error = "❌ Fichier introuvable"
+        elif not self.image_size.isValid() or self.image_size.isEmpty():
+            self.error = "❌ Impossible de charger l'image"
+
+        full_bytes = self.image_size.width() * self.image_size.height() * 4
+        self.proxy_lod = 1.0
+        if reader.supportsOption(QImageIOHandler.ImageOption.ClipRect):
+            self.source = 'clip'
+        elif full_bytes <= self.MAX_FULL_DECODE_BYTES:
+            self.source = 'full'
+        elif can_read_strips(read_image_info(image_path)):
+            self.source = 'strips'
+            while full_bytes * self.proxy_lod * self.proxy_lod > self.MAX_FULL_DECODE_BYTES:
+                self.proxy_lod /= 2
+        else:
+            self.source = None
+        self._proxy = None
+        self._checkpoints = None
+        self._proxy_signals = None
+
+        self.base_image = None
+        self.scale = 1.0
+        self.offset = QPointF(0, 0)  # Point source affiché en haut à gauche
+        self.fit_mode = True
+        self._tiles = ImageMemoryCache(self.TILE_CACHE_BYTES)  # (lod, tx, ty) -> QImage
+        self._pending_tiles = {}  # clé -> WorkerSignals
+        self._drag_pos = None
+        self._closed = False  # Vue fermée : résultats des décodages ignorés
+
+        if self.error is None:
+            self.base_image = preloader.nearest_cached(image_path, THUMBNAIL_LEVELS[-1])
+            if self.source == 'strips':
+                # L'image réduite sert de base : une seule lecture du fichier
+                self._request_proxy()
+            else:
+                preloader.request(image_path, self._on_base_loaded, self._on_base_error,
+                                  level=THUMBNAIL_LEVELS[-1])
+
+    # --- Géométrie ---
+
+    def fit_scale(self):
+        return min(self.width() / self.image_size.width(), self.height() / self.image_size.height())
+
+    def fit(self):
+        self.fit_mode = True
+        self._apply_fit()
+        self.update()
+        self.zoomChanged.emit(self.scale)
+
+    def _apply_fit(self):
+        self.scale = self.fit_scale()
+        self.offset = QPointF(self.image_size.width() / 2 - self.width() / (2 * self.scale),
+                              self.image_size.height() / 2 - self.height() / (2 * self.scale))
+
+    def zoom_to(self, scale, anchor=None):
+        """Zoom autour d'un point de la vue (centre par défaut)"""
+        if self.error is not None:
+            return
+        if anchor is None:
+            anchor = QPointF(self.width() / 2, self.height() / 2)
+        scale = max(min(self.fit_scale(), 1.0) / 2, min(self.MAX_SCALE, scale))
+        source_point = self.offset + anchor / self.scale
+        self.scale = scale
+        self.offset = source_point - anchor / self.scale
+        self.fit_mode = False
+        self._clamp_offset()
+        self.update()
+        self.zoomChanged.emit(self.scale)
+
+    def _clamp_offset(self):
+        # Le centre de la vue reste sur l'image
+        half_w = self.width() / (2 * self.scale)
+        half_h = self.height() / (2 * self.scale)
+        x = min(max(self.offset.x(), -half_w), self.image_size.width() - half_w)
+        y = min(max(self.offset.y(), -half_h), self.image_size.height() - half_h)
+        self.offset = QPointF(x, y)
+
+    def _lod(self):
+        """Niveau de détail à décoder : puissance de 2 >= échelle, max 1:1"""
+        if self.source is None:
+            return 0.0
+        return min(1.0, 2.0 ** math.ceil(math.log2(max(self.scale, 1e-6))))
+
+    # --- Rendu ---
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.fillRect(self.rect(), QColor("#0f3460"))
+        if self.error is not None:
+            painter.setPen(QColor("#e94560"))
+            painter.setFont(QFont(self.font().family(), 16))
+            painter.drawText(self.rect(), Qt.AlignmentFlag.AlignCenter, self.error)
+            return
+        if self.fit_mode:
+            self._apply_fit()
+        painter.setRenderHint(QPainter.RenderHint.SmoothPixmapTransform)
+
+        full_rect = QRectF(-self.offset.x() * self.scale, -self.offset.y() * self.scale,
+                           self.image_size.width() * self.scale, self.image_size.height() * self.scale)
+        if self.base_image is not None:
+            painter.drawImage(full_rect, self.base_image)
+
+        # Tuiles seulement si la base n'a pas assez de résolution
+        lod = self._lod()
+        base_resolution = (self.base_image.width() / self.image_size.width()) if self.base_image is not None else 0
+        if lod > base_resolution:
+            self._draw_tiles(painter, lod)
+
+    def _draw_tiles(self, painter, lod):
+        image_rect = QRectF(0, 0, self.image_size.width(), self.image_size.height())
+        visible = QRectF(self.offset.x(), self.offset.y(),
+                         self.width() / self.scale, self.height() / self.scale).intersected(image_rect)
+        if visible.isEmpty():
+            return
+
+        if self.source == 'full':
+            # Image entière décodée une fois, dessinée par morceaux
+            if self._proxy is None:
+                self._request_proxy()
+                return
+            painter.drawImage(self._to_view(visible), self._proxy, visible)
+            return
+        if self.source == 'strips' and (self._proxy is None or lod <= self.proxy_lod):
+            return  # L'image réduite (base) suffit ou n'est pas encore prête
+
+        source_tile = self.TILE_SIZE / lod
+        tx0 = int(visible.left() // source_tile)
+        ty0 = int(visible.top() // source_tile)
+        tx1 = int(math.ceil(visible.right() / source_tile))
+        ty1 = int(math.ceil(visible.bottom() / source_tile))
+        for ty in range(ty0, ty1):
+            for tx in range(tx0, tx1):
+                source = QRectF(tx * source_tile, ty * source_tile, source_tile, source_tile).intersected(image_rect)
+                key = (lod, tx, ty)
+                tile = self._tiles.get(key)
+                if tile is None:
+                    # Zone et taille dans le fichier (non orienté)
+                    source_rect = self._to_source.mapRect(source).toAlignedRect()
+                    size = QSize(max(1, round(source_rect.width() * lod)),
+                                 max(1, round(source_rect.height() * lod)))
+                    self._request_tile(key, source_rect, size)
+                    continue
+                painter.drawImage(self._to_view(source), tile)
+
+    def _to_view(self, source_rect):
+        return QRectF((source_rect.x() - self.offset.x()) * self.scale,
+                      (source_rect.y() - self.offset.y()) * self.scale,
+                      source_rect.width() * self.scale, source_rect.height() * self.scale)
+
+    # --- Décodage asynchrone ---
+
+    def _request_tile(self, key, source_rect, size):
+        if key in self._pending_tiles or len(self._pending_tiles) >= self.MAX_PENDING_TILES:
+            return
+        signals = WorkerSignals()
+        signals.finished.connect(lambda image, k=key: self._on_tile_loaded(k, image))
+        signals.error.connect(lambda k=key: self._pending_tiles.pop(k, None))
+        self._pending_tiles[key] = signals
+        self.pipeline.decode.start(self._decode_tile, source_rect, size, round(1 / key[0]),
+                                   self._checkpoints, signals, error=signals.error.emit)
+
+    def _decode_tile(self, source_rect, size, factor, checkpoints, signals):
+        if self._closed:
+            return  # Tuile encore en file à la fermeture : pas de décodage
+        try:
+            if self.source == 'clip':
+                image = decode_region(self.image_path, source_rect, size)
+            else:
+                image = png_region(self.image_path, checkpoints, source_rect.x(), source_rect.y(),
+                                   source_rect.width(), source_rect.height(), factor)
+        except (OSError, ValueError, MemoryError):
+            image = QImage()
+        if image.isNull():
+            signals.error.emit()
+        else:
+            signals.finished.emit(apply_transformation(image, self.transformation))
+
+    def _request_proxy(self):
+        if self._proxy_signals is not None:
+            return
+        self._proxy_signals = ProxySignals()
+        self._proxy_signals.finished.connect(self._on_proxy_loaded)
+        self._proxy_signals.error.connect(self._on_proxy_error)
+        self.pipeline.decode.start(self._decode_proxy, self._proxy_signals, error=self._proxy_signals.error.emit)
+
+    def _decode_proxy(self, signals):
+        """'full' : décodage entier (borné par MAX_FULL_DECODE_BYTES) ;
+        'strips' : une passe par bandes -> image réduite + points de reprise"""
+        if self._closed:
+            return
+        try:
+            if self.source == 'full':
+                reader = QImageReader(self.image_path)
+                reader.setAutoTransform(True)
+                image, checkpoints = reader.read(), None
+            else:
+                result = png_proxy(self.image_path, round(1 / self.proxy_lod), cancelled=lambda: self._closed)
+                if result is None:
+                    return  # Fermée pendant la lecture
+                image, checkpoints = result
+                image = apply_transformation(image, self.transformation)
+        except (OSError, ValueError, MemoryError):
+            image = QImage()
+        if image.isNull():
+            signals.error.emit()
+        else:
+            signals.finished.emit(image, checkpoints)
+
+    def close_view(self):
+        """Fermeture : les décodages en cours ou en file sont ignorés (signaux
+        déconnectés) et la mémoire des tuiles libérée"""
+        self._closed = True
+        for signals in [*self._pending_tiles.values(), self._proxy_signals]:
+            if signals is None:
+                continue
+            for signal in (signals.finished, signals.error):
+                try:
+                    signal.disconnect()
+                except TypeError:
+                    pass
+        self._pending_tiles.clear()
+        self._tiles.clear()
+        self._proxy = self._checkpoints = self.base_image = None
+
+    def _on_tile_loaded(self, key, image):
+        if self._closed:
+            return
+        self._pending_tiles.pop(key, None)
+        self._tiles[key] = image
+        self.update()
+
+    def _on_base_loaded(self, image):
+        if self._closed:
+            return
+        self.base_image = image
+        self.update()
+
+    def _on_proxy_loaded(self, image, checkpoints):
+        if self._closed:
+            return
+        self._proxy = image
+        self._checkpoints = checkpoints
+        if self.source == 'strips':
+            self.base_image = image
+        self.update()
+
+    def _on_proxy_error(self):
+        if self._closed:
+            return
+        if self.source == 'strips' and self.base_image is None:
+            self.error = "❌ Impossible de charger l'image"
+        self.source = None  # Pas de détail : on garde la base
+        self.update()
+
+    def _on_base_error(self):
+        if not self._closed and self.base_image is None:
+            self.error = "❌ Impossible de charger l'image"
+            self.update()
+
+    # --- Interaction ---
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        if self.fit_mode and self.error is None:
+            self._apply_fit()
+            self.zoomChanged.emit(self.scale)
+
+    def wheelEvent(self, event):
+        steps = event.angleDelta().y() / 120
+        self.zoom_to(self.scale * (1.25 ** steps), event.position())
+
+    def mousePressEvent(self, event):
+        if event.button() == Qt.MouseButton.LeftButton:
+            self._drag_pos = event.position()
+            self.setCursor(Qt.CursorShape.ClosedHandCursor)
+
+    def mouseMoveEvent(self, event):
+        if self._drag_pos is not None and self.error is None:
+            delta = event.position() - self._drag_pos
+            self._drag_pos = event.position()
+            self.offset -= delta / self.scale
+            self.fit_mode = False
+            self._clamp_offset()
+            self.update()
+
+    def mouseReleaseEvent(self, event):
+        self._drag_pos = None
+        self.setCursor(Qt.CursorShape.OpenHandCursor)
+
+    def mouseDoubleClickEvent(self, event):
+        # Double clic : bascule ajusté <-> 1:1 sous le curseur
+        if self.fit_mode:
+            self.zoom_to(1.0, event.position())
+        else:
+            self.fit()
+
+
 class SegmentedToggle(QFrame):
     toggled = pyqtSignal(bool) # True = Left, False = Right
 
@@ -344,16 +1254,130 @@ class SegmentedToggle(QFrame):
 
 
 
+class _LineNumberGutter(QWidget):
+    def __init__(self, editor):
+        super().__init__(editor)
+        self.editor = editor
+
+    def sizeHint(self):
+        return QSize(self.editor.gutter_width(), 0)
+
+    def paintEvent(self, event):
+        self.editor.paint_gutter(event)
+
+
+class LineNumberEdit(QPlainTextEdit):
+    """QPlainTextEdit avec marge de numéros de ligne ; first_line : numéro
+    du premier bloc affiché (fenêtre d'un fichier plus grand)"""
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.first_line = 1
+        self.gutter = _LineNumberGutter(self)
+        self.blockCountChanged.connect(self.update_gutter_width)
+        self.updateRequest.connect(self.update_gutter)
+        self.update_gutter_width()
+
+    def set_first_line(self, number):
+        self.first_line = number
+        self.update_gutter_width()
+        self.gutter.update()
+
+    def gutter_width(self):
+        digits = len(str(self.first_line + self.blockCount()))
+        return 12 + self.fontMetrics().horizontalAdvance('9') * digits
+
+    def update_gutter_width(self, *args):
+        self.setViewportMargins(self.gutter_width(), 0, 0, 0)
+
+    def update_gutter(self, rect, dy):
+        if dy:
+            self.gutter.scroll(0, dy)
+        else:
+            self.gutter.update(0, rect.y(), self.gutter.width(), rect.height())
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        rect = self.contentsRect()
+        self.gutter.setGeometry(rect.left(), rect.top(), self.gutter_width(), rect.height())
+
+    def paint_gutter(self, event):
+        painter = QPainter(self.gutter)
+        painter.fillRect(event.rect(), QColor("#16213e"))
+        painter.setPen(QColor("#8888aa"))
+        block = self.firstVisibleBlock()
+        top = round(self.blockBoundingGeometry(block).translated(self.contentOffset()).top())
+        height = self.fontMetrics().height()
+        while block.isValid() and top <= event.rect().bottom():
+            bottom = top + round(self.blockBoundingRect(block).height())
+            if block.isVisible() and bottom >= event.rect().top():
+                painter.drawText(0, top, self.gutter.width() - 6, height, Qt.AlignmentFlag.AlignRight,
+                                 str(self.first_line + block.blockNumber()))
+            block = block.next()
+            top = bottom
+        painter.end()
+
+
+class MatchHighlighter(QSyntaxHighlighter):
+    """Surlignage des occurrences en surcouche (le document n'est pas modifié).
+    spans : numéro de bloc -> [(colonne, longueur, index d'occurrence)] ;
+    changer d'occurrence active ne recolore que deux blocs"""
+    def __init__(self, document):
+        super().__init__(document)
+        self.spans = {}
+        self.blocks = {}  # Index d'occurrence -> numéro de bloc
+        self.active = -1
+        self.format_match = QTextCharFormat()
+        self.format_match.setBackground(QColor("#533483"))  # Fond violet sombre pour tous les matches
+        self.format_match.setForeground(Qt.GlobalColor.white)
+        self.format_match.setFontWeight(QFont.Weight.Bold)
+        self.format_active = QTextCharFormat(self.format_match)
+        self.format_active.setBackground(QColor("#e94560"))
+
+    def set_spans(self, spans, active=-1):
+        """Nouvelles occurrences (à appeler avant de remplir le document)"""
+        self.spans = spans
+        self.blocks = {index: block for block, items in spans.items() for _, _, index in items}
+        self.active = active
+
+    def set_active(self, index):
+        previous, self.active = self.active, index
+        for match in {previous, index}:
+            if match in self.blocks:
+                self.rehighlightBlock(self.document().findBlockByNumber(self.blocks[match]))
+
+    def highlightBlock(self, text):
+        for column, length, index in self.spans.get(self.currentBlock().blockNumber(), ()):
+            self.setFormat(column, length, self.format_active if index == self.active else self.format_match)
+
+
+def qt_length(text):
+    """Longueur d'une chaîne en unités UTF-16 (positions QTextDocument)"""
+    return len(text.encode('utf-16-le')) // 2
+
+
 class AdvancedUsageDialog(QDialog):
+    """Fichiers sources où une image est citée. Le fichier est projeté en
+    mémoire et indexé en arrière-plan ; seule une fenêtre de lignes autour
+    de l'occurrence courante est décodée et affichée"""
+    WINDOW_LINES = 400          # Lignes affichées autour de l'occurrence courante
+    WINDOW_BYTES = 64 * 1024    # Plafond de la fenêtre (fichiers minifiés sur une ligne)
+
     def __init__(self, usage_data, image_name, parent=None):
         super().__init__(parent)
         self.setWindowTitle(f"Usage de : {image_name}")
         self.setMinimumSize(900, 600)
         self.usage_data = usage_data
         self.image_name = image_name
+        self.match_length = len(image_name.encode('utf-8'))
         self.file_paths = list(usage_data.keys())
-        self.current_match_cursors = []
+        self.match_positions = {}  # Index d'occurrence -> (bloc, colonne) dans la fenêtre affichée
         self.current_match_index = -1
+        self.text = None
+        self.window = None  # (octet début, octet fin, première ligne) affichés
+        self.shifting_window = False
+        self.indexer = TextIndexer(self)
+        self.indexer.chunk_indexed.connect(self.on_indexed)
+        self.indexer.finished.connect(self.update_match_label)
         
         self.init_ui()
         
@@ -417,8 +1441,11 @@ class AdvancedUsageDialog(QDialog):
         layout.addLayout(toolbar)
         
         # --- Text Editor ---
-        self.text_edit = QPlainTextEdit()
+        self.text_edit = LineNumberEdit()
         self.text_edit.setReadOnly(True)
+        self.text_edit.setLineWrapMode(QPlainTextEdit.LineWrapMode.NoWrap)
+        self.text_edit.verticalScrollBar().valueChanged.connect(self.on_scroll)
+        self.highlighter = MatchHighlighter(self.text_edit.document())
         self.text_edit.setStyleSheet("""
             QPlainTextEdit {
                 background-color: #1a1a2e;
@@ -443,117 +1470,160 @@ class AdvancedUsageDialog(QDialog):
             return
             
         file_path = self.file_paths[index]
-        self.current_match_cursors = []
+        self.close_text()
+        self.match_positions = {}
+        self.highlighter.set_spans({})
         self.current_match_index = -1
+        self.window = None
         
-        # Charger le contenu
+        # Projection en mémoire : rien n'est lu avant l'affichage d'une fenêtre
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-            
-            # Remplissage
-            self.text_edit.setPlainText(content)
-            
-            # Recherche et Highlight
-            self.highlight_matches()
-            
-            # Aller au premier match
-            if self.current_match_cursors:
-                self.next_match()
-            else:
-                self.match_label.setText("Occurrence : 0 / 0")
-
-        except Exception as e:
+            self.text = MappedText(file_path)
+        except (OSError, ValueError) as e:
             self.text_edit.setPlainText(f"Erreur de lecture du fichier : {e}")
-
-    def highlight_matches(self):
-        """Surligne toutes les occurrences et stocke leurs positions"""
-        doc = self.text_edit.document()
-        cursor = QTextCursor(doc)
-        
-        # Reset format
-        cursor.select(QTextCursor.SelectionType.Document)
-        format_normal = QTextCharFormat()
-        format_normal.setBackground(QColor("#1a1a2e")) # Fond normal
-        cursor.setCharFormat(format_normal)
-        cursor.clearSelection() # Clear selection after applying format
-        
-        # Find format
-        format_highlight = QTextCharFormat()
-        format_highlight.setBackground(QColor("#533483")) # Fond violet sombre pour tous les matches
-        format_highlight.setForeground(Qt.GlobalColor.white)
-        format_highlight.setFontWeight(QFont.Weight.Bold)
-        
-        # Setup Regex
-        # Escape the search term to treat it as literal string but allow case insensitive flag
-        regex = QRegularExpression(QRegularExpression.escape(self.image_name))
-        regex.setPatternOptions(QRegularExpression.PatternOption.CaseInsensitiveOption)
-        
-        # Search loop
-        cursor = QTextCursor(doc)
-        while True:
-            # find() with QRegularExpression returns a cursor with selection covering the match
-            cursor = doc.find(regex, cursor)
-            
-            if cursor.isNull():
-                break
-                
-            cursor.mergeCharFormat(format_highlight)
-            self.current_match_cursors.append(QTextCursor(cursor)) # Store copy
+            return
         
-        # Update UI count
-        self.match_label.setText(f"Occurrence : 0 / {len(self.current_match_cursors)}")
+        self.text_edit.setPlainText("")
+        self.indexer.start(self.text, self.image_name)
+        if self.text.complete:  # Fichier vide
+            self.show_window(0)
+        self.update_match_label()
+
+    def close_text(self):
+        self.indexer.cancel()
+        if self.text is not None:
+            self.text.close()
+            self.text = None
+
+    def done(self, result):
+        self.close_text()
+        super().done(result)
+
+    def on_indexed(self, fraction):
+        """Bloc indexé : première fenêtre dès le premier bloc, puis saut à la
+        première occurrence dès qu'elle est trouvée"""
+        if self.current_match_index < 0 and len(self.text.matches):
+            self.next_match()
+        elif self.window is None:
+            self.show_window(0)
+        self.update_match_label()
+
+    def update_match_label(self):
+        total = len(self.text.matches) if self.text is not None else 0
+        label = f"Occurrence : {self.current_match_index + 1} / {total}"
+        if self.text is not None and not self.text.complete:
+            label += f" (indexation {self.text.indexed_bytes * 100 // self.text.size} %)"
+        self.match_label.setText(label)
+
+    def show_window(self, center, anchor=None, active=-1):
+        """Affiche les lignes autour de l'octet center ; anchor : octet à
+        garder visible (défilement continu au bord de la fenêtre), active :
+        occurrence à surligner comme courante"""
+        text = self.text
+        line = text.line_of(center)
+        first = max(0, line - self.WINDOW_LINES // 2)
+        last = min(len(text.line_starts), line + self.WINDOW_LINES // 2 + 1)
+        start, end = text.line_range(first, last)
+        if end - start > self.WINDOW_BYTES:
+            start = max(start, min(center - self.WINDOW_BYTES // 2, end - self.WINDOW_BYTES))
+            end = min(end, start + self.WINDOW_BYTES)
+            first = text.line_of(start)
+        
+        content = text.decode(start, end)
+        if content.endswith('\n'):
+            content = content[:-1]
+        self.window = (start, end, first)
+        self.highlight_matches(active)
+        self.shifting_window = True
+        self.text_edit.setPlainText(content)
+        self.text_edit.set_first_line(first + 1)
+        if anchor is not None:
+            bar = self.text_edit.verticalScrollBar()
+            if anchor <= start + (end - start) // 2:
+                bar.setValue(bar.maximum())  # Ancre ramenée en haut
+            cursor = QTextCursor(self.text_edit.document())
+            cursor.setPosition(self.window_position(anchor))
+            self.text_edit.setTextCursor(cursor)
+            self.text_edit.ensureCursorVisible()
+        self.shifting_window = False
+
+    def window_position(self, offset):
+        """Position dans le document affiché d'un octet de la fenêtre"""
+        start = self.window[0]
+        return qt_length(self.text.decode(start, offset))
+
+    def on_scroll(self, value):
+        """Bord de la fenêtre atteint : fenêtre suivante / précédente"""
+        if self.shifting_window or self.window is None or self.text is None:
+            return
+        start, end, _ = self.window
+        bar = self.text_edit.verticalScrollBar()
+        if value >= bar.maximum() and end < self.text.indexed_bytes:
+            self.show_window(end, anchor=end)
+        elif value <= bar.minimum() and start > 0:
+            self.show_window(start, anchor=start)
+
+    def highlight_matches(self, active=-1):
+        """Positions (bloc, colonne) des occurrences de la fenêtre, calculées
+        depuis leurs offsets ; le surligneur les colore au remplissage"""
+        start, end, first = self.window
+        text = self.text
+        matches = text.matches
+        first_index = int(np.searchsorted(matches, start))
+        last_index = int(np.searchsorted(matches, end - self.match_length, side='right'))
+        offsets = matches[first_index:last_index]
+        lines = np.searchsorted(text.line_starts, offsets, side='right') - 1
+        
+        # Colonnes de proche en proche sur chaque ligne (un seul décodage de la fenêtre)
+        spans = {}
+        self.match_positions = {}
+        previous_line, previous, column = -1, start, 0
+        for index, offset, line in zip(range(first_index, last_index), offsets.tolist(), lines.tolist()):
+            if line != previous_line:
+                previous_line, previous, column = line, max(int(text.line_starts[line]), start), 0
+            column += qt_length(text.decode(previous, offset))
+            previous = offset
+            length = qt_length(text.decode(offset, offset + self.match_length))
+            spans.setdefault(line - first, []).append((column, length, index))
+            self.match_positions[index] = (line - first, column)
+        self.highlighter.set_spans(spans, active)
 
     def next_match(self):
-        if not self.current_match_cursors:
+        if self.text is None or not len(self.text.matches):
             return
             
         self.current_match_index += 1
-        if self.current_match_index >= len(self.current_match_cursors):
+        if self.current_match_index >= len(self.text.matches):
             self.current_match_index = 0
         
         self.focus_match(self.current_match_index)
 
     def prev_match(self):
-        if not self.current_match_cursors:
+        if self.text is None or not len(self.text.matches):
             return
             
         self.current_match_index -= 1
         if self.current_match_index < 0:
-            self.current_match_index = len(self.current_match_cursors) - 1
+            self.current_match_index = len(self.text.matches) - 1
             
         self.focus_match(self.current_match_index)
         
     def focus_match(self, index):
-        # Reset previous active if any (complex to track, so let's just re-highlight all then highlight active)
-        # Optimization: keep track of last active index
-        
-        # For simplicity: Re-highlight all simply ensures base color, then apply active color to current.
-        # But `highlight_matches` rebuilds list. We don't want that.
-        # Just iterating colors is fine.
-        
-        format_highlight = QTextCharFormat()
-        format_highlight.setBackground(QColor("#533483"))
-        format_highlight.setForeground(Qt.GlobalColor.white)
-        format_highlight.setFontWeight(QFont.Weight.Bold)
-        
-        format_active = QTextCharFormat()
-        format_active.setBackground(QColor("#e94560")) 
-        format_active.setForeground(Qt.GlobalColor.white)
-        format_active.setFontWeight(QFont.Weight.Bold)
-
-        # Reset all to normal highlight
-        for cur in self.current_match_cursors:
-             cur.setCharFormat(format_highlight)
-             
-        # Set active
-        cursor = self.current_match_cursors[index]
-        cursor.setCharFormat(format_active)
-
+        # Occurrence hors de la fenêtre : fenêtre recentrée dessus (déjà active)
+        if index not in self.match_positions:
+            self.show_window(int(self.text.matches[index]), active=index)
+        else:
+            self.highlighter.set_active(index)  # Ancienne et nouvelle occurrence seulement
+        
+        block_number, column = self.match_positions[index]
+        cursor = QTextCursor(self.text_edit.document())
+        cursor.setPosition(self.text_edit.document().findBlockByNumber(block_number).position() + column)
+        self.shifting_window = True
         self.text_edit.setTextCursor(cursor)
         self.text_edit.centerCursor()
+        self.shifting_window = False
         
-        self.match_label.setText(f"Occurrence : {index + 1} / {len(self.current_match_cursors)}")
+        self.update_match_label()
 
 
 class TextureCleaner(QMainWindow):
@@ -569,13 +1639,86 @@ class TextureCleaner(QMainWindow):
         self.current_folder_path = ""  # Chemin du dossier actuel
         self.resize_folder_path = "" # Chemin du dossier pour l'onglet Resize
         
-        # ThreadPool pour le chargement d'images
-        self.thread_pool = QThreadPool()
-        self.thumbnail_cache = {}  # Cache RAM pour les miniatures
+        # Pipeline I/O + décodage pour le chargement d'images
+        self.image_pipeline = ImagePipeline(self)
+        self.thumbnail_cache = ImageMemoryCache()  # Cache RAM des miniatures, (chemin, niveau) -> QImage
+        self.disk_cache = ThumbnailDiskCache(os.path.join(default_cache_dir(), 'thumbnails'))  # Cache disque entre sessions
+        self.thumbnail_preloader = ThumbnailPreloader(self.image_pipeline, self.thumbnail_cache, self.disk_cache, parent=self)
+        settings = app_settings()
+        self.resize_engine = BatchResizeEngine(
+            settings.value('resize/workers', QThread.idealThreadCount(), type=int),
+            settings.value('resize/memory_budget_mb', DEFAULT_MEMORY_BUDGET // (1024 * 1024), type=int) * 1024 * 1024,
+            self)
+        self.resize_engine.progress.connect(self.on_resize_progress)
+        self.resize_engine.finished.connect(self.on_resize_finished)
+        self.resize_engine.job_finished.connect(self.on_batch_job_finished)
+        self.resize_overwrite = False
+        self.batch_report_path = None
+        self.batch_manifest = None
+        self.batch_journal = BatchJournal()  # Reprise des lots interrompus
+        self.batch_results = []
+        self.usage_counter = UsageCounter(self)  # Références par texture, toutes sources
+        self.usage_counter.finished.connect(self.on_usage_counted)
+        self.usage_counts = {}
+        self.usage_by_file = {}
+        self.pending_usage_popup = None  # Popup demandée pendant le comptage
+        self.file_operations = FileOperationEngine(parent=self)
+        self.file_operation_dialog = None
+        self.file_operation_gallery = None
+        self.file_operation_dest = None
+        self.file_operations.progress.connect(self.on_file_operation_progress)
+        self.file_operations.finished.connect(self.on_file_operation_finished)
+        self.size_estimator = SizeEstimator(parent=self)  # Poids de sortie par encodage d'essai
+        self.size_estimator.set_budget(self.resize_engine)  # Estimations comptées dans le budget mémoire du lot
+        self.size_estimator.estimated.connect(self.schedule_resize_preview)
+        self.estimated_paths = set()  # Estimations arrivées depuis le dernier rafraîchissement
+        # Parcours progressif de l'onglet Resize, dimensions en cache entre les sessions
+        self.metadata_cache = MetadataCache(os.path.join(default_cache_dir(), 'image_metadata.json'))
+        self.resize_scanner = FolderScanner(self.metadata_cache, self)
+        self.resize_scanner.files_found.connect(self.on_resize_files_found)
+        self.resize_scanner.dimensions_read.connect(self.on_resize_dimensions_read)
+        self.resize_scanner.finished.connect(self.on_resize_scan_finished)
+        # Parcours du dossier de la galerie : même mécanisme, liste redessinée par paliers
+        self.folder_scanner = FolderScanner(self.metadata_cache, self)
+        self.folder_scanner.files_found.connect(self.on_folder_files_found)
+        self.folder_scanner.dimensions_read.connect(self.on_folder_dimensions_read)
+        self.folder_scanner.finished.connect(self.on_folder_scan_finished)
+        self.folder_files_by_path = {}
+        self.folder_items = {}  # Chemin -> bouton de la liste dossier
+        self.folder_stats = (0, 0, 0, 0)  # Fichiers comptés, poids du dossier, images référencées, leur poids
+        self.folder_arrived = []  # Fichiers arrivés depuis le dernier palier du parcours
+        self.folder_dimensioned = []  # Fichiers dont les dimensions sont arrivées depuis
+        self.folder_refresh_timer = QTimer(self)
+        self.folder_refresh_timer.setSingleShot(True)
+        self.folder_refresh_timer.setInterval(300)  # Regroupe les lots du parcours
+        self.folder_refresh_timer.timeout.connect(self.refresh_folder_view)
+        self.resize_preview_timer = QTimer(self)
+        self.resize_preview_timer.setSingleShot(True)
+        self.resize_preview_timer.setInterval(200)  # Regroupe les estimations qui arrivent
+        self.resize_preview_timer.timeout.connect(self.refresh_estimated_rows)
         
         self.setWindowIcon(QIcon(resource_path('icone_final.ico')))
         self.init_ui()
+        QTimer.singleShot(0, self.offer_batch_resume)
     
+    def closeEvent(self, event):
+        """Attend les workers puis sauvegarde le cache disque des miniatures"""
+        self.thumbnail_preloader.stop()
+        self.resize_scanner.cancel()
+        self.resize_scanner.wait()
+        self.folder_scanner.cancel()
+        self.folder_scanner.wait()
+        self.file_operations.cancel()
+        self.file_operations.wait()
+        self.resize_engine.cancel()
+        self.resize_engine.wait()
+        self.batch_journal.close()  # Lot en cours : journal conservé pour la reprise
+        shutdown_process_pool()
+        self.size_estimator.stop()
+        self.image_pipeline.shutdown()
+        self.disk_cache.close()
+        super().closeEvent(event)
+
     def init_ui(self):
         # Création des onglets
         self.tabs = QTabWidget()
@@ -696,16 +1839,23 @@ class TextureCleaner(QMainWindow):
         self.select_all_cb.toggled.connect(self.toggle_all_checkboxes)
         select_layout.addWidget(self.select_all_cb)
         select_layout.addStretch()
+        select_layout.addWidget(QLabel("Côté min :"))
+        self.resize_min_dim_spin = QSpinBox()
+        self.resize_min_dim_spin.setRange(0, 65535)
+        self.resize_min_dim_spin.setSingleStep(256)
+        self.resize_min_dim_spin.setSuffix(" px")
+        self.resize_min_dim_spin.valueChanged.connect(self.apply_resize_filter)
+        select_layout.addWidget(self.resize_min_dim_spin)
         left_layout.addLayout(select_layout)
         
-        # Tableau des fichiers (Remplace QListWidget)
-        self.resize_table = QTableWidget()
-        self.resize_table.setColumnCount(3)
-        self.resize_table.setHorizontalHeaderLabels(["Fichier", "Dimensions (Av. > Ap.)", "Poids (Av. > Ap.)"])
+        # Tableau des fichiers : vue sur un modèle à tableaux compacts
+        self.resize_model = ResizeTableModel(ImageThumbnail.format_file_size, self)
+        self.resize_table = QTableView()
+        self.resize_table.setModel(self.resize_model)
         
         # Config tableau style
         self.resize_table.setStyleSheet("""
-            QTableWidget {
+            QTableView {
                 background-color: #1a1a2e;
                 color: #f1f1f1;
                 gridline-color: #533483;
@@ -719,21 +1869,32 @@ class TextureCleaner(QMainWindow):
                 border: none;
                 font-weight: bold;
             }
-            QTableWidget::item {
+            QTableView::item {
                 padding: 5px;
             }
-            QTableWidget::item:selected {
+            QTableView::item:selected {
                 background-color: #e94560;
                 color: white;
             }
         """)
         self.resize_table.horizontalHeader().setSectionResizeMode(0, QHeaderView.ResizeMode.Stretch)
-        self.resize_table.horizontalHeader().setSectionResizeMode(1, QHeaderView.ResizeMode.ResizeToContents)
-        self.resize_table.horizontalHeader().setSectionResizeMode(2, QHeaderView.ResizeMode.ResizeToContents)
-        self.resize_table.setSelectionBehavior(QTableWidget.SelectionBehavior.SelectRows)
+        # Largeur fixe : ResizeToContents mesurerait toutes les lignes à chaque changement
+        self.resize_table.horizontalHeader().setSectionResizeMode(1, QHeaderView.ResizeMode.Interactive)
+        self.resize_table.horizontalHeader().setSectionResizeMode(2, QHeaderView.ResizeMode.Interactive)
+        self.resize_table.setColumnWidth(1, 230)
+        self.resize_table.setColumnWidth(2, 200)
+        self.resize_table.setSelectionBehavior(QTableView.SelectionBehavior.SelectRows)
+        self.resize_table.setSortingEnabled(True)  # Tri numérique par le modèle
         self.resize_table.verticalHeader().setVisible(False)
-        self.resize_table.cellDoubleClicked.connect(self.open_image_popup_from_table) # Popup double clic
-        self.resize_table.itemSelectionChanged.connect(self.reset_resize_options_ui) # Reset UI on selection change
+        self.resize_table.verticalHeader().setDefaultSectionSize(28)
+        self.resize_table.doubleClicked.connect(self.open_image_popup_from_table) # Popup double clic
+        # Lignes masquées par le filtre, telles que connues de la vue (None = à relire)
+        self.resize_hidden = np.zeros(0, dtype=bool)
+        self.resize_model.modelReset.connect(lambda: setattr(self, 'resize_hidden', np.zeros(0, dtype=bool)))
+        self.resize_model.rowsInserted.connect(lambda parent, first, last: setattr(
+            self, 'resize_hidden', np.concatenate((self.resize_hidden, np.zeros(last - first + 1, dtype=bool)))))
+        self.resize_model.layoutChanged.connect(lambda: setattr(self, 'resize_hidden', None))
+        self.resize_table.selectionModel().selectionChanged.connect(self.reset_resize_options_ui) # Reset UI on selection change
         
         left_layout.addWidget(self.resize_table)
         
@@ -763,7 +1924,11 @@ class TextureCleaner(QMainWindow):
         self.ratio_options_frame.setLayout(ratio_layout)
         
         self.ratio_type_combo = QComboBox()
-        self.ratio_type_combo.addItems(["Pourcentage de réduction", "Largeur fixe (Hauteur auto)", "Hauteur fixe (Largeur auto)"])
+        self.ratio_type_combo.addItems([
+            "Pourcentage de réduction", "Largeur fixe (Hauteur auto)", "Hauteur fixe (Largeur auto)",
+            "Puissance de 2 la plus proche", "Puissance de 2 inférieure", "Puissance de 2 supérieure",
+            "Côté max (plafond)"
+        ])
         ratio_layout.addWidget(self.ratio_type_combo)
         
         self.ratio_value_spin = QSpinBox()
@@ -799,6 +1964,70 @@ class TextureCleaner(QMainWindow):
         fixed_layout.addLayout(fixed_form)
         right_layout.addWidget(self.fixed_options_frame)
         
+        # Chaîne de mipmaps (chaque niveau réduit depuis le précédent)
+        self.mipmaps_cb = QCheckBox("Générer la chaîne de mipmaps (_mip1, _mip2...)")
+        right_layout.addWidget(self.mipmaps_cb)
+        
+        # Filtre de rééchantillonnage (numpy : calcul dans des processus de travail)
+        resampler_layout = QHBoxLayout()
+        resampler_layout.addWidget(QLabel("Filtre :"))
+        self.resampler_combo = QComboBox()
+        for label, name in RESAMPLERS:
+            self.resampler_combo.addItem(label, name)
+        resampler_layout.addWidget(self.resampler_combo)
+        self.linear_light_cb = QCheckBox("Lumière linéaire")
+        self.linear_light_cb.setToolTip("Réduction en espace linéaire (sRGB décodé) : pas d'assombrissement des détails fins")
+        self.linear_light_cb.setChecked(True)
+        resampler_layout.addWidget(self.linear_light_cb)
+        self.resampler_combo.currentIndexChanged.connect(
+            lambda: self.linear_light_cb.setEnabled(self.resampler_combo.currentData() != RESAMPLE_QT))
+        self.linear_light_cb.setEnabled(False)
+        right_layout.addLayout(resampler_layout)
+        
+        # Encodage de sortie
+        output_frame = QFrame()
+        output_layout = QGridLayout()
+        output_frame.setLayout(output_layout)
+        
+        output_layout.addWidget(QLabel("Format :"), 0, 0)
+        self.output_format_combo = QComboBox()
+        for label, fmt in OUTPUT_FORMATS:
+            self.output_format_combo.addItem(label, fmt)
+        output_layout.addWidget(self.output_format_combo, 0, 1)
+        
+        output_layout.addWidget(QLabel("Qualité (JPEG/WebP) :"), 1, 0)
+        self.output_quality_spin = QSpinBox()
+        self.output_quality_spin.setRange(1, 100)
+        output_layout.addWidget(self.output_quality_spin, 1, 1)
+        
+        output_layout.addWidget(QLabel("Compression PNG :"), 2, 0)
+        self.png_compression_spin = QSpinBox()
+        self.png_compression_spin.setRange(0, 9)
+        output_layout.addWidget(self.png_compression_spin, 2, 1)
+        
+        self.strip_alpha_cb = QCheckBox("Supprimer l'alpha")
+        output_layout.addWidget(self.strip_alpha_cb, 3, 0, 1, 2)
+        
+        output_layout.addWidget(QLabel("Optimiser :"), 4, 0)
+        self.optimize_combo = QComboBox()
+        self.optimize_combo.addItems(["Non", "Poids cible (Ko)", "Budget d'erreur (PSNR dB)"])
+        output_layout.addWidget(self.optimize_combo, 4, 1)
+        
+        self.target_kb_spin = QSpinBox()
+        self.target_kb_spin.setRange(1, 1024 * 1024)
+        self.target_kb_spin.setSuffix(" Ko")
+        output_layout.addWidget(self.target_kb_spin, 5, 0)
+        self.min_psnr_spin = QDoubleSpinBox()
+        self.min_psnr_spin.setRange(20.0, 60.0)
+        self.min_psnr_spin.setSingleStep(0.5)
+        self.min_psnr_spin.setSuffix(" dB")
+        output_layout.addWidget(self.min_psnr_spin, 5, 1)
+        
+        self.output_format_combo.currentIndexChanged.connect(self.update_output_ui)
+        self.optimize_combo.currentIndexChanged.connect(self.update_output_ui)
+        right_layout.addWidget(output_frame)
+        self.reset_output_options_ui()
+        
         # Bouton Appliquer à la sélection
         self.apply_btn = QPushButton("Associer ces réglages à la sélection")
         self.apply_btn.setStyleSheet("""
@@ -848,7 +2077,33 @@ class TextureCleaner(QMainWindow):
             }
         """)
         self.execute_btn.clicked.connect(self.execute_resize)
-        bottom_layout.addWidget(self.execute_btn)
+        
+        # Recompression PNG sans perte (quand le redimensionnement n'est pas permis)
+        self.png_optimize_btn = QPushButton("🗜️ Recompresser les PNG (sans perte)")
+        self.png_optimize_btn.setToolTip("Supprime les métadonnées, essaie filtres et réglages zlib, garde le plus petit fichier aux pixels identiques")
+        self.png_optimize_btn.setStyleSheet("""
+            QPushButton {
+                background-color: #533483;
+                color: white;
+                font-weight: bold;
+                padding: 15px;
+                font-size: 14px;
+                border-radius: 8px;
+            }
+            QPushButton:hover { background-color: #6a42a8; }
+        """)
+        self.png_optimize_btn.clicked.connect(self.execute_png_optimization)
+        
+        # Manifeste : les sorties déjà produites avec les mêmes entrées et réglages sont sautées
+        self.incremental_cb = QCheckBox("Ignorer les images déjà à jour (manifeste dans le dossier de sortie)")
+        self.incremental_cb.setChecked(app_settings().value('resize/incremental', True, type=bool))
+        self.incremental_cb.toggled.connect(lambda checked: app_settings().setValue('resize/incremental', checked))
+        bottom_layout.addWidget(self.incremental_cb)
+        
+        actions_layout = QHBoxLayout()
+        actions_layout.addWidget(self.execute_btn, 2)
+        actions_layout.addWidget(self.png_optimize_btn, 1)
+        bottom_layout.addLayout(actions_layout)
 
         resize_main_layout.addWidget(bottom_container)
 
@@ -939,12 +2194,102 @@ class TextureCleaner(QMainWindow):
                 border: 1px solid #533483;
             }
         """)
-    
-    def create_source_column(self):
-        group = QGroupBox("📄 Source texte")
+
+        self.create_status_bar()
+
+    def create_status_bar(self):
+        """Barre d'état : métriques du pipeline d'images + réglage des pools"""
+        status_bar = self.statusBar()
+        status_bar.setStyleSheet("QStatusBar { background-color: #0f3460; color: #aaa; font-size: 11px; }")
+
+        self.pipeline_label = QLabel()
+        self.pipeline_label.setStyleSheet("color: #aaa; font-size: 11px;")
+        status_bar.addPermanentWidget(self.pipeline_label)
+
+        pipeline_btn = QPushButton("⚙️")
+        pipeline_btn.setFixedSize(28, 22)
+        pipeline_btn.setToolTip("Réglages du pipeline d'images")
+        pipeline_btn.setStyleSheet("QPushButton { padding: 0px; background-color: #533483; border-radius: 4px; }")
+        pipeline_btn.clicked.connect(self.show_pipeline_settings)
+        status_bar.addPermanentWidget(pipeline_btn)
+
+        self.pipeline_timer = QTimer(self)
+        self.pipeline_timer.setInterval(1000)
+        self.pipeline_timer.timeout.connect(self.update_pipeline_stats)
+        self.pipeline_timer.start()
+        self.update_pipeline_stats()
+
+    def update_pipeline_stats(self):
+        """Affiche file d'attente, threads actifs et utilisation de chaque étape"""
+        parts = []
+        for stage in (self.image_pipeline.io, self.image_pipeline.decode):
+            queued, active, threads, utilization = stage.snapshot()
+            parts.append(f"{stage.name} : {active}/{threads} actifs, {queued} en file, {utilization * 100:.0f}%")
+        self.pipeline_label.setText("  |  ".join(parts))
+
+    def show_pipeline_settings(self):
+        """Dialogue de réglage du nombre de threads I/O et décodage"""
+        dialog = QDialog(self)
+        dialog.setWindowTitle("Pipeline d'images")
         layout = QVBoxLayout()
-        
-        # Layout boutons
+
+        io_layout = QHBoxLayout()
+        io_layout.addWidget(QLabel("Threads I/O (lecture disque) :"))
+        io_spin = QSpinBox()
+        io_spin.setRange(1, 64)
+        io_spin.setValue(self.image_pipeline.io.pool.maxThreadCount())
+        io_layout.addWidget(io_spin)
+        layout.addLayout(io_layout)
+
+        decode_layout = QHBoxLayout()
+        decode_layout.addWidget(QLabel(f"Threads décodage ({QThread.idealThreadCount()} cœurs) :"))
+        decode_spin = QSpinBox()
+        decode_spin.setRange(1, 256)
+        decode_spin.setValue(self.image_pipeline.decode.pool.maxThreadCount())
+        decode_layout.addWidget(decode_spin)
+        layout.addLayout(decode_layout)
+
+        resize_layout = QHBoxLayout()
+        resize_layout.addWidget(QLabel("Threads redimensionnement :"))
+        resize_spin = QSpinBox()
+        resize_spin.setRange(1, 256)
+        resize_spin.setValue(self.resize_engine.max_workers)
+        resize_layout.addWidget(resize_spin)
+        layout.addLayout(resize_layout)
+
+        budget_layout = QHBoxLayout()
+        budget_layout.addWidget(QLabel("Budget mémoire redimensionnement :"))
+        budget_spin = QSpinBox()
+        budget_spin.setRange(256, 1024 * 1024)
+        budget_spin.setSingleStep(256)
+        budget_spin.setSuffix(" MB")
+        budget_spin.setValue(self.resize_engine.memory_budget // (1024 * 1024))
+        budget_layout.addWidget(budget_spin)
+        layout.addLayout(budget_layout)
+
+        button_box = QDialogButtonBox(QDialogButtonBox.StandardButton.Ok | QDialogButtonBox.StandardButton.Cancel)
+        button_box.accepted.connect(dialog.accept)
+        button_box.rejected.connect(dialog.reject)
+        layout.addWidget(button_box)
+
+        dialog.setLayout(layout)
+        dialog.setStyleSheet("QDialog { background-color: #1a1a2e; }")
+
+        if dialog.exec() == QDialog.DialogCode.Accepted:
+            self.image_pipeline.set_thread_counts(io_spin.value(), decode_spin.value())
+            self.image_pipeline.save_settings()
+            self.thumbnail_preloader.pools_resized()
+            self.resize_engine.pool.setMaxThreadCount(resize_spin.value())
+            self.resize_engine.memory_budget = budget_spin.value() * 1024 * 1024
+            settings = app_settings()
+            settings.setValue('resize/workers', resize_spin.value())
+            settings.setValue('resize/memory_budget_mb', budget_spin.value())
+    
+    def create_source_column(self):
+        group = QGroupBox("📄 Source texte")
+        layout = QVBoxLayout()
+        
+        # Layout boutons
         btn_layout = QHBoxLayout()
         
         # Bouton de sélection
@@ -979,6 +2324,21 @@ class TextureCleaner(QMainWindow):
         refresh_btn.clicked.connect(self.reload_source_files)
         btn_layout.addWidget(refresh_btn)
         
+        # Export des références (CSV)
+        export_btn = QPushButton("📤")
+        export_btn.setFixedSize(40, 40)
+        export_btn.setToolTip("Exporter le nombre de références par texture (CSV)")
+        export_btn.setStyleSheet("""
+            QPushButton {
+                background: qlineargradient(x1:0, y1:0, x2:1, y2:1,
+                    stop:0 #00d9ff, stop:1 #00a8cc);
+                color: white;
+                font-size: 20px;
+            }
+        """)
+        export_btn.clicked.connect(self.export_usage_counts)
+        btn_layout.addWidget(export_btn)
+        
         layout.addLayout(btn_layout)
         
         # Liste des fichiers importés
@@ -1014,6 +2374,16 @@ class TextureCleaner(QMainWindow):
         self.source_search.textChanged.connect(self.refresh_source_list)
         layout.addWidget(self.source_search)
         
+        # Tri (références comptées en arrière-plan sur toutes les sources)
+        source_sort_layout = QHBoxLayout()
+        source_sort_layout.addWidget(QLabel("Tri :"))
+        self.source_sort_combo = QComboBox()
+        self.source_sort_combo.addItems(["Nom", "Références (plus citées)", "Références (moins citées)"])
+        self.source_sort_combo.currentIndexChanged.connect(self.refresh_source_list)
+        source_sort_layout.addWidget(self.source_sort_combo)
+        source_sort_layout.addStretch()
+        layout.addLayout(source_sort_layout)
+        
         # Liste des images (Créée avant les filtres pour éviter le crash)
         scroll = QScrollArea()
         scroll.setWidgetResizable(True)
@@ -1082,6 +2452,21 @@ class TextureCleaner(QMainWindow):
         refresh_btn.clicked.connect(self.reload_folder_files)
         btn_layout.addWidget(refresh_btn)
         
+        # Quarantaine (restauration / purge)
+        quarantine_btn = QPushButton("🧳")
+        quarantine_btn.setFixedSize(40, 40)
+        quarantine_btn.setToolTip("Quarantaine : restaurer ou purger les fichiers supprimés")
+        quarantine_btn.setStyleSheet("""
+            QPushButton {
+                background: qlineargradient(x1:0, y1:0, x2:1, y2:1,
+                    stop:0 #ff9800, stop:1 #f57c00);
+                color: white;
+                font-size: 20px;
+            }
+        """)
+        quarantine_btn.clicked.connect(self.show_quarantine_dialog)
+        btn_layout.addWidget(quarantine_btn)
+        
         layout.addLayout(btn_layout)
         
 
@@ -1100,6 +2485,21 @@ class TextureCleaner(QMainWindow):
         self.folder_list_widget.setLayout(self.folder_list_layout)
         scroll.setWidget(self.folder_list_widget)
 
+        # Tri et filtre par dimensions (issues des en-têtes, créés avant les filtres)
+        sort_layout = QHBoxLayout()
+        sort_layout.addWidget(QLabel("Tri :"))
+        self.folder_sort_combo = QComboBox()
+        self.folder_sort_combo.addItems(["Nom", "Dimensions (plus grandes)", "Poids (plus lourds)"])
+        self.folder_sort_combo.currentIndexChanged.connect(self.refresh_folder_list)
+        sort_layout.addWidget(self.folder_sort_combo)
+        sort_layout.addWidget(QLabel("Côté min :"))
+        self.folder_min_dim_spin = QSpinBox()
+        self.folder_min_dim_spin.setRange(0, 65535)
+        self.folder_min_dim_spin.setSingleStep(256)
+        self.folder_min_dim_spin.setSuffix(" px")
+        self.folder_min_dim_spin.valueChanged.connect(self.refresh_folder_list)
+        sort_layout.addWidget(self.folder_min_dim_spin)
+
         # Filtres
         filter_layout = QHBoxLayout()
         self.folder_filter_group = QButtonGroup()
@@ -1115,6 +2515,8 @@ class TextureCleaner(QMainWindow):
                 radio.setChecked(True)
         
         layout.addLayout(filter_layout)
+
+        layout.addLayout(sort_layout)
         layout.addWidget(scroll)
         
         group.setLayout(layout)
@@ -1243,6 +2645,51 @@ class TextureCleaner(QMainWindow):
                 all_images.add(img)
         
         self.source_files = list(all_images)
+        
+        # Références de toutes les textures, en une passe par source
+        paths = [source_file['filePath'] for source_file in self.imported_source_files]
+        if paths and self.source_files:
+            self.usage_counter.start(paths, self.source_files)
+        else:
+            self.usage_counts, self.usage_by_file = {}, {}
+    
+    def on_usage_counted(self, totals, per_file, errors):
+        self.usage_counts = totals
+        self.usage_by_file = per_file
+        for file_path, error in errors.items():
+            print(f"Erreur lecture {file_path}: {error}")
+        self.refresh_source_list()
+        image_name, self.pending_usage_popup = self.pending_usage_popup, None
+        if image_name in self.source_files:
+            self.show_usage_popup(image_name)
+    
+    def export_usage_counts(self):
+        """CSV : références par texture, total et détail par fichier source"""
+        if not self.source_files:
+            QMessageBox.information(self, "Info", "Aucun fichier source importé.")
+            return
+        if self.usage_counter.is_running():
+            QMessageBox.information(self, "Info", "Comptage des références en cours, réessayez dans un instant.")
+            return
+        path, _ = QFileDialog.getSaveFileName(self, "Exporter les références", "references_textures.csv",
+                                              "CSV (*.csv)")
+        if not path:
+            return
+        
+        import csv
+        sources = list(self.usage_by_file)
+        folder_names = {f['name'].lower() for f in self.folder_files}
+        try:
+            with open(path, 'w', newline='', encoding='utf-8') as f:
+                writer = csv.writer(f, delimiter=';')
+                writer.writerow(["Texture", "Références", "Dans le dossier"] + [os.path.basename(p) for p in sources])
+                for name in sorted(self.source_files, key=lambda n: (-self.usage_counts.get(n, 0), n)):
+                    writer.writerow([name, self.usage_counts.get(name, 0), "oui" if name in folder_names else "non"]
+                                    + [self.usage_by_file[p].get(name, 0) for p in sources])
+        except OSError as e:
+            QMessageBox.warning(self, "Erreur", f"Export impossible : {e}")
+            return
+        QMessageBox.information(self, "Export", f"Références exportées : {path}")
     
     def update_imported_files_list(self):
         """Affiche la liste des fichiers importés"""
@@ -1266,29 +2713,66 @@ class TextureCleaner(QMainWindow):
             QMessageBox.information(self, "Info", "Aucun dossier sélectionné ou dossier introuvable.")
 
     def scan_folder(self, folder_path):
-        """Scanne un dossier pour trouver les images"""
+        """Scanne un dossier pour trouver les images (en arrière-plan : les
+        fichiers puis leurs dimensions arrivent par lots)"""
+        self.folder_scanner.cancel()
         self.folder_files = []
+        self.folder_files_by_path = {}
+        self.folder_arrived, self.folder_dimensioned = [], []
         image_extensions = ['.jpg', '.jpeg', '.png', '.gif', '.bmp', '.webp', '.tiff', '.tif']
-        
-        # Parcourir récursivement le dossier
-        for root, dirs, files in os.walk(folder_path):
-            for file in files:
-                ext = os.path.splitext(file)[1].lower()
-                if ext in image_extensions:
-                    full_path = os.path.join(root, file)
-                    try:
-                        size = os.path.getsize(full_path)
-                        self.folder_files.append({
-                            'name': file,
-                            'path': full_path,
-                            'size': size
-                        })
-                    except:
-                        pass
-        
+        self.folder_scanner.scan(folder_path, image_extensions)
         self.refresh_folder_list()
         self.update_stats()
 
+    def on_folder_files_found(self, batch):
+        for path, size, width, height, info in batch:
+            file_info = {'name': os.path.basename(path), 'path': path, 'size': size}
+            if info:  # En-tête en cache ; sinon lu en arrière-plan (à venir)
+                file_info.update(info)
+            self.folder_files.append(file_info)
+            self.folder_files_by_path[path] = file_info
+            self.folder_arrived.append(file_info)
+        if not self.folder_refresh_timer.isActive():
+            self.folder_refresh_timer.start()
+
+    def on_folder_dimensions_read(self, batch):
+        for path, width, height, info in batch:
+            file_info = self.folder_files_by_path.get(path)
+            if file_info is not None and info:
+                file_info.update(info)
+                self.folder_dimensioned.append(file_info)
+        if not self.folder_refresh_timer.isActive():
+            self.folder_refresh_timer.start()
+
+    def on_folder_scan_finished(self):
+        self.folder_refresh_timer.stop()
+        if self.folder_sort_combo.currentIndex():
+            # Tri par dimensions ou poids : ordre définitif connu maintenant seulement
+            self.folder_arrived, self.folder_dimensioned = [], []
+            self.refresh_folder_list()
+        else:
+            self.refresh_folder_view()
+        self.update_stats()
+
+    def refresh_folder_view(self):
+        """Palier du parcours : ajoute à la liste et aux statistiques les seuls
+        fichiers arrivés depuis le palier précédent (pas de reconstruction)"""
+        arrived, self.folder_arrived = self.folder_arrived, []
+        dimensioned, self.folder_dimensioned = self.folder_dimensioned, []
+        filters = self.folder_list_filters()
+        for file_info in dimensioned:
+            item = self.folder_items.get(file_info['path'])
+            if item is not None:
+                item.setText(self.folder_item_text(file_info))
+                item.setVisible(self.folder_item_visible(file_info, *filters))
+        # Les fichiers filtrés par dimension tant qu'elle était inconnue entrent aussi
+        for file_info in arrived + dimensioned:
+            if file_info['path'] not in self.folder_items and self.folder_item_visible(file_info, *filters):
+                # Avant l'étirement final de la liste
+                self.folder_list_layout.insertWidget(self.folder_list_layout.count() - 1,
+                                                     self.create_folder_item(file_info))
+        self.add_folder_stats()
+
     def reload_source_files(self):
         """Relit tous les fichiers sources importés"""
         if not self.imported_source_files:
@@ -1336,8 +2820,18 @@ class TextureCleaner(QMainWindow):
         
         search_text = self.source_search.text().lower()
         
+        # Tri
+        counting = self.usage_counter.is_running()
+        sort_mode = self.source_sort_combo.currentIndex()
+        if sort_mode == 1:
+            names = sorted(self.source_files, key=lambda n: (-self.usage_counts.get(n, 0), n))
+        elif sort_mode == 2:
+            names = sorted(self.source_files, key=lambda n: (self.usage_counts.get(n, 0), n))
+        else:
+            names = sorted(self.source_files)
+        
         # Filtrer et afficher
-        for img_name in self.source_files:
+        for img_name in names:
             # Filtre par extension
             if filter_value != "all" and not img_name.endswith(filter_value):
                 continue
@@ -1350,7 +2844,8 @@ class TextureCleaner(QMainWindow):
             is_in_folder = any(f['name'].lower() == img_name for f in self.folder_files)
             
             # Créer un bouton cliquable pour afficher l'usage
-            item = QPushButton(f"{'🟢' if is_in_folder else '🔵'} {img_name}")
+            references = "…" if counting else self.usage_counts.get(img_name, 0)
+            item = QPushButton(f"{'🟢' if is_in_folder else '🔵'} {img_name}   ×{references}")
             item.setStyleSheet("""
                 QPushButton {
                     background-color: #0f3460;
@@ -1372,136 +2867,134 @@ class TextureCleaner(QMainWindow):
         
         self.source_list_layout.addStretch()
     
+    def folder_list_filters(self):
+        """(statut, recherche, dimension min.) actifs sur la liste dossier"""
+        filter_value = "all"
+        for button in self.folder_filter_group.buttons():
+            if button.isChecked():
+                filter_value = button.property("filter_value")
+                break
+        return filter_value, self.folder_search.text().lower(), self.folder_min_dim_spin.value()
+
+    def folder_item_visible(self, file_info, filter_value, search_text, min_dim):
+        is_in_source = file_info['name'].lower() in self.source_files
+        # Filtre par statut
+        if filter_value == "green" and not is_in_source:
+            return False
+        if filter_value == "red" and is_in_source:
+            return False
+        # Filtre par recherche
+        if search_text and search_text not in file_info['path'].lower():
+            return False
+        # Filtre par dimensions (plus grand côté)
+        return not (min_dim and max(file_info.get('width', 0), file_info.get('height', 0)) < min_dim)
+
+    def folder_item_text(self, file_info):
+        is_in_source = file_info['name'].lower() in self.source_files
+        return f"{'🟢' if is_in_source else '🔴'} {file_info['name']}  ·  {format_dimensions(file_info)}"
+
+    def create_folder_item(self, file_info):
+        """Bouton cliquable d'un fichier (prévisualisation), enregistré dans folder_items"""
+        item = QPushButton(self.folder_item_text(file_info))
+        item.setStyleSheet("""
+            QPushButton {
+                background-color: #0f3460;
+                border-radius: 6px;
+                padding: 10px;
+                margin: 2px;
+                color: #f1f1f1;
+                border: 1px solid #533483;
+                text-align: left;
+            }
+            QPushButton:hover {
+                background-color: #16213e;
+                border: 1px solid #e94560;
+                cursor: pointer;
+            }
+        """)
+        item.clicked.connect(lambda checked, path=file_info['path'], name=file_info['name']: self.show_image_preview(path, name))
+        self.folder_items[file_info['path']] = item
+        return item
+
     def refresh_folder_list(self):
-        """Rafraîchit l'affichage de la liste dossier"""
+        """Reconstruit l'affichage de la liste dossier (filtres ou tri modifiés)"""
         # Nettoyer la liste
         while self.folder_list_layout.count():
             child = self.folder_list_layout.takeAt(0)
             if child.widget():
                 child.widget().deleteLater()
-        
-        # Obtenir le filtre actif
-        filter_value = "all"
-        for button in self.folder_filter_group.buttons():
-            if button.isChecked():
-                filter_value = button.property("filter_value")
-                break
-        
-        search_text = self.folder_search.text().lower()
-        
+        self.folder_items = {}
+        filters = self.folder_list_filters()
+
+        # Tri
+        sort_mode = self.folder_sort_combo.currentIndex()
+        if sort_mode == 1:
+            files = sorted(self.folder_files, key=lambda f: f.get('width', 0) * f.get('height', 0), reverse=True)
+        elif sort_mode == 2:
+            files = sorted(self.folder_files, key=lambda f: f['size'], reverse=True)
+        else:
+            files = self.folder_files
+
         # Filtrer et afficher
-        for file_info in self.folder_files:
-            is_in_source = file_info['name'].lower() in self.source_files
-            
-            # Filtre par statut
-            if filter_value == "green" and not is_in_source:
-                continue
-            if filter_value == "red" and is_in_source:
-                continue
-            
-            # Filtre par recherche
-            if search_text and search_text not in file_info['path'].lower():
-                continue
-            
-            # Créer un bouton cliquable au lieu d'un label
-            item = QPushButton(f"{'🟢' if is_in_source else '🔴'} {file_info['name']}")
-            item.setStyleSheet("""
-                QPushButton {
-                    background-color: #0f3460;
-                    border-radius: 6px;
-                    padding: 10px;
-                    margin: 2px;
-                    color: #f1f1f1;
-                    border: 1px solid #533483;
-                    text-align: left;
-                }
-                QPushButton:hover {
-                    background-color: #16213e;
-                    border: 1px solid #e94560;
-                    cursor: pointer;
-                }
-            """)
-            # Connecter le clic pour afficher la prévisualisation
-            item.clicked.connect(lambda checked, path=file_info['path'], name=file_info['name']: self.show_image_preview(path, name))
-            self.folder_list_layout.addWidget(item)
-        
+        for file_info in files:
+            if self.folder_item_visible(file_info, *filters):
+                self.folder_list_layout.addWidget(self.create_folder_item(file_info))
+
         self.folder_list_layout.addStretch()
-    
+
     def update_stats(self):
         """Met à jour les statistiques"""
-        matches = [f for f in self.folder_files if f['name'].lower() in self.source_files]
-        only_in_folder = [f for f in self.folder_files if f['name'].lower() not in self.source_files]
-        
-        folder_size = sum(f['size'] for f in self.folder_files)
-        match_size = sum(f['size'] for f in matches)
-        missing_size = sum(f['size'] for f in only_in_folder)
-        
+        self.folder_stats = (0, 0, 0, 0)
+        self.add_folder_stats()
+
+        # Lancer le préchargement des miniatures
+        self.preload_thumbnails()
+
+    def add_folder_stats(self):
+        """Ajoute aux statistiques affichées les fichiers du dossier pas encore
+        comptés (le parcours ne fait qu'ajouter ; update_stats recompte tout)"""
+        counted, folder_size, match_count, match_size = self.folder_stats
+        for f in itertools.islice(self.folder_files, counted, None):
+            folder_size += f['size']
+            if f['name'].lower() in self.source_files:
+                match_count += 1
+                match_size += f['size']
+        self.folder_stats = (len(self.folder_files), folder_size, match_count, match_size)
+
         self.stat_source.setProperty("count", len(self.source_files))
         self.stat_source.setProperty("fileSize", "(Fichier texte)")
         self.update_stat_card(self.stat_source)
-        
+
         self.stat_folder.setProperty("count", len(self.folder_files))
         self.stat_folder.setProperty("fileSize", ImageThumbnail.format_file_size(folder_size))
         self.update_stat_card(self.stat_folder)
-        
-        self.stat_match.setProperty("count", len(matches))
+
+        self.stat_match.setProperty("count", match_count)
         self.stat_match.setProperty("fileSize", ImageThumbnail.format_file_size(match_size))
         self.update_stat_card(self.stat_match)
-        
-        self.stat_missing.setProperty("count", len(only_in_folder))
-        self.stat_missing.setProperty("fileSize", ImageThumbnail.format_file_size(missing_size))
+
+        self.stat_missing.setProperty("count", len(self.folder_files) - match_count)
+        self.stat_missing.setProperty("fileSize", ImageThumbnail.format_file_size(folder_size - match_size))
         self.update_stat_card(self.stat_missing)
-        
-        # Lancer le préchargement des miniatures
-        self.preload_thumbnails()
-    
-    def preload_thumbnails(self):
-        """Précharge les miniatures en arrière-plan"""
-        for file_info in self.folder_files:
-            path = file_info['path']
-            if path not in self.thumbnail_cache:
-                loader = ThumbnailLoader(path, 150, 120)
-                # On utilise une lambda pour capturer le chemin
-                loader.signals.finished.connect(lambda img, p=path: self.on_thumbnail_preloaded(p, img))
-                self.thread_pool.start(loader)
-    
-    def on_thumbnail_preloaded(self, path, image):
-        """Callback de préchargement"""
-        self.thumbnail_cache[path] = image
 
-    def find_image_usage(self, image_name):
-        """Trouve les fichiers et lignes où l'image est utilisée"""
-        usage_data = {}
-        
-        for source_file in self.imported_source_files:
-            file_path = source_file.get('filePath')
-            if file_path and os.path.exists(file_path):
-                try:
-                    with open(file_path, 'r', encoding='utf-8') as f:
-                        lines = f.readlines()
-                        file_matches = []
-                        for i, line in enumerate(lines):
-                            if image_name.lower() in line.lower():
-                                file_matches.append((i + 1, line.strip()))
-                        
-                        if file_matches:
-                            usage_data[file_path] = file_matches
-                except Exception as e:
-                    print(f"Erreur lecture {file_path}: {e}")
-        
-        return usage_data
+    def preload_thumbnails(self):
+        """Précharge au ralenti les miniatures des images non référencées
+        (la catégorie ouverte pour le nettoyage) ; la file est remplacée,
+        pas empilée, à chaque appel"""
+        self.thumbnail_preloader.warm(
+            f['path'] for f in self.folder_files if f['name'].lower() not in self.source_files
+        )
 
     def show_usage_popup(self, image_name):
-        """Affiche une popup avec les endroits où l'image est utilisée"""
-        # Récupère juste les chemins de fichiers concernés
-        # Mais AdvancedUsageDialog attend un dict.
-        # find_image_usage retourne déjà un dict {file: [matches]}.
-        # On va le réutiliser même si on affiche tout le fichier.
-        # Les "matches" dans le dict ne seront pas forcément utilisés pour le highlight (on refait le find live),
-        # mais ça permet de filtrer quels fichiers contiennent l'image.
-        
-        usage_data = self.find_image_usage(image_name)
-        
+        """Affiche une popup avec les fichiers sources où l'image est utilisée,
+        d'après le comptage en arrière-plan ; s'il est en cours, la popup
+        s'ouvre à sa fin (pas de relecture des sources dans le thread GUI)"""
+        if self.usage_counter.is_running():
+            self.pending_usage_popup = image_name
+            self.statusBar().showMessage(f"Comptage des références en cours : {image_name} s'affichera à la fin", 5000)
+            return
+        usage_data = {path: [] for path, counts in self.usage_by_file.items() if counts.get(image_name)}
+
         if not usage_data:
             QMessageBox.information(self, "Info", f"Aucune utilisation trouvée pour {image_name}")
             return
@@ -1605,6 +3098,25 @@ class TextureCleaner(QMainWindow):
         stats_label.setStyleSheet("font-size: 14px; padding: 10px; background-color: #0f3460; border-radius: 8px; color: #f1f1f1;")
         layout.addWidget(stats_label)
         
+        # Zoom de la galerie (niveaux de la pyramide de miniatures)
+        zoom_level = int(app_settings().value('gallery/zoom_level', DEFAULT_THUMBNAIL_LEVEL))
+        if zoom_level not in THUMBNAIL_LEVELS:
+            zoom_level = DEFAULT_THUMBNAIL_LEVEL
+        if modal_type != 'source':
+            zoom_layout = QHBoxLayout()
+            zoom_layout.addWidget(QLabel("🔍 Zoom :"))
+            zoom_slider = QSlider(Qt.Orientation.Horizontal)
+            zoom_slider.setRange(0, len(THUMBNAIL_LEVELS) - 1)
+            zoom_slider.setPageStep(1)
+            zoom_slider.setTickPosition(QSlider.TickPosition.TicksBelow)
+            zoom_slider.setValue(THUMBNAIL_LEVELS.index(zoom_level))
+            zoom_slider.setMaximumWidth(300)
+            zoom_layout.addWidget(zoom_slider)
+            zoom_value_label = QLabel(f"{zoom_level} px")
+            zoom_layout.addWidget(zoom_value_label)
+            zoom_layout.addStretch()
+            layout.addLayout(zoom_layout)
+        
         # Grille de miniatures
         scroll = QScrollArea()
         scroll.setWidgetResizable(True)
@@ -1615,7 +3127,7 @@ class TextureCleaner(QMainWindow):
         
         thumbnails = []
         row, col = 0, 0
-        max_cols = 5
+        max_cols = 5 if zoom_level <= DEFAULT_THUMBNAIL_LEVEL else self.gallery_columns(zoom_level, 950)
         
         for file_info in files_to_show:
             if modal_type == 'source':
@@ -1642,9 +3154,9 @@ class TextureCleaner(QMainWindow):
                     file_info['path'],
                     file_info['name'],
                     file_info['size'],
-                    pool=self.thread_pool,
-                    cache=self.thumbnail_cache,
-                    show_delete=(modal_type == 'missing')
+                    preloader=self.thumbnail_preloader,
+                    show_delete=(modal_type == 'missing'),
+                    level=zoom_level
                 )
                 thumbnails.append(thumb)
                 
@@ -1662,6 +3174,11 @@ class TextureCleaner(QMainWindow):
         grid_widget.setLayout(grid_layout)
         scroll.setWidget(grid_widget)
         layout.addWidget(scroll)
+
+        if modal_type != 'source':
+            zoom_slider.valueChanged.connect(
+                lambda index: self.zoom_gallery(THUMBNAIL_LEVELS[index], thumbnails, grid_layout,
+                                                scroll, zoom_value_label))
         
         
         # Boutons de dialogue
@@ -1683,6 +3200,27 @@ class TextureCleaner(QMainWindow):
         dialog.exec()
         dialog.deleteLater()
     
+    @staticmethod
+    def gallery_columns(level, available_width):
+        """Nombre de colonnes de la galerie pour un niveau de zoom"""
+        return max(1, min(10, available_width // (thumbnail_box(level)[0] + 45)))
+
+    def zoom_gallery(self, level, thumbnails, grid_layout, scroll, value_label):
+        """Change le niveau de zoom : niveau en cache le plus proche affiché
+        immédiatement, niveau exact chargé en arrière-plan"""
+        value_label.setText(f"{level} px")
+        app_settings().setValue('gallery/zoom_level', level)
+
+        for thumb in thumbnails:
+            thumb.set_level(level)
+
+        # Réorganisation de la grille selon la largeur disponible
+        max_cols = self.gallery_columns(level, scroll.viewport().width())
+        for thumb in thumbnails:
+            grid_layout.removeWidget(thumb)
+        for i, thumb in enumerate(thumbnails):
+            grid_layout.addWidget(thumb, i // max_cols, i % max_cols)
+
     def toggle_select_all(self, thumbnails, select_btn):
         """Sélectionne ou désélectionne tous les fichiers"""
         all_selected = all(thumb.marked_for_deletion for thumb in thumbnails)
@@ -1722,55 +3260,71 @@ class TextureCleaner(QMainWindow):
         """Déplace les fichiers sélectionnés vers un autre dossier"""
         files_to_move = [thumb.file_path for thumb in thumbnails if thumb.marked_for_deletion]
         
-        if not files_to_move:
+        if not files_to_move or self.file_operations.is_running():
             return
             
         # Demander le dossier de destination
         dest_folder = QFileDialog.getExistingDirectory(self, "Choisir le dossier de destination")
         if not dest_folder:
             return
-            
-        moved_count = 0
-        failed_files = []
         
-        for file_path in files_to_move:
-            try:
-                # Calculer le nouveau chemin
-                file_name = os.path.basename(file_path)
-                dest_path = os.path.join(dest_folder, file_name)
-                
-                # Déplacement
-                shutil.move(file_path, dest_path)
-                
-                moved_count += 1
-                # Retirer de la liste
-                self.folder_files = [f for f in self.folder_files if f['path'] != file_path]
-            except Exception as e:
-                failed_files.append((file_path, str(e)))
-                
-        # Rapport
-        message = f"✅ {moved_count} fichier(s) déplacé(s) avec succès."
-        if failed_files:
-            message += f"\n\n❌ {len(failed_files)} échec(s):\n"
-            for file_path, error in failed_files[:5]:
-                message += f"\n• {os.path.basename(file_path)}: {error}"
-            if len(failed_files) > 5:
-                message += f"\n... et {len(failed_files) - 5} autre(s)"
-        
-        QMessageBox.information(self, "Résultat du déplacement", message)
-        
-        # Rafraîchir l'interface
-        self.refresh_folder_list()
-        self.update_stats()
+        # Arborescence conservée (pas d'écrasement entre sous-dossiers) ou à plat
+        msg_box = QMessageBox(self)
+        msg_box.setWindowTitle("Mode de déplacement")
+        msg_box.setText(f"Déplacer {len(files_to_move)} fichier(s) vers :\n{dest_folder}")
+        msg_box.setStyleSheet("background-color: #1a1a2e; color: white;")
+        btn_structure = msg_box.addButton("Conserver l'arborescence", QMessageBox.ButtonRole.AcceptRole)
+        btn_flat = msg_box.addButton("Tout à plat", QMessageBox.ButtonRole.ActionRole)
+        msg_box.addButton("Annuler", QMessageBox.ButtonRole.RejectRole)
+        msg_box.exec()
+        clicked_button = msg_box.clickedButton()
+        if clicked_button not in (btn_structure, btn_flat):
+            return
         
-        # Fermer la modal car l'état a changé
-        dialog.accept()
+        root = self.current_folder_path if clicked_button == btn_structure else None
+        try:
+            jobs = move_jobs(files_to_move, dest_folder, root)
+        except OSError as e:
+            QMessageBox.warning(self, "Erreur", f"Destination inaccessible : {e}")
+            return
+        self.file_operation_dest = dest_folder
+        self.delete_btn.setEnabled(False)
+        self.move_btn.setEnabled(False)
+        self.start_file_operation('move', jobs, dialog)
     
     def delete_selected_files(self, thumbnails, dialog):
         """Supprime les fichiers sélectionnés"""
         files_to_delete = [thumb.file_path for thumb in thumbnails if thumb.marked_for_deletion]
         
-        if not files_to_delete:
+        if not files_to_delete or self.file_operations.is_running():
+            return
+        
+        # Quarantaine (annulable) ou suppression définitive
+        msg_box = QMessageBox(self)
+        msg_box.setWindowTitle("Suppression")
+        msg_box.setText(f"{len(files_to_delete)} fichier(s) sélectionné(s).\n\n"
+                        f"La quarantaine les retire du dossier instantanément ; "
+                        f"ils restent restaurables jusqu'à la purge (bouton 🧳).")
+        msg_box.setStyleSheet("background-color: #1a1a2e; color: white;")
+        btn_quarantine = msg_box.addButton("Mettre en quarantaine", QMessageBox.ButtonRole.AcceptRole)
+        btn_delete = msg_box.addButton("Supprimer définitivement", QMessageBox.ButtonRole.DestructiveRole)
+        msg_box.addButton("Annuler", QMessageBox.ButtonRole.RejectRole)
+        msg_box.exec()
+        clicked_button = msg_box.clickedButton()
+        
+        if clicked_button == btn_quarantine:
+            try:
+                session_dir, jobs = new_session(self.current_folder_path or os.path.dirname(files_to_delete[0]),
+                                                files_to_delete)
+            except OSError as e:
+                QMessageBox.warning(self, "Erreur", f"Quarantaine impossible : {e}")
+                return
+            self.file_operation_dest = session_dir
+            self.delete_btn.setEnabled(False)
+            self.move_btn.setEnabled(False)
+            self.start_file_operation('quarantine', jobs, dialog)
+            return
+        if clicked_button != btn_delete:
             return
         
         # Confirmation
@@ -1786,41 +3340,166 @@ class TextureCleaner(QMainWindow):
         )
         
         if reply == QMessageBox.StandardButton.Yes:
-            deleted_count = 0
-            failed_files = []
-            
-            for file_path in files_to_delete:
-                try:
-                    os.remove(file_path)
-                    deleted_count += 1
-                    # Retirer de la liste
-                    self.folder_files = [f for f in self.folder_files if f['path'] != file_path]
-                except Exception as e:
-                    failed_files.append((file_path, str(e)))
-            
-            # Rapport
-            message = f"✅ {deleted_count} fichier(s) supprimé(s) avec succès."
-            if failed_files:
-                message += f"\n\n❌ {len(failed_files)} échec(s):\n"
-                for file_path, error in failed_files[:5]:  # Limiter à 5 erreurs
-                    message += f"\n• {os.path.basename(file_path)}: {error}"
-                if len(failed_files) > 5:
-                    message += f"\n... et {len(failed_files) - 5} autre(s)"
-            
-            QMessageBox.information(self, "Résultat de la suppression", message)
-            
-            # Rafraîchir l'interface
+            self.delete_btn.setEnabled(False)
+            self.move_btn.setEnabled(False)
+            self.start_file_operation('delete', [{'path': path} for path in files_to_delete], dialog)
+    
+    # Libellés par opération : (action, participe, titre du rapport)
+    FILE_OPERATION_LABELS = {
+        'delete': ("Suppression", "supprimé(s)", "Résultat de la suppression"),
+        'move': ("Déplacement", "déplacé(s)", "Résultat du déplacement"),
+        'quarantine': ("Mise en quarantaine", "mis en quarantaine", "Résultat de la mise en quarantaine"),
+        'restore': ("Restauration", "restauré(s)", "Résultat de la restauration"),
+    }
+    
+    def start_file_operation(self, operation, jobs, dialog):
+        """Lance une opération de fichiers en arrière-plan ; la fenêtre appelante
+        (dialog) reste bloquée par la progression (modale) et est fermée à la fin"""
+        progress = QDialog(dialog)
+        progress.setWindowModality(Qt.WindowModality.WindowModal)
+        progress.setWindowTitle("Opération en cours...")
+        progress.setFixedSize(360, 140)
+        progress_layout = QVBoxLayout()
+        action = self.FILE_OPERATION_LABELS[operation][0]
+        self.file_operation_label = QLabel(f"{action} de {len(jobs)} fichier(s)...")
+        progress_layout.addWidget(self.file_operation_label)
+        self.file_operation_bar = QProgressBar()
+        self.file_operation_bar.setRange(0, len(jobs))
+        progress_layout.addWidget(self.file_operation_bar)
+        cancel_btn = QPushButton("Annuler")
+        cancel_btn.clicked.connect(self.file_operations.cancel)
+        progress_layout.addWidget(cancel_btn)
+        progress.setLayout(progress_layout)
+        progress.rejected.connect(self.file_operations.cancel)  # Croix / Échap = annuler
+        
+        self.file_operation_dialog = progress
+        self.file_operation_gallery = dialog
+        progress.show()
+        self.file_operations.start(operation, jobs)
+    
+    def on_file_operation_progress(self, done, total):
+        if self.file_operation_dialog is not None:
+            self.file_operation_bar.setValue(done)
+    
+    def on_file_operation_finished(self, summary):
+        self.file_operation_dialog.close()
+        self.file_operation_dialog = None
+        
+        operation = summary['operation']
+        if operation == 'restore':
+            discard_if_empty(self.file_operation_dest)
+        else:
+            # Index mis à jour en une passe
+            self.folder_files = without_paths(self.folder_files, [job['path'] for job in summary['done']])
+        
+        _, verb, title = self.FILE_OPERATION_LABELS[operation]
+        failed_files = summary['failed']
+        message = f"✅ {len(summary['done'])} fichier(s) {verb} avec succès en {summary['elapsed']:.1f} s."
+        if summary['cancelled']:
+            message += f"\n\n⏹ Annulé : {summary['total'] - len(summary['done']) - len(failed_files)} fichier(s) non traité(s)."
+        if failed_files:
+            message += f"\n\n❌ {len(failed_files)} échec(s):\n"
+            for file_path, error in failed_files[:5]:  # Limiter à 5 erreurs
+                message += f"\n• {os.path.basename(file_path)}: {error}"
+            if len(failed_files) > 5:
+                message += f"\n... et {len(failed_files) - 5} autre(s)"
+        
+        if operation == 'quarantine':
+            message += "\n\n🧳 Restauration ou purge : bouton 🧳 de l'onglet Dossier."
+        if operation == 'move':
+            renamed = sum(1 for job in summary['done'] if job.get('mode') == 'rename')
+            message += f"\n({renamed} renommage(s), {len(summary['done']) - renamed} copie(s) vérifiée(s))"
+            try:
+                message += f"\n\nManifeste : {write_move_manifest(self.file_operation_dest, summary)}"
+            except OSError as e:
+                message += f"\n\nManifeste non écrit : {e}"
+        
+        QMessageBox.information(self, title, message)
+        
+        # Rafraîchir l'interface
+        if operation == 'restore':
+            self.reload_folder_files()
+        else:
             self.refresh_folder_list()
             self.update_stats()
-            
-            # Fermer la modal
-            dialog.accept()
+        
+        # Fermer la modal car l'état a changé
+        self.file_operation_gallery.accept()
+        self.file_operation_gallery = None
+    
+    def show_quarantine_dialog(self):
+        """Sessions de quarantaine du dossier : restauration ou purge"""
+        if not self.current_folder_path:
+            QMessageBox.information(self, "Info", "Aucun dossier sélectionné.")
+            return
+        
+        dialog = QDialog(self)
+        dialog.setWindowTitle("🧳 Quarantaine")
+        dialog.setMinimumSize(520, 360)
+        layout = QVBoxLayout()
+        layout.addWidget(QLabel(f"Fichiers supprimés en quarantaine dans :\n{self.current_folder_path}"))
+        
+        session_list = QListWidget()
+        
+        def fill():
+            session_list.clear()
+            for session in list_sessions(self.current_folder_path):
+                created = time.strftime('%d/%m/%Y %H:%M:%S', time.localtime(session['created']))
+                item = QListWidgetItem(f"{created} • {session['count']} fichier(s) • "
+                                       f"{ImageThumbnail.format_file_size(session['bytes'])}")
+                item.setData(Qt.ItemDataRole.UserRole, session['path'])
+                session_list.addItem(item)
+        
+        fill()
+        layout.addWidget(session_list)
+        
+        buttons_layout = QHBoxLayout()
+        restore_btn = QPushButton("↩️ Restaurer")
+        purge_btn = QPushButton("🔥 Purger définitivement")
+        buttons_layout.addWidget(restore_btn)
+        buttons_layout.addWidget(purge_btn)
+        layout.addLayout(buttons_layout)
+        
+        def restore():
+            item = session_list.currentItem()
+            if item is None or self.file_operations.is_running():
+                return
+            session_dir = item.data(Qt.ItemDataRole.UserRole)
+            try:
+                jobs = restore_jobs(session_dir)
+            except (OSError, ValueError) as e:
+                QMessageBox.warning(self, "Erreur", f"Journal de quarantaine illisible : {e}")
+                return
+            self.file_operation_dest = session_dir
+            self.start_file_operation('restore', jobs, dialog)
+        
+        def purge():
+            item = session_list.currentItem()
+            if item is None or self.file_operations.is_running():
+                return
+            reply = QMessageBox.question(self, "Purge", f"Supprimer DÉFINITIVEMENT cette session ?\n{item.text()}",
+                                         QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No)
+            if reply != QMessageBox.StandardButton.Yes:
+                return
+            try:
+                purge_in_background(item.data(Qt.ItemDataRole.UserRole))
+            except OSError as e:
+                QMessageBox.warning(self, "Erreur", f"Purge impossible : {e}")
+            fill()
+        
+        restore_btn.clicked.connect(restore)
+        purge_btn.clicked.connect(purge)
+        
+        button_box = QDialogButtonBox(QDialogButtonBox.StandardButton.Close)
+        button_box.rejected.connect(dialog.reject)
+        layout.addWidget(button_box)
+        dialog.setLayout(layout)
+        dialog.setStyleSheet("QDialog { background-color: #1a1a2e; } QLabel { color: #f1f1f1; }")
+        dialog.exec()
+        dialog.deleteLater()
     
     def show_image_preview(self, image_path, image_name):
         """Affiche une popup avec l'aperçu de l'image et son chemin"""
-        from PyQt6.QtWidgets import QDialog, QVBoxLayout, QLabel, QPushButton
-        from PyQt6.QtCore import Qt
-        
         dialog = QDialog(self)
         dialog.setWindowTitle(f"Aperçu - {image_name}")
         dialog.setMinimumSize(800, 600)
@@ -1853,31 +3532,31 @@ class TextureCleaner(QMainWindow):
         path_label.setWordWrap(True)
         layout.addWidget(path_label)
         
-        # Image
-        image_label = QLabel()
-        image_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        image_label.setStyleSheet("""
-            background-color: #0f3460;
-            border: 2px solid #533483;
-            border-radius: 10px;
-            padding: 10px;
-        """)
-        
-        if os.path.exists(image_path):
-            pixmap = QPixmap(image_path)
-            if not pixmap.isNull():
-                # Redimensionner pour s'adapter à la fenêtre
-                scaled_pixmap = pixmap.scaled(750, 450, Qt.AspectRatioMode.KeepAspectRatio,
-                                              Qt.TransformationMode.SmoothTransformation)
-                image_label.setPixmap(scaled_pixmap)
-            else:
-                image_label.setText("❌ Impossible de charger l'image")
-                image_label.setStyleSheet(image_label.styleSheet() + "font-size: 16px; color: #e94560;")
-        else:
-            image_label.setText("❌ Fichier introuvable")
-            image_label.setStyleSheet(image_label.styleSheet() + "font-size: 16px; color: #e94560;")
-        
-        layout.addWidget(image_label)
+        # Image : visionneuse asynchrone (molette = zoom, glisser = déplacement)
+        image_view = TiledImageView(image_path, self.image_pipeline, self.thumbnail_preloader)
+        layout.addWidget(image_view, 1)
+        # Dialogue détruit à la fermeture ; les décodages encore en vol sont ignorés
+        dialog.setAttribute(Qt.WidgetAttribute.WA_DeleteOnClose)
+        dialog.finished.connect(image_view.close_view)
+
+        zoom_layout = QHBoxLayout()
+        fit_btn = QPushButton("🔲 Ajuster")
+        fit_btn.clicked.connect(image_view.fit)
+        one_btn = QPushButton("1:1")
+        one_btn.clicked.connect(lambda: image_view.zoom_to(1.0))
+        for btn in (fit_btn, one_btn):
+            btn.setStyleSheet("QPushButton { background-color: #533483; color: white; padding: 5px 10px; border-radius: 4px; }")
+            zoom_layout.addWidget(btn)
+        zoom_info = QLabel()
+        zoom_info.setStyleSheet("color: #aaa; font-size: 12px;")
+        zoom_layout.addWidget(zoom_info)
+        zoom_layout.addStretch()
+        layout.addLayout(zoom_layout)
+
+        if image_view.error is None:
+            dims = f"{image_view.image_size.width()}x{image_view.image_size.height()} px"
+            image_view.zoomChanged.connect(lambda scale: zoom_info.setText(f"{dims} • Zoom {scale * 100:.0f}%"))
+            zoom_info.setText(dims)
         
         # Bouton fermer
         close_btn = QPushButton("Fermer")
@@ -1918,7 +3597,7 @@ class TextureCleaner(QMainWindow):
                 self.populate_resize_list()
             elif self.resize_folder_path:
                 # Si déjà un dossier, on rafraichit au cas où
-                if self.resize_table.rowCount() == 0:
+                if self.resize_model.rowCount() == 0:
                     self.populate_resize_list()
             
     def select_resize_folder(self):
@@ -1932,72 +3611,62 @@ class TextureCleaner(QMainWindow):
             
     def populate_resize_list(self):
         """Remplit la liste des fichiers pour l'onglet Resize"""
-        self.resize_table.setRowCount(0)
+        self.resize_scanner.cancel()
+        self.resize_model.set_files([], [], [], [])
+        self.size_estimator.clear_pending()
+        self.estimated_paths.clear()
         
         if not self.resize_folder_path or not os.path.exists(self.resize_folder_path):
              return
              
-        # Récupérer les images
+        # Parcours en arrière-plan : les lignes arrivent par lots (on_resize_files_found)
         image_extensions = ['.jpg', '.jpeg', '.png', '.gif', '.bmp', '.webp', '.tiff', '.tif']
-        files_found = []
-        
-        for root, dirs, files in os.walk(self.resize_folder_path):
-            for file in files:
-                ext = os.path.splitext(file)[1].lower()
-                if ext in image_extensions:
-                    full_path = os.path.join(root, file)
-                    files_found.append(full_path)
-        
-        self.resize_table.setRowCount(len(files_found))
-        
-        # Afficher dans la liste avec détails
-        for i, path in enumerate(files_found):
-            try:
-                # Lire dimensions sans charger toute l'image
-                reader = QImageReader(path)
-                size = reader.size()
-                file_size = os.path.getsize(path)
-                
-                # Colonne 1: Nom
-                item_name = QTableWidgetItem(os.path.basename(path))
-                item_name.setData(Qt.ItemDataRole.UserRole, path)
-                item_name.setData(Qt.ItemDataRole.UserRole + 1, size.width()) # Storing original width
-                item_name.setData(Qt.ItemDataRole.UserRole + 2, size.height()) # Storing original height
-                item_name.setData(Qt.ItemDataRole.UserRole + 3, file_size) # Storing original size
-                self.resize_table.setItem(i, 0, item_name)
-                
-                # Colonne 2: Dimensions init
-                item_dim = QTableWidgetItem(f"{size.width()}x{size.height()} px")
-                self.resize_table.setItem(i, 1, item_dim)
-                
-                # Colonne 3: Poids init
-                item_size = QTableWidgetItem(ImageThumbnail.format_file_size(file_size))
-                self.resize_table.setItem(i, 2, item_size)
-                
-            except Exception as e:
-                print(f"Erreur lecture {path}: {e}")
-                
-        # Lancer la prévisualisation initiale
+        self.resize_scanner.scan(self.resize_folder_path, image_extensions)
         self.update_resize_preview()
 
+    def on_resize_files_found(self, batch):
+        """Lot de fichiers découverts : ajout immédiat, dimensions en cache ou à venir"""
+        paths, sizes, widths, heights, _ = zip(*batch)
+        first = self.resize_model.rowCount()
+        self.resize_model.append_rows(paths, widths, heights, sizes, self.select_all_cb.isChecked())
+        self.apply_resize_filter()
+        self.update_resize_preview(range(first, first + len(paths)))
+
+    def on_resize_dimensions_read(self, batch):
+        paths, widths, heights, _ = zip(*batch)
+        rows = self.resize_model.set_dimensions(paths, widths, heights)
+        self.apply_resize_filter()
+        self.update_resize_preview(rows)
+
+    def on_resize_scan_finished(self):
+        # Conserver le tri choisi dans l'en-tête
+        header = self.resize_table.horizontalHeader()
+        if header.isSortIndicatorShown():
+            self.resize_model.sort(header.sortIndicatorSection(), header.sortIndicatorOrder())
+            self.apply_resize_filter()
+        self.update_resize_preview([])
+
+    def apply_resize_filter(self):
+        """Masque les lignes dont le plus grand côté est sous le minimum"""
+        min_dim = self.resize_min_dim_spin.value()
+        model = self.resize_model
+        # Dimensions encore inconnues : ligne visible
+        hidden = (np.maximum(model.widths, model.heights) < min_dim) & (model.widths >= 0)
+        if self.resize_hidden is None or len(self.resize_hidden) != len(hidden):
+            self.resize_hidden = np.array([self.resize_table.isRowHidden(row) for row in range(len(hidden))], dtype=bool)
+        # Seules les lignes dont l'état change sont touchées
+        for row in np.flatnonzero(hidden != self.resize_hidden).tolist():
+            self.resize_table.setRowHidden(row, bool(hidden[row]))
+        self.resize_hidden = hidden
+
         
     def toggle_all_checkboxes(self, checked):
         """Coche ou décoche toutes les lignes"""
-        count = self.resize_table.rowCount()
-        for i in range(count):
-            item = self.resize_table.item(i, 0)
-            if item:
-                item.setCheckState(Qt.CheckState.Checked if checked else Qt.CheckState.Unchecked)
-
-    def open_image_popup_from_table(self, row, col):
-        """Ouvre un popup avec l'image au clic"""
-        # Récupère le path depuis la première colonne
-        item = self.resize_table.item(row, 0)
-        path = item.data(Qt.ItemDataRole.UserRole)
-        name = item.text()
-        file_size = item.data(Qt.ItemDataRole.UserRole + 3)
-        
-        self.show_modal([path])
+        self.resize_model.set_all_checked(checked)
+
+    def open_image_popup_from_table(self, index):
+        """Ouvre un popup avec l'image au double clic"""
+        self.show_modal([self.resize_model.path(index.row())])
 
     def toggle_resize_ui(self, is_ratio):
         """Active/Désactive les sections selon le mode Switch"""
@@ -2010,47 +3679,47 @@ class TextureCleaner(QMainWindow):
         self.fixed_options_frame.setVisible(not is_ratio)
         
         # Note: Plus besoin de gérer les labels manuellement, le widget le fait
-        
-        self.update_resize_preview()
 
     def update_ratio_ui(self):
         """Met à jour l'interface des options de ratio"""
         idx = self.ratio_type_combo.currentIndex()
+        self.ratio_value_spin.setEnabled(idx not in POT_FUNCTIONS)  # Puissance de 2 : pas de valeur
         if idx == 0: # Pourcentage
             self.ratio_value_spin.setSuffix(" %")
             self.ratio_value_spin.setRange(1, 100)
             self.ratio_value_spin.setValue(50)
+        elif idx == MAX_DIMENSION: # Plafond du plus grand côté
+            self.ratio_value_spin.setSuffix(" px")
+            self.ratio_value_spin.setRange(1, 65536)
+            self.ratio_value_spin.setValue(2048)
         else: # Largeur ou Hauteur
             self.ratio_value_spin.setSuffix(" px")
             self.ratio_value_spin.setRange(1, 10000)
             self.ratio_value_spin.setValue(1024)
-        self.update_resize_preview()
 
     def apply_settings_to_selection(self):
         """Applique les réglages de l'interface aux fichiers sélectionnés"""
-        selected_items = self.resize_table.selectedItems()
-        if not selected_items:
+        rows = [index.row() for index in self.resize_table.selectionModel().selectedRows()]
+        if not rows:
             return
             
-        # Get UI Values
-        is_ratio = self.mode_switch.is_left_active()
-        ratio_mode = self.ratio_type_combo.currentIndex()
-        val = self.ratio_value_spin.value()
-        fix_w = self.fixed_width_spin.value()
-        fix_h = self.fixed_height_spin.value()
-        
-        # Apply to unique rows of selection
-        rows = set(item.row() for item in selected_items)
-        for row in rows:
-            item = self.resize_table.item(row, 0)
-            item.setData(Qt.ItemDataRole.UserRole + 10, is_ratio)
-            item.setData(Qt.ItemDataRole.UserRole + 11, ratio_mode)
-            item.setData(Qt.ItemDataRole.UserRole + 12, val)
-            item.setData(Qt.ItemDataRole.UserRole + 13, fix_w)
-            item.setData(Qt.ItemDataRole.UserRole + 14, fix_h)
+        settings = {
+            'is_ratio': self.mode_switch.is_left_active(),
+            'ratio_mode': self.ratio_type_combo.currentIndex(),
+            'value': self.ratio_value_spin.value(),
+            'fixed_width': self.fixed_width_spin.value(),
+            'fixed_height': self.fixed_height_spin.value(),
+            'mipmaps': self.mipmaps_cb.isChecked(),
+            'resampler': self.resampler_combo.currentData(),
+            'linear_light': self.linear_light_cb.isChecked(),
+            **self.output_settings_from_ui(),
+        }
+        self.resize_model.set_settings(rows, settings)
+        # Les estimations en attente pour ces lignes portent sur les anciens réglages
+        self.size_estimator.discard_pending({self.resize_model.path(row) for row in rows})
             
-        # Update Preview
-        self.update_resize_preview()
+        # Update Preview (lignes modifiées seulement)
+        self.update_resize_preview(rows)
 
     def reset_resize_options_ui(self):
         """Réinitialise les réglages UI (visuel seulement) lors du changement de sélection"""
@@ -2061,90 +3730,63 @@ class TextureCleaner(QMainWindow):
         self.ratio_value_spin.setValue(50)
         self.fixed_width_spin.setValue(1024)
         self.fixed_height_spin.setValue(1024)
+        self.mipmaps_cb.setChecked(False)
+        self.resampler_combo.setCurrentIndex(0)
+        self.linear_light_cb.setChecked(True)
+        self.reset_output_options_ui()
 
-    def update_resize_preview(self):
-        """Met à jour le tableau avec les prévisions basées sur les données STOCKÉES par item"""
-        count = self.resize_table.rowCount()
-        if count == 0:
-            return
+    def reset_output_options_ui(self):
+        """Options d'encodage par défaut (DEFAULT_OUTPUT_SETTINGS)"""
+        defaults = DEFAULT_OUTPUT_SETTINGS
+        self.output_format_combo.setCurrentIndex(self.output_format_combo.findData(defaults['format']))
+        self.output_quality_spin.setValue(defaults['quality'])
+        self.png_compression_spin.setValue(defaults['png_compression'])
+        self.strip_alpha_cb.setChecked(defaults['strip_alpha'])
+        self.optimize_combo.setCurrentIndex(defaults['optimize'])
+        self.target_kb_spin.setValue(defaults['target_kb'])
+        self.min_psnr_spin.setValue(defaults['min_psnr'])
+        self.update_output_ui()
 
-        total_orig_size = 0
-        total_new_size = 0
+    def update_output_ui(self):
+        """N'active que les options pertinentes pour le format et le mode d'optimisation"""
+        fmt = self.output_format_combo.currentData()
+        lossy_possible = fmt in LOSSY_FORMATS or not fmt  # Identique : dépend du fichier
+        optimize = self.optimize_combo.currentIndex()
+        self.output_quality_spin.setEnabled(lossy_possible and not optimize)
+        self.png_compression_spin.setEnabled(fmt in ('png', ''))
+        self.optimize_combo.setEnabled(lossy_possible)
+        self.target_kb_spin.setEnabled(lossy_possible and optimize == OPTIMIZE_TARGET_SIZE)
+        self.min_psnr_spin.setEnabled(lossy_possible and optimize == OPTIMIZE_ERROR_BUDGET)
 
-        for i in range(count):
-            item_name = self.resize_table.item(i, 0)
-            if not item_name: continue
-            
-            # Récupérer données image
-            orig_w = item_name.data(Qt.ItemDataRole.UserRole + 1)
-            orig_h = item_name.data(Qt.ItemDataRole.UserRole + 2)
-            orig_file_size = item_name.data(Qt.ItemDataRole.UserRole + 3)
-            
-            if orig_w is None: continue 
-            
-            # Récupérer données REGLAGES (Item specific)
-            is_ratio = item_name.data(Qt.ItemDataRole.UserRole + 10)
-            ratio_mode = item_name.data(Qt.ItemDataRole.UserRole + 11)
-            val = item_name.data(Qt.ItemDataRole.UserRole + 12)
-            fix_w = item_name.data(Qt.ItemDataRole.UserRole + 13)
-            fix_h = item_name.data(Qt.ItemDataRole.UserRole + 14)
-            
-            # Default fallback (si loading async pas fini par ex, ou bug)
-            if is_ratio is None: is_ratio = True
-            if ratio_mode is None: ratio_mode = 0
-            if val is None: val = 50
-            if fix_w is None: fix_w = 1024
-            if fix_h is None: fix_h = 1024
-            
-            total_orig_size += orig_file_size
-            
-            new_w, new_h = 0, 0
-            
-            if is_ratio:
-                if ratio_mode == 0: # %
-                    scale = val / 100.0
-                    new_w = int(orig_w * scale)
-                    new_h = int(orig_h * scale)
-                elif ratio_mode == 1: # Largeur fixe
-                    new_w = val
-                    if orig_w > 0:
-                        new_h = int(orig_h * (val / orig_w))
-                elif ratio_mode == 2: # Hauteur fixe
-                    new_h = val
-                    if orig_h > 0:
-                        new_w = int(orig_w * (val / orig_h))
-            else: # Dimensions libres
-                new_w = fix_w
-                new_h = fix_h
-            
-            # Estimation Poids
-            orig_pixels = orig_w * orig_h
-            new_pixels = new_w * new_h
-            if orig_pixels > 0:
-                est_file_size = orig_file_size * (new_pixels / orig_pixels)
-            else:
-                est_file_size = orig_file_size
-            
-            total_new_size += est_file_size
-            
-            # Mise à jour UI Tableau
-            # Col 2: Dimensions
-            item_dim = self.resize_table.item(i, 1)
-            item_dim.setText(f"{orig_w}x{orig_h} ➜ {new_w}x{new_h}")
-            
-            # Col 3: Poids
-            item_size = self.resize_table.item(i, 2)
-            orig_fmt = ImageThumbnail.format_file_size(orig_file_size)
-            new_fmt = ImageThumbnail.format_file_size(est_file_size)
-            item_size.setText(f"{orig_fmt} ➜ ~{new_fmt}")
-            
-            # Couleur verte si réduction
-            if est_file_size < orig_file_size:
-                item_size.setForeground(Qt.GlobalColor.green)
-                item_dim.setForeground(Qt.GlobalColor.green)
-            else:
-                item_size.setForeground(Qt.GlobalColor.white)
-                item_dim.setForeground(Qt.GlobalColor.white)
+    def output_settings_from_ui(self):
+        return {
+            'format': self.output_format_combo.currentData(),
+            'quality': self.output_quality_spin.value(),
+            'png_compression': self.png_compression_spin.value(),
+            'strip_alpha': self.strip_alpha_cb.isChecked(),
+            'optimize': self.optimize_combo.currentIndex(),
+            'target_kb': self.target_kb_spin.value(),
+            'min_psnr': self.min_psnr_spin.value(),
+        }
+
+    def schedule_resize_preview(self, path):
+        """Estimation arrivée : rafraîchissement groupé des lignes concernées"""
+        self.estimated_paths.add(path)
+        if not self.resize_preview_timer.isActive():
+            self.resize_preview_timer.start()
+
+    def refresh_estimated_rows(self):
+        rows = self.resize_model.rows_for_paths(self.estimated_paths)
+        self.estimated_paths.clear()
+        self.update_resize_preview(rows)
+
+    def update_resize_preview(self, rows=None):
+        """Recalcule les prévisions (toutes les lignes, ou seulement rows) puis les totaux.
+        Poids : estimation par encodage d'essai si disponible (≈), sinon
+        proportionnelle aux pixels (~) en attendant l'estimateur"""
+        self.resize_model.update_preview(self.size_estimator, rows)
+        total_orig_size, total_new_size = self.resize_model.totals()
+        pending = self.size_estimator.pending_count()
         
         # Mise à jour Stats Globales
         gain = total_orig_size - total_new_size
@@ -2153,6 +3795,8 @@ class TextureCleaner(QMainWindow):
         self.global_stats_label.setText(
             f"Poids Total : {ImageThumbnail.format_file_size(total_orig_size)} ➜ ~{ImageThumbnail.format_file_size(total_new_size)} "
             f"| Gain : {ImageThumbnail.format_file_size(gain)} ({pct_gain:.1f}%)"
+            + (f" | Estimation en cours : {pending}" if pending else "")
+            + (f" | Analyse du dossier : {self.resize_model.rowCount()} fichiers…" if self.resize_scanner.is_running() else "")
         )
         if gain > 0:
             self.global_stats_label.setStyleSheet("font-size: 14px; font-weight: bold; color: #4caf50; padding: 5px;")
@@ -2160,27 +3804,21 @@ class TextureCleaner(QMainWindow):
              self.global_stats_label.setStyleSheet("font-size: 14px; font-weight: bold; color: #f1f1f1; padding: 5px;")
 
 
-    def execute_resize(self):
-        """Lance le processus de redimensionnement"""
-        count = self.resize_table.rowCount()
-        if count == 0:
+    def checked_resize_rows(self):
+        """Lignes cochées du modèle ; avertit si aucune"""
+        if self.resize_model.rowCount() == 0:
             QMessageBox.warning(self, "Attention", "Aucune image à traiter.")
-            return
+            return []
 
         # Identification des fichiers à traiter (Via Checkboxes)
-        rows_to_process = []
-        for i in range(count):
-            item = self.resize_table.item(i, 0)
-            if item.checkState() == Qt.CheckState.Checked:
-                rows_to_process.append(i)
-        
-        if not rows_to_process:
+        rows = self.resize_model.checked_rows()
+        if not rows:
              QMessageBox.warning(self, "Attention", "Aucune image sélectionnée.")
-             return
-            
-        selection_msg = f"les {len(rows_to_process)} images cochées"
+        return rows
 
-        # Dialogue choix destination
+    def ask_batch_destination(self, count):
+        """Dialogue choix destination : (overwrite, dossier cible) ou None si annulé"""
+        selection_msg = f"les {count} images cochées"
         msg_box = QMessageBox(self)
         msg_box.setWindowTitle("Lancer l'optimisation")
         msg_box.setText(f"Vous allez traiter {selection_msg}.\nComment voulez-vous sauvegarder ?")
@@ -2195,107 +3833,246 @@ class TextureCleaner(QMainWindow):
         clicked_button = msg_box.clickedButton()
         
         if clicked_button == btn_cancel:
-            return
-            
-        target_folder = None
-        overwrite = False
+            return None
         
         if clicked_button == btn_overwrite:
             confirm = QMessageBox.question(self, "Confirmation ultime", "Êtes-vous SÛR de vouloir écraser les fichiers originaux ?", QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No)
             if confirm != QMessageBox.StandardButton.Yes:
-                return
-            overwrite = True
-        elif clicked_button == btn_new_folder:
+                return None
+            return True, None
+        if clicked_button == btn_new_folder:
             target_folder = QFileDialog.getExistingDirectory(self, "Choisir le dossier de destination")
             if not target_folder:
-                return
+                return None
+            return False, target_folder
+        return None
+
+    def execute_resize(self):
+        """Lance le processus de redimensionnement"""
+        rows = self.checked_resize_rows()
+        if not rows:
+            return
+        destination = self.ask_batch_destination(len(rows))
+        if destination is None:
+            return
+        overwrite, target_folder = destination
+        manifest = BatchManifest(target_folder or self.resize_folder_path) if self.incremental_cb.isChecked() else None
+        
+        # Un job par ligne cochée, avec les réglages associés à la ligne
+        jobs = []
+        model = self.resize_model
+        for row in rows:
+            path = model.path(row)
+            settings = model.settings(row)
+            save_path = path if overwrite else os.path.join(target_folder, os.path.basename(path))
+            job = {
+                'path': path,
+                # Conversion de format : nouvelle extension (l'original n'est pas supprimé)
+                'save_path': output_path(save_path, settings['format']),
+                'settings': settings,
+                # Dimensions lues dans les en-têtes : estimation mémoire sans relire le fichier
+                'width': int(model.widths[row]),
+                'height': int(model.heights[row]),
+            }
+            if manifest:
+                job['worker'] = incremental_resize_job
+                job['manifest_entry'] = manifest.entry(job['save_path'])
+            jobs.append(job)
+        self.start_batch(jobs, "Optimisation des textures", overwrite, manifest=manifest)
+
+    def execute_png_optimization(self):
+        """Recompression sans perte des PNG cochés (sans redimensionnement)"""
+        model = self.resize_model
+        rows = [row for row in self.checked_resize_rows() if model.path(row).lower().endswith('.png')]
+        if not rows:
+            QMessageBox.information(self, "Recompression PNG", "Aucun PNG coché.")
+            return
+        destination = self.ask_batch_destination(len(rows))
+        if destination is None:
+            return
+        overwrite, target_folder = destination
         
-        # Paramètres
-        is_ratio = self.mode_switch.is_left_active()
-        ratio_mode = self.ratio_type_combo.currentIndex()
-        val = self.ratio_value_spin.value()
-        fix_w = self.fixed_width_spin.value()
-        fix_h = self.fixed_height_spin.value()
+        jobs = []
+        for row in rows:
+            path = model.path(row)
+            jobs.append({
+                'path': path,
+                'save_path': path if overwrite else os.path.join(target_folder, os.path.basename(path)),
+                'settings': None,
+                'worker': optimize_png_job,
+                'memory': png_job_memory(path, int(model.widths[row]), int(model.heights[row]),
+                                         self.metadata_cache.info(path)),
+            })
+        report_folder = target_folder or self.resize_folder_path
+        self.start_batch(jobs, "Recompression PNG sans perte", overwrite,
+                         os.path.join(report_folder, PNG_REPORT_NAME) if report_folder else None)
+
+    def start_batch(self, jobs, title, overwrite, report_path=None, manifest=None, previous_results=None):
+        """Lance un lot sur le moteur ; report_path : rapport CSV avant/après écrit à la fin,
+        manifest : BatchManifest mis à jour avec les résultats.
+        previous_results : reprise d'un lot journalisé (résultats déjà obtenus)"""
+        try:
+            if previous_results is None:
+                self.batch_journal.create(jobs, {
+                    'title': title,
+                    'overwrite': overwrite,
+                    'report_path': report_path,
+                    'manifest_folder': manifest.folder if manifest else None,
+                })
+            else:
+                self.batch_journal.reopen()
+        except OSError as e:
+            print(f"Journal de lot indisponible : {e}")
         
-        # Barre de progression
+        # Fenêtre de progression non bloquante (le travail tourne dans le pool)
         progress = QDialog(self)
         progress.setWindowTitle("Traitement en cours...")
-        progress.setFixedSize(300, 100)
+        progress.setFixedSize(360, 160)
         progress_layout = QVBoxLayout()
-        p_bar = QProgressBar()
-        progress_layout.addWidget(QLabel("Optimisation des textures..."))
-        progress_layout.addWidget(p_bar)
+        self.resize_progress_label = QLabel(f"{title} ({self.resize_engine.max_workers} threads)...")
+        progress_layout.addWidget(self.resize_progress_label)
+        self.resize_progress_bar = QProgressBar()
+        self.resize_progress_bar.setRange(0, len(jobs))
+        progress_layout.addWidget(self.resize_progress_bar)
+        
+        buttons_layout = QHBoxLayout()
+        self.resize_pause_btn = QPushButton("⏸ Pause")
+        self.resize_pause_btn.clicked.connect(self.toggle_resize_pause)
+        buttons_layout.addWidget(self.resize_pause_btn)
+        cancel_btn = QPushButton("Annuler")
+        cancel_btn.clicked.connect(self.resize_engine.cancel)
+        buttons_layout.addWidget(cancel_btn)
+        progress_layout.addLayout(buttons_layout)
+        
         progress.setLayout(progress_layout)
+        progress.rejected.connect(self.resize_engine.cancel)  # Croix / Échap = annuler
+        self.resize_progress_dialog = progress
+        
+        self.resize_overwrite = overwrite
+        self.batch_report_path = report_path
+        self.batch_manifest = manifest
+        self.batch_results = list(previous_results or [])
+        self.execute_btn.setEnabled(False)
+        self.png_optimize_btn.setEnabled(False)
         progress.show()
+        self.resize_engine.start(jobs)
+
+    def offer_batch_resume(self):
+        """Au lancement : propose de reprendre un lot journalisé non terminé"""
+        if self.resize_engine.is_running() or not self.batch_journal.exists():
+            return
+        try:
+            meta, jobs, results = self.batch_journal.load()
+            pending = self.batch_journal.pending_jobs(jobs, results)
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Journal de lot illisible, ignoré : {e}")
+            self.batch_journal.discard()
+            return
+        if not pending:
+            self.batch_journal.discard()
+            return
         
-        success_count = 0
-        error_count = 0
-            
-        p_bar.setRange(0, len(rows_to_process))
+        answer = QMessageBox.question(
+            self, "Lot interrompu",
+            f"Le lot « {meta['title']} » a été interrompu : {len(jobs) - len(pending)}/{len(jobs)} images traitées.\n"
+            f"Reprendre les {len(pending)} images restantes ?\n(Non = abandonner le lot)",
+            QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No)
+        if answer != QMessageBox.StandardButton.Yes:
+            self.batch_journal.discard()
+            return
         
-        for i, row_idx in enumerate(rows_to_process):
-            item_name = self.resize_table.item(row_idx, 0)
-            path = item_name.data(Qt.ItemDataRole.UserRole)
-            
-            if not path or not os.path.exists(path):
-                continue
-                
+        manifest = None
+        if meta.get('manifest_folder'):
+            manifest = BatchManifest(meta['manifest_folder'])
+            for result in results.values():
+                manifest.record(result)
+        pending_paths = {job['save_path'] for job in pending}
+        previous = [result for save_path, result in results.items() if save_path not in pending_paths]
+        self.start_batch(pending, meta['title'], meta['overwrite'], meta.get('report_path'), manifest, previous)
+
+    def toggle_resize_pause(self):
+        """Met en pause / reprend l'alimentation du pool de redimensionnement"""
+        if self.resize_engine.is_paused():
+            self.resize_engine.resume()
+            self.resize_pause_btn.setText("⏸ Pause")
+        else:
+            self.resize_engine.pause()
+            self.resize_pause_btn.setText("▶ Reprendre")
+
+    def on_resize_progress(self, done, total):
+        self.resize_progress_bar.setValue(done)
+        self.resize_progress_label.setText(
+            f"{done}/{total} images · {self.resize_engine.throughput():.1f} img/s "
+            f"({self.resize_engine.max_workers} threads)\n"
+            f"Mémoire estimée : {ImageThumbnail.format_file_size(self.resize_engine.memory_in_use())}"
+            f" / {ImageThumbnail.format_file_size(self.resize_engine.memory_budget)}")
+
+    def on_batch_job_finished(self, result):
+        self.batch_results.append(result)
+        try:
+            self.batch_journal.mark_done(result)
+        except OSError as e:
+            print(f"Erreur journal de lot : {e}")
+        if self.batch_manifest:
+            self.batch_manifest.record(result)
+
+    def write_batch_report(self):
+        """Rapport CSV avant/après (octets) du lot terminé"""
+        import csv
+        try:
+            with open(self.batch_report_path, 'w', newline='', encoding='utf-8') as f:
+                writer = csv.writer(f, delimiter=';')
+                writer.writerow(["Fichier", "Sortie", "Avant (octets)", "Après (octets)", "Gain (octets)", "Gain (%)", "Méthode", "Erreur"])
+                for result in sorted(self.batch_results, key=lambda r: r['bytes_out'] - r['bytes_in']):
+                    gain = result['bytes_in'] - result['bytes_out'] if result['ok'] else 0
+                    pct = gain / result['bytes_in'] * 100 if result['bytes_in'] else 0
+                    writer.writerow([result['path'], result['save_path'], result['bytes_in'],
+                                     result['bytes_out'], gain, f"{pct:.1f}",
+                                     result.get('method', ''), result['error'] or ''])
+        except OSError as e:
+            return f"\nRapport non écrit : {e}"
+        return f"\nRapport : {self.batch_report_path}"
+
+    def on_resize_finished(self, summary):
+        self.resize_progress_dialog.close()
+        self.execute_btn.setEnabled(True)
+        self.png_optimize_btn.setEnabled(True)
+        
+        message = (f"Traitement {'annulé' if summary['cancelled'] else 'terminé'} en {summary['elapsed']:.1f} s.\n"
+                   f"Succès: {summary['success']}\nErreurs: {len(summary['errors'])}")
+        if summary['skipped']:
+            message += f"\nDéjà à jour (ignorées): {summary['skipped']}"
+        if summary['cancelled']:
+            message += f"\nNon traitées: {summary['total'] - summary['done']} (reprise proposée au prochain lancement)"
+            self.batch_journal.close()
+        else:
+            self.batch_journal.discard()
+        if summary['bytes_in']:
+            gain = summary['bytes_in'] - summary['bytes_out']
+            message += (f"\nPoids : {ImageThumbnail.format_file_size(summary['bytes_in'])} ➜ "
+                        f"{ImageThumbnail.format_file_size(summary['bytes_out'])} "
+                        f"(gain {ImageThumbnail.format_file_size(gain)}, {gain / summary['bytes_in'] * 100:.1f}%)")
+        for result in summary['errors'][:10]:
+            message += f"\n• {os.path.basename(result['path'])} : {result['error']}"
+        if self.batch_report_path:
+            message += self.write_batch_report()
+        if self.batch_manifest:
             try:
-                # Chargement
-                img = QImage(path)
-                if img.isNull():
-                    error_count += 1
-                    continue
-                    
-                orig_w, orig_h = img.width(), img.height()
-                new_w, new_h = 0, 0
-                
-                # Calcul dimensions
-                if is_ratio:
-                    if ratio_mode == 0: # %
-                        scale = val / 100.0
-                        new_w = int(orig_w * scale)
-                        new_h = int(orig_h * scale)
-                    elif ratio_mode == 1: # Largeur fixe
-                        new_w = val
-                        if orig_w > 0:
-                            new_h = int(orig_h * (val / orig_w))
-                    elif ratio_mode == 2: # Hauteur fixe
-                        new_h = val
-                        if orig_h > 0:
-                            new_w = int(orig_w * (val / orig_h))
-                else: # Dimensions libres
-                    new_w = fix_w
-                    new_h = fix_h
-                
-                # Redimensionnement
-                if new_w > 0 and new_h > 0:
-                    scaled_img = img.scaled(new_w, new_h, Qt.AspectRatioMode.IgnoreAspectRatio, Qt.TransformationMode.SmoothTransformation)
-                    
-                    # Sauvegarde
-                    save_path = path if overwrite else os.path.join(target_folder, os.path.basename(path))
-                    scaled_img.save(save_path)
-                    success_count += 1
-                else:
-                    error_count += 1
-
-            except Exception as e:
-                print(f"Erreur resize {path}: {e}")
-                error_count += 1
-            
-            p_bar.setValue(i + 1)
-            QApplication.processEvents()
-            
-        progress.close()
-        
-        QMessageBox.information(self, "Terminé", f"Traitement terminé.\nSuccès: {success_count}\nErreurs: {error_count}")
+                self.batch_manifest.save()
+            except OSError as e:
+                message += f"\nManifeste non écrit : {e}"
+            self.batch_manifest = None
+        QMessageBox.information(self, "Terminé", message)
         
         # Refresh si overwrite
-        if overwrite:
+        if self.resize_overwrite:
             self.refresh_resize_list()
 
 
 def main():
+    # Processus de travail du rééchantillonnage numpy (exécutable PyInstaller)
+    multiprocessing.freeze_support()
+    
     # Gestionnaire d'erreurs global
     def handle_exception(exc_type, exc_value, exc_traceback):
         import traceback
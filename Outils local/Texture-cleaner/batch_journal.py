@@ -0,0 +1,160 @@
+"""
+Journal des lots de traitement
+Le lot (réglages, jobs) est écrit à son lancement, puis chaque job terminé est
+ajouté en fin de fichier (synchronisé sur disque par groupes) : un lot
+interrompu (plantage, fermeture, annulation) reprend là où il s'était arrêté
+"""
+
+import os
+import json
+import time
+
+from thumbnail_cache import default_cache_dir
+from resize_engine import resize_job
+from batch_manifest import incremental_resize_job
+from png_optimizer import optimize_png_job
+from output_encoding import atomic_output, partial_path
+
+JOURNAL_VERSION = 1
+SYNC_EVERY = 64        # Lignes écrites entre deux fsync au plus
+SYNC_INTERVAL = 2.0    # Secondes entre deux fsync au plus
+
+# Workers sérialisables par nom (job['worker'])
+WORKERS = {
+    'resize': resize_job,
+    'incremental': incremental_resize_job,
+    'png': optimize_png_job,
+}
+
+
+def default_journal_path():
+    return os.path.join(default_cache_dir(), 'batch_journal.jsonl')
+
+
+def _file_stat(path):
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+def _serialize_job(job):
+    data = {key: value for key, value in job.items() if key != 'worker'}
+    worker = job.get('worker', resize_job)
+    data['worker'] = next(name for name, function in WORKERS.items() if function is worker)
+    # En écrasement, état du fichier avant traitement (voir pending_jobs)
+    if job['path'] == job['save_path']:
+        data['input_stat'] = _file_stat(job['path'])
+    return data
+
+
+def _deserialize_job(data):
+    job = dict(data)
+    job['worker'] = WORKERS[job['worker']]
+    job.pop('input_stat', None)
+    return job
+
+
+class BatchJournal:
+    """Journal JSON Lines : 1re ligne = en-tête (meta, jobs), puis un résultat
+    par ligne. Une dernière ligne tronquée (arrêt pendant l'écriture) est ignorée.
+    Chaque ligne est vidée vers le système à l'écriture (un plantage de
+    l'application ne la perd pas) ; le fsync est groupé (SYNC_EVERY lignes ou
+    SYNC_INTERVAL secondes, et à la fermeture) : une panne système peut faire
+    refaire les derniers jobs, sans plus"""
+
+    def __init__(self, path=None):
+        self.path = path or default_journal_path()
+        self._file = None
+        self._unsynced = 0
+        self._synced_at = 0.0
+
+    def exists(self):
+        return os.path.exists(self.path)
+
+    def create(self, jobs, meta):
+        """Écrit l'en-tête (atomique) et ouvre le journal en ajout"""
+        self.close()
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        header = {'version': JOURNAL_VERSION, 'meta': meta, 'jobs': [_serialize_job(job) for job in jobs]}
+        with atomic_output(self.path) as tmp_path:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write(json.dumps(header) + '\n')
+        self._file = open(self.path, 'a', encoding='utf-8')
+
+    def reopen(self):
+        """Reprise : nouvelles lignes ajoutées au journal existant"""
+        self.close()
+        self._file = open(self.path, 'a', encoding='utf-8')
+        # Ligne tronquée par l'arrêt : la terminer pour ne pas corrompre la suivante
+        with open(self.path, 'rb') as f:
+            f.seek(-1, os.SEEK_END)
+            if f.read(1) != b'\n':
+                self._file.write('\n')
+
+    def load(self):
+        """Retourne (meta, jobs, résultats déjà journalisés par save_path)"""
+        with open(self.path, 'r', encoding='utf-8') as f:
+            lines = f.read().split('\n')
+        header = json.loads(lines[0])
+        if header.get('version') != JOURNAL_VERSION:
+            raise ValueError("Version de journal inconnue")
+        results = {}
+        for line in lines[1:]:
+            try:
+                result = json.loads(line)
+            except ValueError:
+                continue
+            results[result['save_path']] = result
+        return header['meta'], header['jobs'], results
+
+    def pending_jobs(self, jobs, results):
+        """Jobs restant à traiter (non journalisés ou en erreur).
+        En écrasement, un fichier modifié depuis le lancement a déjà été
+        remplacé (arrêt entre le renommage et la ligne de journal) : ignoré"""
+        pending = []
+        for data in jobs:
+            result = results.get(data['save_path'])
+            if result and result['ok']:
+                continue
+            if 'input_stat' in data and data['input_stat'] is not None and _file_stat(data['path']) != data['input_stat']:
+                continue
+            # Fichier temporaire laissé par l'arrêt : l'écriture recommence
+            tmp_path = partial_path(data['save_path'])
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            pending.append(_deserialize_job(data))
+        return pending
+
+    def mark_done(self, result):
+        if self._file is None:
+            return
+        data = {key: value for key, value in result.items() if key != 'memory'}
+        self._file.write(json.dumps(data, default=str) + '\n')
+        self._file.flush()
+        self._unsynced += 1
+        if self._unsynced >= SYNC_EVERY or time.monotonic() - self._synced_at >= SYNC_INTERVAL:
+            self.sync()
+
+    def sync(self):
+        """Rend durables les lignes déjà écrites"""
+        if self._file is not None and self._unsynced:
+            os.fsync(self._file.fileno())
+        self._unsynced = 0
+        self._synced_at = time.monotonic()
+
+    def close(self):
+        if self._file is not None:
+            self.sync()
+            self._file.close()
+            self._file = None
+
+    def discard(self):
+        """Lot terminé : le journal n'a plus lieu d'être"""
+        self._unsynced = 0  # Supprimé : rien à synchroniser
+        self.close()
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
@@ -0,0 +1,142 @@
+"""
+Manifeste de redimensionnement incrémental
+Enregistre, à côté des sorties, l'empreinte de chaque entrée (taille, mtime,
+hash), les réglages appliqués et l'empreinte de la sortie : une nouvelle
+exécution ne retraite que les entrées ou réglages modifiés
+"""
+
+import os
+import json
+import hashlib
+
+from resize_engine import process_resize
+from output_encoding import atomic_output
+
+MANIFEST_NAME = '.texture_cleaner_manifest.json'
+MANIFEST_VERSION = 1
+HASH_CHUNK = 1024 * 1024
+
+
+def file_hash(path):
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(HASH_CHUNK), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def fingerprint(path, known=None):
+    """Empreinte {size, mtime_ns, hash} d'un fichier. Si known a la même
+    taille et le même mtime, son hash est repris sans relire le fichier"""
+    stat = os.stat(path)
+    if known and known['size'] == stat.st_size and known['mtime_ns'] == stat.st_mtime_ns:
+        return dict(known)
+    return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'hash': file_hash(path)}
+
+
+def same_file(path, known):
+    """Le fichier correspond-il à l'empreinte ? (stat, puis hash si seul le mtime diffère)"""
+    if not known or not os.path.exists(path):
+        return False
+    stat = os.stat(path)
+    if stat.st_size != known['size']:
+        return False
+    return stat.st_mtime_ns == known['mtime_ns'] or file_hash(path) == known['hash']
+
+
+def normalized_settings(settings):
+    """Réglages tels que relus depuis le JSON (tuples -> listes...)"""
+    return json.loads(json.dumps(settings, sort_keys=True))
+
+
+def is_up_to_date(entry, path, save_path, settings):
+    """La sortie enregistrée est-elle encore valable pour cette entrée et ces réglages ?"""
+    if not entry or entry.get('settings') != normalized_settings(settings):
+        return False
+    if entry.get('input_path') != os.path.abspath(path):
+        return False
+    if not same_file(save_path, entry.get('output')):
+        return False
+    if os.path.normcase(os.path.abspath(path)) == os.path.normcase(os.path.abspath(save_path)):
+        # Écrasement : l'entrée actuelle est la sortie déjà produite
+        return True
+    return same_file(path, entry.get('input'))
+
+
+def incremental_resize_job(job):
+    """Worker BatchResizeEngine : saute les sorties à jour, sinon redimensionne
+    et joint l'entrée de manifeste à mettre à jour (result['manifest_entry'])"""
+    path, save_path, settings = job['path'], job['save_path'], job['settings']
+    entry = job.get('manifest_entry')
+    try:
+        if is_up_to_date(entry, path, save_path, settings):
+            result = {'path': path, 'save_path': save_path, 'ok': True, 'error': None,
+                      'bytes_in': entry['input']['size'], 'bytes_out': entry['output']['size'],
+                      'streamed': False, 'skipped': True}
+            # Fichiers seulement touchés (même contenu) : mtime mis à jour, plus de hash au prochain passage
+            refreshed = dict(entry, output=fingerprint(save_path, entry['output']))
+            if path != save_path:
+                refreshed['input'] = fingerprint(path, entry['input'])
+            else:
+                refreshed['input'] = dict(entry['input'])
+            if refreshed != entry:
+                result['manifest_entry'] = refreshed
+            return result
+        # Empreinte prise avant l'écriture (la sortie peut écraser l'entrée)
+        source = fingerprint(path, entry.get('input') if entry else None)
+    except OSError as e:
+        return {'path': path, 'save_path': save_path, 'ok': False, 'error': str(e),
+                'bytes_in': 0, 'bytes_out': 0, 'streamed': False}
+
+    result = process_resize(path, save_path, settings)
+    if result['ok']:
+        try:
+            result['manifest_entry'] = {
+                'input_path': os.path.abspath(path),
+                'input': source,
+                'settings': normalized_settings(settings),
+                'output': fingerprint(save_path),
+            }
+        except OSError:
+            pass
+    return result
+
+
+class BatchManifest:
+    """Manifeste d'un dossier de sortie ; entrées indexées par chemin de sortie
+    relatif au dossier"""
+
+    def __init__(self, folder):
+        self.folder = folder
+        self.path = os.path.join(folder, MANIFEST_NAME)
+        self.entries = {}
+        self.dirty = False
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') == MANIFEST_VERSION:
+                self.entries = data.get('entries', {})
+        except (OSError, ValueError):
+            pass
+
+    def key(self, save_path):
+        return os.path.relpath(os.path.abspath(save_path), os.path.abspath(self.folder)).replace(os.sep, '/')
+
+    def entry(self, save_path):
+        return self.entries.get(self.key(save_path))
+
+    def record(self, result):
+        """Met à jour depuis un résultat de incremental_resize_job"""
+        entry = result.get('manifest_entry')
+        if entry:
+            self.entries[self.key(result['save_path'])] = entry
+            self.dirty = True
+
+    def save(self):
+        """Écriture atomique (fichier temporaire puis remplacement)"""
+        if not self.dirty:
+            return
+        with atomic_output(self.path) as tmp_path:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({'version': MANIFEST_VERSION, 'entries': self.entries}, f, indent=1, sort_keys=True)
+        self.dirty = False
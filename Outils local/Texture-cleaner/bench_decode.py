@@ -0,0 +1,94 @@
+"""
+Benchmark du décodage des miniatures
+Compare le décodage pleine résolution + scaled() au décodage réduit (load_scaled_image)
+Les colonnes « Tampon » donnent la taille du plus gros tampon décodé
+(largeur x hauteur x 4, calculée et non mesurée)
+
+Usage : python bench_decode.py <dossier> [largeur] [hauteur]
+"""
+
+import os
+import sys
+import time
+from PyQt6.QtCore import Qt
+from PyQt6.QtGui import QImage, QImageReader, QImageIOHandler
+from PyQt6.QtWidgets import QApplication
+
+from app import load_scaled_image
+
+IMAGE_EXTENSIONS = ['.jpg', '.jpeg', '.png', '.gif', '.bmp', '.webp', '.tiff', '.tif']
+
+
+def decode_full(path, width, height):
+    image = QImage(path)
+    decoded_bytes = image.sizeInBytes()
+    if not image.isNull():
+        image = image.scaled(width, height, Qt.AspectRatioMode.KeepAspectRatio,
+                             Qt.TransformationMode.SmoothTransformation)
+    return image, decoded_bytes
+
+
+def decode_reduced(path, width, height):
+    image = load_scaled_image(path, width, height)
+    # Taille du plus gros tampon décodé : réduit si le format supporte ScaledSize
+    reader = QImageReader(path)
+    full = reader.size()
+    if reader.supportsOption(QImageIOHandler.ImageOption.ScaledSize):
+        target = full.scaled(width * 2, height * 2, Qt.AspectRatioMode.KeepAspectRatio)
+        decoded_bytes = min(full.width(), target.width()) * min(full.height(), target.height()) * 4
+    else:
+        decoded_bytes = full.width() * full.height() * 4
+    return image, decoded_bytes
+
+
+def format_size(size):
+    for unit in ['B', 'KB', 'MB', 'GB']:
+        if size < 1024:
+            return f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} TB"
+
+
+def main():
+    if len(sys.argv) < 2:
+        print(__doc__)
+        return 1
+    folder = sys.argv[1]
+    width = int(sys.argv[2]) if len(sys.argv) > 2 else 150
+    height = int(sys.argv[3]) if len(sys.argv) > 3 else 120
+
+    _ = QApplication(sys.argv)
+    stats = {}  # format -> [n, t_full, t_reduced, mem_full, mem_reduced]
+
+    for root, dirs, files in os.walk(folder):
+        for file in files:
+            ext = os.path.splitext(file)[1].lower()
+            if ext not in IMAGE_EXTENSIONS:
+                continue
+            path = os.path.join(root, file)
+
+            start = time.perf_counter()
+            _, mem_full = decode_full(path, width, height)
+            t_full = time.perf_counter() - start
+
+            start = time.perf_counter()
+            _, mem_reduced = decode_reduced(path, width, height)
+            t_reduced = time.perf_counter() - start
+
+            entry = stats.setdefault(ext, [0, 0.0, 0.0, 0, 0])
+            entry[0] += 1
+            entry[1] += t_full
+            entry[2] += t_reduced
+            entry[3] = max(entry[3], mem_full)
+            entry[4] = max(entry[4], mem_reduced)
+
+    print(f"{'Format':<8}{'N':>6}{'Complet (ms)':>15}{'Réduit (ms)':>15}{'Gain':>8}{'Tampon complet':>16}{'Tampon réduit':>16}")
+    for ext, (n, t_full, t_reduced, mem_full, mem_reduced) in sorted(stats.items()):
+        speedup = t_full / t_reduced if t_reduced > 0 else 0
+        print(f"{ext:<8}{n:>6}{t_full / n * 1000:>15.1f}{t_reduced / n * 1000:>15.1f}{speedup:>7.1f}x"
+              f"{format_size(mem_full):>16}{format_size(mem_reduced):>16}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
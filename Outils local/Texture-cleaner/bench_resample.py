@@ -0,0 +1,116 @@
+"""
+Benchmark des filtres de rééchantillonnage
+Lissage Qt contre filtres numpy (box, Mitchell, Lanczos) : temps et qualité
+(PSNR / SSIM) par rapport à une réduction de référence par moyenne de blocs
+en lumière linéaire (exacte pour un facteur entier ; le filtre box en
+lumière linéaire la reproduit donc exactement)
+
+Usage : python bench_resample.py <dossier> [facteur de réduction entier]
+"""
+
+import sys
+import time
+import numpy as np
+from PyQt6.QtCore import Qt
+from PyQt6.QtGui import QImage
+
+from bench_resize import collect_images
+from numpy_resampler import KERNELS, resample_image, srgb_to_linear_lut, linear_to_srgb
+from streaming_resize import _image_to_array
+
+SSIM_WINDOW = 7
+
+
+def reference_downscale(pixels, factor):
+    """Moyenne des blocs factor x factor en lumière linéaire, alpha prémultiplié"""
+    height, width = pixels.shape[0] // factor * factor, pixels.shape[1] // factor * factor
+    pixels = pixels[:height, :width]
+    work = np.empty(pixels.shape, dtype=np.float64)
+    work[..., :3] = srgb_to_linear_lut(255)[pixels[..., :3]]
+    work[..., 3] = pixels[..., 3] / 255.0
+    work[..., :3] *= work[..., 3:4]
+    blocks = work.reshape(height // factor, factor, width // factor, factor, 4).mean(axis=(1, 3))
+    alpha = blocks[..., 3:4]
+    blocks[..., :3] = np.where(alpha > 1e-6, blocks[..., :3] / np.maximum(alpha, 1e-6), 0.0)
+    blocks[..., :3] = linear_to_srgb(blocks[..., :3])
+    return np.rint(np.clip(blocks, 0.0, 1.0) * 255).astype(np.uint8)
+
+
+def psnr(a, b):
+    mse = np.mean((a[..., :3].astype(np.float64) - b[..., :3]) ** 2)
+    return float('inf') if mse == 0 else 10 * np.log10(255.0 ** 2 / mse)
+
+
+def _box_mean(x):
+    """Moyenne glissante SSIM_WINDOW x SSIM_WINDOW (sommes cumulées), zone valide"""
+    c = np.cumsum(np.cumsum(np.pad(x, ((1, 0), (1, 0))), axis=0), axis=1)
+    n = SSIM_WINDOW
+    return (c[n:, n:] - c[:-n, n:] - c[n:, :-n] + c[:-n, :-n]) / (n * n)
+
+
+def ssim(a, b):
+    """SSIM moyen sur la luminance (fenêtres uniformes)"""
+    weights = np.array([0.299, 0.587, 0.114])
+    x = a[..., :3].astype(np.float64) @ weights
+    y = b[..., :3].astype(np.float64) @ weights
+    if min(x.shape) < SSIM_WINDOW:
+        return float('nan')
+    c1, c2 = (0.01 * 255) ** 2, (0.03 * 255) ** 2
+    mx, my = _box_mean(x), _box_mean(y)
+    vx = _box_mean(x * x) - mx * mx
+    vy = _box_mean(y * y) - my * my
+    cov = _box_mean(x * y) - mx * my
+    s = ((2 * mx * my + c1) * (2 * cov + c2)) / ((mx * mx + my * my + c1) * (vx + vy + c2))
+    return float(s.mean())
+
+
+def qt_scale(image, width, height, filter_name=None, linear=False):
+    """Chemin Qt (mêmes arguments que resample_image, ignorés)"""
+    return image.scaled(width, height, Qt.AspectRatioMode.IgnoreAspectRatio,
+                        Qt.TransformationMode.SmoothTransformation)
+
+
+def main():
+    if len(sys.argv) < 2:
+        print(__doc__)
+        return 1
+    paths = collect_images(sys.argv[1])
+    factor = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    if not paths:
+        print("Aucune image trouvée")
+        return 1
+
+    methods = [("Qt lissé", qt_scale, None, False)]
+    for name in KERNELS:
+        methods.append((f"{name} linéaire", resample_image, name, True))
+        methods.append((f"{name} sRGB", resample_image, name, False))
+
+    totals = {label: [0.0, 0.0, 0.0, 0] for label, *_ in methods}
+    for path in paths:
+        image = QImage(path)
+        if image.isNull() or image.width() < factor * SSIM_WINDOW or image.height() < factor * SSIM_WINDOW:
+            continue
+        width, height = image.width() // factor, image.height() // factor
+        image = image.copy(0, 0, width * factor, height * factor)
+        reference = reference_downscale(_image_to_array(image, 8), factor)
+        for label, function, filter_name, linear in methods:
+            start = time.perf_counter()
+            result = function(image, width, height, filter_name, linear)
+            elapsed = time.perf_counter() - start
+            pixels = _image_to_array(result, 8)
+            total = totals[label]
+            total[0] += elapsed
+            total[1] += min(psnr(reference, pixels), 99.0)
+            total[2] += ssim(reference, pixels)
+            total[3] += 1
+
+    print(f"Réduction x{factor}, référence : moyenne de blocs en lumière linéaire")
+    print(f"{'Méthode':<20}{'Temps (s)':>11}{'PSNR (dB)':>11}{'SSIM':>9}")
+    for label, (elapsed, psnr_sum, ssim_sum, count) in totals.items():
+        if count:
+            print(f"{label:<20}{elapsed:>11.3f}{psnr_sum / count:>11.2f}{ssim_sum / count:>9.4f}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,84 @@
+"""
+Benchmark du moteur de redimensionnement par lots
+Débit (images/s) de BatchResizeEngine selon le nombre de threads
+
+Usage : python bench_resize.py <dossier> [pourcentage] [threads max] [budget Mo]
+"""
+
+import os
+import sys
+import shutil
+import tempfile
+from PyQt6.QtCore import QThread
+from PyQt6.QtWidgets import QApplication
+
+from resize_engine import BatchResizeEngine, DEFAULT_RESIZE_SETTINGS, DEFAULT_MEMORY_BUDGET
+
+IMAGE_EXTENSIONS = ['.jpg', '.jpeg', '.png', '.gif', '.bmp', '.webp', '.tiff', '.tif']
+
+
+def collect_images(folder):
+    paths = []
+    for root, dirs, files in os.walk(folder):
+        for file in files:
+            if os.path.splitext(file)[1].lower() in IMAGE_EXTENSIONS:
+                paths.append(os.path.join(root, file))
+    return paths
+
+
+def run_batch(app, paths, output_dir, settings, workers, memory_budget):
+    """Lance un lot complet et retourne le résumé émis par le moteur"""
+    engine = BatchResizeEngine(workers, memory_budget)
+    summary = {}
+
+    def on_finished(result):
+        summary.update(result)
+        app.quit()
+
+    engine.finished.connect(on_finished)
+    jobs = [{'path': path, 'save_path': os.path.join(output_dir, f"{i}_{os.path.basename(path)}"),
+             'settings': settings} for i, path in enumerate(paths)]
+    engine.start(jobs)
+    if engine.is_running():
+        app.exec()
+    return summary
+
+
+def main():
+    if len(sys.argv) < 2:
+        print(__doc__)
+        return 1
+    folder = sys.argv[1]
+    percent = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    max_threads = int(sys.argv[3]) if len(sys.argv) > 3 else QThread.idealThreadCount()
+    memory_budget = int(sys.argv[4]) * 1024 * 1024 if len(sys.argv) > 4 else DEFAULT_MEMORY_BUDGET
+
+    app = QApplication(sys.argv)
+    paths = collect_images(folder)
+    if not paths:
+        print("Aucune image trouvée")
+        return 1
+    settings = dict(DEFAULT_RESIZE_SETTINGS, value=percent)
+
+    thread_counts = sorted({1, max_threads} | {n for n in (2, 4, 8, 16, 32, 64) if n < max_threads})
+    print(f"{len(paths)} images, {percent} %, {QThread.idealThreadCount()} cœurs")
+    print(f"{'Threads':>8}{'Temps (s)':>12}{'Img/s':>10}{'Accél.':>9}{'Efficacité':>12}{'Pic mém.':>11}{'Erreurs':>9}")
+
+    base_rate = None
+    output_dir = tempfile.mkdtemp(prefix='bench_resize_')
+    try:
+        for workers in thread_counts:
+            summary = run_batch(app, paths, output_dir, settings, workers, memory_budget)
+            rate = summary['done'] / summary['elapsed'] if summary['elapsed'] > 0 else 0
+            base_rate = base_rate or rate
+            speedup = rate / base_rate if base_rate else 0
+            print(f"{workers:>8}{summary['elapsed']:>12.2f}{rate:>10.1f}{speedup:>8.2f}x"
+                  f"{speedup / workers * 100:>11.0f}%{summary['peak_memory'] / 1048576:>8.0f} Mo"
+                  f"{len(summary['errors']):>9}")
+    finally:
+        shutil.rmtree(output_dir, ignore_errors=True)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
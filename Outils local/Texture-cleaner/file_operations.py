@@ -0,0 +1,315 @@
+"""
+Opérations de fichiers par lots (suppression, déplacement)
+Exécutées en arrière-plan par un pool de threads, avec progression,
+annulation et rapport des échecs ; l'index des fichiers est mis à jour
+ensuite en une seule passe.
+Déplacement : simple renommage sur le même système de fichiers, sinon copie
+vérifiée puis suppression de la source une fois le lot de copies synchronisé
+"""
+
+import os
+import csv
+import time
+import errno
+import shutil
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from PyQt6.QtCore import QObject, pyqtSignal
+
+from output_encoding import partial_path
+
+FILE_WORKERS = 8           # Opérations en parallèle (limitées par les I/O)
+PROGRESS_INTERVAL = 0.05   # Délai min (s) entre deux signaux de progression
+SYNC_BATCH = 256           # Copies synchronisées ensemble avant suppression des sources
+COPY_CHUNK = 1024 * 1024
+MOVE_MANIFEST_PREFIX = 'manifeste_deplacement'
+
+
+def delete_file(job):
+    os.remove(job['path'])
+
+
+def _copy_verified(path, dest_path):
+    """Copie via un fichier temporaire, relue et comparée (blake2b) à la source"""
+    tmp_path = partial_path(dest_path)
+    source_digest = hashlib.blake2b(digest_size=16)
+    try:
+        with open(path, 'rb') as src, open(tmp_path, 'wb') as dst:
+            for block in iter(lambda: src.read(COPY_CHUNK), b''):
+                source_digest.update(block)
+                dst.write(block)
+        shutil.copystat(path, tmp_path)
+        copy_digest = hashlib.blake2b(digest_size=16)
+        with open(tmp_path, 'rb') as f:
+            for block in iter(lambda: f.read(COPY_CHUNK), b''):
+                copy_digest.update(block)
+        if copy_digest.digest() != source_digest.digest():
+            raise OSError("Vérification de la copie échouée (contenu différent)")
+        os.replace(tmp_path, dest_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def _rename_no_replace(path, dest_path):
+    """Renomme sans jamais écraser (FileExistsError si dest_path existe).
+    Lien physique puis suppression de la source : la création du lien échoue
+    atomiquement si la destination existe. Sans liens physiques (FAT, certains
+    partages, liens symboliques), le nom est réservé par O_EXCL puis remplacé"""
+    if not os.path.islink(path):
+        try:
+            os.link(path, dest_path)
+        except FileExistsError:
+            raise
+        except OSError as e:
+            if e.errno == errno.EXDEV:
+                raise
+        else:
+            try:
+                os.unlink(path)
+            except OSError:
+                os.unlink(dest_path)
+                raise
+            return
+    os.close(os.open(dest_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+    try:
+        os.replace(path, dest_path)
+    except OSError:
+        os.unlink(dest_path)
+        raise
+
+
+def rename_file(job):
+    """Renommage seul (même système de fichiers), sans écraser la destination"""
+    path, dest_path = job['path'], job['dest_path']
+    job['size'] = os.path.getsize(path)
+    os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+    try:
+        _rename_no_replace(path, dest_path)
+    except FileExistsError:
+        raise FileExistsError(f"Destination déjà existante : {dest_path}") from None
+    job['mode'] = 'rename'
+
+
+def move_file(job):
+    """Renommage si job['rename'] (même système de fichiers), sinon copie
+    vérifiée ; la source d'une copie est supprimée par commit_copies"""
+    if job.get('rename'):
+        try:
+            return rename_file(job)
+        except OSError as e:
+            if e.errno != errno.EXDEV:
+                raise
+    path, dest_path = job['path'], job['dest_path']
+    job['size'] = os.path.getsize(path)
+    if os.path.exists(dest_path):
+        raise FileExistsError(f"Destination déjà existante : {dest_path}")
+    os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+    _copy_verified(path, dest_path)
+    job['mode'] = 'copy'
+    job['copied'] = True
+
+
+def sync_files(paths):
+    """Rend durables les fichiers écrits : un seul sync global si disponible"""
+    if hasattr(os, 'sync'):
+        os.sync()
+        return
+    for path in paths:
+        with open(path, 'r+b') as f:
+            os.fsync(f.fileno())
+
+
+def commit_copies(jobs):
+    """Synchronise un lot de copies puis supprime leurs sources.
+    Retourne (jobs terminés, [(chemin, erreur)])"""
+    done, failed = [], []
+    try:
+        sync_files([job['dest_path'] for job in jobs])
+    except OSError as e:
+        return done, [(job['path'], f"Synchronisation de la copie : {e}") for job in jobs]
+    for job in jobs:
+        try:
+            os.remove(job['path'])
+            done.append(job)
+        except OSError as e:
+            failed.append((job['path'], f"Copié mais source non supprimée : {e}"))
+    return done, failed
+
+
+OPERATIONS = {
+    'delete': delete_file,
+    'move': move_file,
+    'quarantine': rename_file,
+    'restore': rename_file,
+}
+
+
+def _device(path):
+    """Périphérique (st_dev) du dossier existant le plus proche de path"""
+    path = os.path.abspath(path)
+    while not os.path.exists(path) and os.path.dirname(path) != path:
+        path = os.path.dirname(path)
+    return os.stat(path).st_dev
+
+
+def move_jobs(paths, dest_folder, root=None):
+    """Jobs de déplacement vers dest_folder : arborescence relative à root
+    conservée, ou à plat sans root. rename : source et destination sur le
+    même système de fichiers"""
+    dest_device = _device(dest_folder)
+    devices = {}
+    jobs = []
+    for path in paths:
+        relative = os.path.basename(path)
+        if root:
+            try:
+                candidate = os.path.relpath(path, root)
+                if not candidate.startswith(os.pardir):
+                    relative = candidate
+            except ValueError:  # Autre lecteur (Windows)
+                pass
+        source_dir = os.path.dirname(path)
+        if source_dir not in devices:
+            try:
+                devices[source_dir] = os.stat(source_dir).st_dev
+            except OSError:
+                devices[source_dir] = None
+        jobs.append({'path': path, 'dest_path': os.path.join(dest_folder, relative),
+                     'rename': devices[source_dir] == dest_device})
+    return jobs
+
+
+def write_move_manifest(dest_folder, summary):
+    """Manifeste CSV du déplacement (source, destination, mode, taille, erreur)
+    écrit dans dest_folder ; retourne son chemin"""
+    path = os.path.join(dest_folder, f"{MOVE_MANIFEST_PREFIX}_{time.strftime('%Y%m%d_%H%M%S')}.csv")
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f, delimiter=';')
+        writer.writerow(["Source", "Destination", "Mode", "Taille (octets)", "Erreur"])
+        for job in summary['done']:
+            mode = "renommage" if job.get('mode') == 'rename' else "copie vérifiée"
+            writer.writerow([job['path'], job['dest_path'], mode, job.get('size', ''), ''])
+        for file_path, error in summary['failed']:
+            writer.writerow([file_path, '', '', '', error])
+    return path
+
+
+def without_paths(files, paths):
+    """Index de fichiers ({'path', ...}) privé des chemins donnés, en une passe"""
+    paths = set(paths)
+    return [f for f in files if f['path'] not in paths] if paths else files
+
+
+def _run_job(operation, job):
+    try:
+        operation(job)
+        return job, None
+    except Exception as e:
+        return job, str(e)
+
+
+class FileOperationEngine(QObject):
+    """Applique une opération (OPERATIONS) à une liste de jobs {path, ...}
+    dans un thread. Annuler laisse se terminer les opérations en cours.
+    Les jobs copiés (job['copied']) ne sont terminés qu'après commit_copies,
+    par lots de SYNC_BATCH.
+
+    finished(résumé) : {'operation', 'total', 'done' (jobs réussis),
+    'failed' ([(chemin, erreur)]), 'cancelled', 'elapsed'}
+    Les signaux sont émis dans le thread de l'objet (GUI).
+    """
+    progress = pyqtSignal(int, int)   # traités, total
+    finished = pyqtSignal(object)
+
+    _finished = pyqtSignal(object)
+
+    def __init__(self, max_workers=FILE_WORKERS, parent=None):
+        super().__init__(parent)
+        self.max_workers = max_workers
+        self._cancelled = threading.Event()
+        self._thread = None
+        self._running = False
+        self._finished.connect(self._on_finished)
+
+    def is_running(self):
+        return self._running
+
+    def start(self, operation, jobs):
+        if self._running:
+            raise RuntimeError("Une opération est déjà en cours")
+        self._running = True
+        self._cancelled = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True,
+                                        args=(operation, list(jobs), self._cancelled))
+        self._thread.start()
+
+    def cancel(self):
+        self._cancelled.set()
+
+    def wait(self):
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self, operation, jobs, cancelled):
+        started_at = time.perf_counter()
+        function = OPERATIONS[operation]
+        done, failed = [], []
+        total = len(jobs)
+        last_progress = 0.0
+
+        copied = []
+
+        def commit():
+            committed, errors = commit_copies(copied)
+            done.extend(committed)
+            failed.extend(errors)
+            copied.clear()
+
+        def record(future):
+            job, error = future.result()
+            if error is not None:
+                failed.append((job['path'], error))
+            elif job.get('copied'):
+                copied.append(job)
+                if len(copied) >= SYNC_BATCH:
+                    commit()
+            else:
+                done.append(job)
+
+        self.progress.emit(0, total)
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = [executor.submit(_run_job, function, job) for job in jobs]
+            pending = set(futures)
+            for future in as_completed(futures):
+                pending.discard(future)
+                record(future)
+                if cancelled.is_set():
+                    break
+                now = time.perf_counter()
+                if now - last_progress >= PROGRESS_INTERVAL:
+                    self.progress.emit(len(done) + len(failed) + len(copied), total)
+                    last_progress = now
+            if pending:
+                # Annulation : les jobs non commencés sont abandonnés, ceux en cours comptés
+                executor.shutdown(wait=True, cancel_futures=True)
+                for future in pending:
+                    if not future.cancelled():
+                        record(future)
+        if copied:
+            commit()
+        self.progress.emit(len(done) + len(failed), total)
+        self._finished.emit({
+            'operation': operation,
+            'total': total,
+            'done': done,
+            'failed': failed,
+            'cancelled': cancelled.is_set() and len(done) + len(failed) < total,
+            'elapsed': time.perf_counter() - started_at,
+        })
+
+    def _on_finished(self, summary):
+        self._running = False
+        self.finished.emit(summary)
@@ -0,0 +1,223 @@
+"""
+Parcours progressif d'un dossier d'images
+Les chemins sont publiés par lots dès leur découverte ; les en-têtes (dimensions,
+profondeur, canaux, alpha, compression) viennent d'un cache persistant
+(taille + mtime) ou sont lus en arrière-plan puis publiés au fil de l'eau
+"""
+
+import os
+import json
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from PyQt6.QtCore import QObject, pyqtSignal
+
+from image_headers import read_image_info
+from output_encoding import atomic_output
+from quarantine import QUARANTINE_DIR
+
+BATCH_SIZE = 2000          # Fichiers par lot publié
+FLUSH_INTERVAL = 0.1       # Délai max (s) avant publication d'un lot partiel
+HEADER_WORKERS = 8         # Lectures d'en-têtes en parallèle (I/O)
+UNKNOWN = -1               # Dimension pas encore lue
+INFO_FIELDS = ('format', 'width', 'height', 'bit_depth', 'channels', 'has_alpha', 'compression')
+
+
+class MetadataCache:
+    """En-têtes des images entre les sessions (read_image_info) : chemin ->
+    [taille, mtime_ns, *INFO_FIELDS]. Valide tant que taille et mtime sont
+    inchangés"""
+    VERSION = 2
+
+    def __init__(self, path, max_entries=500000):
+        self.path = path
+        self.max_entries = max_entries
+        self._entries = None
+        self._dirty = False
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()  # Deux parcours peuvent sauver en même temps
+
+    def load(self):
+        with self._lock:
+            if self._entries is not None:
+                return
+            self._entries = {}
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                if data.get('version') == self.VERSION:
+                    self._entries = data['entries']
+            except (OSError, ValueError, KeyError):
+                pass
+
+    def get(self, path, size, mtime_ns):
+        """Infos d'en-tête en cache (dict de read_image_info) ou None"""
+        entry = self._entries.get(path)
+        if entry and entry[0] == size and entry[1] == mtime_ns:
+            return dict(zip(INFO_FIELDS, entry[2:]))
+        return None
+
+    def put(self, path, size, mtime_ns, info):
+        with self._lock:
+            self._entries.pop(path, None)  # Réinsertion : les plus récentes en fin
+            self._entries[path] = [size, mtime_ns] + [info[field] for field in INFO_FIELDS]
+            self._dirty = True
+
+    def info(self, path):
+        """Infos d'en-tête d'un fichier : cache si taille et mtime concordent,
+        sinon lecture de l'en-tête (mise en cache) ; None si illisible"""
+        self.load()
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        info = self.get(path, stat.st_size, stat.st_mtime_ns)
+        if info is None:
+            info = read_image_info(path)
+            if info:
+                self.put(path, stat.st_size, stat.st_mtime_ns, info)
+        return info
+
+    def save(self):
+        with self._save_lock:
+            with self._lock:
+                if not self._dirty:
+                    return
+                while len(self._entries) > self.max_entries:
+                    del self._entries[next(iter(self._entries))]
+                entries = dict(self._entries)
+                self._dirty = False
+            try:
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                with atomic_output(self.path) as tmp_path:
+                    with open(tmp_path, 'w', encoding='utf-8') as f:
+                        json.dump({'version': self.VERSION, 'entries': entries}, f, separators=(',', ':'))
+            except OSError as e:
+                print(f"Cache des dimensions non écrit : {e}")
+
+
+def walk_images(folder, extensions, cancelled):
+    """Itère (chemin, taille, mtime_ns) dans l'ordre de os.walk"""
+    stack = [folder]
+    while stack and not cancelled.is_set():
+        directory = stack.pop()
+        subdirs = []
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            if entry.name != QUARANTINE_DIR:
+                                subdirs.append(entry.path)
+                        elif os.path.splitext(entry.name)[1].lower() in extensions:
+                            stat = entry.stat()
+                            yield entry.path, stat.st_size, stat.st_mtime_ns
+                    except OSError as e:
+                        print(f"Erreur lecture {entry.path}: {e}")
+        except OSError as e:
+            print(f"Erreur lecture {directory}: {e}")
+        stack.extend(reversed(subdirs))
+
+
+class FolderScanner(QObject):
+    """Parcours d'un dossier dans un thread ; signaux émis par lots.
+
+    files_found([(chemin, taille, largeur, hauteur, infos)]) : largeur/hauteur
+    valent UNKNOWN (infos None) si l'en-tête reste à lire ;
+    dimensions_read([(chemin, largeur, hauteur, infos)]) les complète (infos :
+    dict de read_image_info, None si illisible) ; finished() termine le parcours.
+    Un nouveau scan() ou cancel() rend muets les lots de l'ancien parcours.
+    """
+    files_found = pyqtSignal(object)
+    dimensions_read = pyqtSignal(object)
+    finished = pyqtSignal()
+
+    _files_found = pyqtSignal(int, object)
+    _dimensions_read = pyqtSignal(int, object)
+    _finished = pyqtSignal(int)
+
+    def __init__(self, cache, parent=None):
+        super().__init__(parent)
+        self.cache = cache
+        self._generation = 0
+        self._cancelled = threading.Event()
+        self._thread = None
+        self._active = False
+        self._files_found.connect(lambda generation, batch: self._relay(generation, self.files_found, batch))
+        self._dimensions_read.connect(lambda generation, batch: self._relay(generation, self.dimensions_read, batch))
+        self._finished.connect(self._on_finished)
+
+    def is_running(self):
+        """Parcours en cours (du point de vue des signaux : finished pas encore émis)"""
+        return self._active
+
+    def scan(self, folder, extensions):
+        self.cancel()
+        self._generation += 1
+        self._cancelled = threading.Event()
+        self._active = True
+        self._thread = threading.Thread(target=self._run, daemon=True,
+                                        args=(self._generation, folder, set(extensions), self._cancelled))
+        self._thread.start()
+
+    def cancel(self):
+        self._cancelled.set()
+        self._active = False
+
+    def wait(self):
+        if self._thread is not None:
+            self._thread.join()
+
+    def _relay(self, generation, signal, batch):
+        if generation == self._generation:
+            signal.emit(batch)
+
+    def _on_finished(self, generation):
+        if generation == self._generation:
+            self._active = False
+            self.finished.emit()
+
+    def _run(self, generation, folder, extensions, cancelled):
+        self.cache.load()
+        futures = {}
+        batch = []
+        last_flush = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=HEADER_WORKERS) as executor:
+            for path, size, mtime_ns in walk_images(folder, extensions, cancelled):
+                info = self.cache.get(path, size, mtime_ns)
+                if info is None:
+                    futures[executor.submit(read_image_info, path)] = (path, size, mtime_ns)
+                    batch.append((path, size, UNKNOWN, UNKNOWN, None))
+                else:
+                    batch.append((path, size, info['width'], info['height'], info))
+                if len(batch) >= BATCH_SIZE or time.perf_counter() - last_flush >= FLUSH_INTERVAL:
+                    self._files_found.emit(generation, batch)
+                    batch, last_flush = [], time.perf_counter()
+            if batch:
+                self._files_found.emit(generation, batch)
+
+            batch = []
+            last_flush = time.perf_counter()
+            for future in as_completed(futures):
+                if cancelled.is_set():
+                    for pending in futures:
+                        pending.cancel()
+                    break
+                path, size, mtime_ns = futures[future]
+                try:
+                    info = future.result()
+                except Exception as e:
+                    print(f"Erreur lecture {path}: {e}")
+                    info = None
+                if info:
+                    self.cache.put(path, size, mtime_ns, info)
+                    batch.append((path, info['width'], info['height'], info))
+                else:
+                    batch.append((path, 0, 0, None))
+                if len(batch) >= BATCH_SIZE or time.perf_counter() - last_flush >= FLUSH_INTERVAL:
+                    self._dimensions_read.emit(generation, batch)
+                    batch, last_flush = [], time.perf_counter()
+            if batch and not cancelled.is_set():
+                self._dimensions_read.emit(generation, batch)
+        self.cache.save()
+        self._finished.emit(generation)
@@ -0,0 +1,221 @@
+"""
+Lecture des en-têtes d'images sans décodage
+Dimensions, profondeur, canaux, alpha et compression pour PNG, JPEG, GIF, BMP, WebP et TIFF
+"""
+
+import os
+import struct
+
+HEAD_SIZE = 4096
+
+
+def read_image_info(file_path):
+    """Retourne un dict {format, width, height, bit_depth, channels, has_alpha,
+    compression} en ne lisant que les premiers Ko du fichier, ou None si le
+    format n'est pas reconnu / l'en-tête est invalide"""
+    try:
+        with open(file_path, 'rb') as f:
+            head = f.read(HEAD_SIZE)
+            if head[:8] == b'\x89PNG\r\n\x1a\n':
+                return _read_png(head)
+            if head[:2] == b'\xff\xd8':
+                return _read_jpeg(f)
+            if head[:6] in (b'GIF87a', b'GIF89a'):
+                return _read_gif(head)
+            if head[:2] == b'BM':
+                return _read_bmp(head)
+            if head[:4] == b'RIFF' and head[8:12] == b'WEBP':
+                return _read_webp(head)
+            if head[:4] in (b'II*\x00', b'MM\x00*'):
+                return _read_tiff(f, head)
+    except (OSError, struct.error, ValueError, IndexError):
+        return None
+    return None
+
+
+def _info(fmt, width, height, bit_depth, channels, has_alpha, compression):
+    if width <= 0 or height <= 0:
+        return None
+    return {
+        'format': fmt,
+        'width': width,
+        'height': height,
+        'bit_depth': bit_depth,
+        'channels': channels,
+        'has_alpha': has_alpha,
+        'compression': compression,
+    }
+
+
+def decoded_size(info, bytes_per_pixel=4):
+    """Taille en mémoire de l'image décodée (QImage 32 bits par défaut)"""
+    if not info:
+        return 0
+    return info['width'] * info['height'] * bytes_per_pixel
+
+
+# --- PNG ---
+
+PNG_CHANNELS = {0: 1, 2: 3, 3: 1, 4: 2, 6: 4}
+
+
+def _read_png(head):
+    if head[12:16] != b'IHDR':
+        return None
+    width, height, bit_depth, color_type, _, _, interlace = struct.unpack('>IIBBBBB', head[16:29])
+    channels = PNG_CHANNELS.get(color_type)
+    if channels is None:
+        return None
+    has_alpha = color_type in (4, 6)
+
+    # tRNS (transparence palette / couleur clé) se trouve avant IDAT
+    pos = 8
+    while pos + 8 <= len(head):
+        length, chunk_type = struct.unpack('>I4s', head[pos:pos + 8])
+        if chunk_type == b'tRNS':
+            has_alpha = True
+            break
+        if chunk_type in (b'IDAT', b'IEND'):
+            break
+        pos += 12 + length
+
+    compression = 'deflate' + (' (Adam7)' if interlace else '')
+    return _info('png', width, height, bit_depth, channels, has_alpha, compression)
+
+
+# --- JPEG ---
+
+JPEG_SOF = {
+    0xC0: 'baseline', 0xC1: 'extended', 0xC2: 'progressive', 0xC3: 'lossless',
+    0xC5: 'differential', 0xC6: 'differential progressive', 0xC7: 'differential lossless',
+    0xC9: 'arithmetic', 0xCA: 'arithmetic progressive', 0xCB: 'arithmetic lossless',
+    0xCD: 'differential arithmetic', 0xCE: 'differential arithmetic progressive',
+    0xCF: 'differential arithmetic lossless',
+}
+
+
+def _read_jpeg(f):
+    # Parcours des segments par seek : l'EXIF peut dépasser les premiers Ko
+    f.seek(2)
+    while True:
+        marker = f.read(2)
+        if len(marker) < 2 or marker[0] != 0xFF:
+            return None
+        code = marker[1]
+        while code == 0xFF:  # Octets de bourrage
+            code = f.read(1)[0]
+        if code in (0xD8, 0x01) or 0xD0 <= code <= 0xD7:
+            continue
+        if code in (0xD9, 0xDA):
+            return None
+        length = struct.unpack('>H', f.read(2))[0]
+        if code in JPEG_SOF:
+            precision, height, width, components = struct.unpack('>BHHB', f.read(6))
+            return _info('jpeg', width, height, precision, components, False, JPEG_SOF[code])
+        f.seek(length - 2, os.SEEK_CUR)
+
+
+# --- GIF ---
+
+def _read_gif(head):
+    width, height, packed = struct.unpack('<HHB', head[6:11])
+    bit_depth = (packed & 0x07) + 1
+    # Graphic Control Extension avec drapeau de transparence
+    pos = head.find(b'\x21\xf9\x04')
+    has_alpha = pos >= 0 and pos + 4 < len(head) and bool(head[pos + 3] & 0x01)
+    return _info('gif', width, height, bit_depth, 1, has_alpha, 'lzw')
+
+
+# --- BMP ---
+
+BMP_COMPRESSION = {0: 'none', 1: 'rle8', 2: 'rle4', 3: 'bitfields', 4: 'jpeg', 5: 'png', 6: 'alphabitfields'}
+
+
+def _read_bmp(head):
+    header_size = struct.unpack('<I', head[14:18])[0]
+    if header_size == 12:  # BITMAPCOREHEADER
+        width, height, _, bpp = struct.unpack('<HHHH', head[18:26])
+        compression = 0
+    else:
+        width, height, _, bpp, compression = struct.unpack('<iiHHI', head[18:34])
+        height = abs(height)  # Négatif = lignes de haut en bas
+    has_alpha = False
+    if bpp == 32:
+        if compression == 6:
+            has_alpha = True
+        elif header_size >= 56:  # BITMAPV3INFOHEADER et plus : masque alpha
+            has_alpha = struct.unpack('<I', head[66:70])[0] != 0
+    channels = 4 if has_alpha else (1 if bpp <= 8 else 3)
+    return _info('bmp', width, height, bpp, channels, has_alpha,
+                 BMP_COMPRESSION.get(compression, str(compression)))
+
+
+# --- WebP ---
+
+def _read_webp(head):
+    chunk = head[12:16]
+    if chunk == b'VP8 ':
+        # Trame clé : code de départ 9d 01 2a puis largeur/hauteur sur 14 bits
+        if head[23:26] != b'\x9d\x01\x2a':
+            return None
+        width, height = struct.unpack('<HH', head[26:30])
+        return _info('webp', width & 0x3FFF, height & 0x3FFF, 8, 3, False, 'vp8 (lossy)')
+    if chunk == b'VP8L':
+        if head[20] != 0x2F:
+            return None
+        bits = struct.unpack('<I', head[21:25])[0]
+        width = (bits & 0x3FFF) + 1
+        height = ((bits >> 14) & 0x3FFF) + 1
+        has_alpha = bool((bits >> 28) & 0x01)
+        return _info('webp', width, height, 8, 4 if has_alpha else 3, has_alpha, 'vp8l (lossless)')
+    if chunk == b'VP8X':
+        flags = head[20]
+        width = int.from_bytes(head[24:27], 'little') + 1
+        height = int.from_bytes(head[27:30], 'little') + 1
+        has_alpha = bool(flags & 0x10)
+        compression = 'vp8x (animated)' if flags & 0x02 else 'vp8x'
+        return _info('webp', width, height, 8, 4 if has_alpha else 3, has_alpha, compression)
+    return None
+
+
+# --- TIFF ---
+
+TIFF_COMPRESSION = {1: 'none', 2: 'ccitt', 5: 'lzw', 6: 'jpeg (old)', 7: 'jpeg', 8: 'deflate',
+                    32773: 'packbits', 32946: 'deflate', 34925: 'lzma', 50000: 'zstd'}
+TIFF_TYPE_SIZES = {1: 1, 3: 2, 4: 4, 16: 8}
+
+
+def _read_tiff(f, head):
+    order = '<' if head[:2] == b'II' else '>'
+    ifd_offset = struct.unpack(order + 'I', head[4:8])[0]
+    f.seek(ifd_offset)
+    count = struct.unpack(order + 'H', f.read(2))[0]
+    entries = f.read(count * 12)
+
+    tags = {}
+    for i in range(count):
+        tag, value_type, value_count = struct.unpack(order + 'HHI', entries[i * 12:i * 12 + 8])
+        raw = entries[i * 12 + 8:i * 12 + 12]
+        size = TIFF_TYPE_SIZES.get(value_type)
+        if size is None:
+            continue
+        # Seule la première valeur nous intéresse (BitsPerSample identiques)
+        if size == 1:
+            tags[tag] = raw[0]
+        elif size == 2:
+            tags[tag] = struct.unpack(order + 'H', raw[:2])[0]
+        elif size == 4:
+            tags[tag] = struct.unpack(order + 'I', raw)[0]
+        if tag == 258 and value_count * size > 4:
+            # BitsPerSample stocké hors de l'entrée : lire la première valeur
+            pos = f.tell()
+            f.seek(struct.unpack(order + 'I', raw)[0])
+            tags[tag] = struct.unpack(order + 'H', f.read(2))[0]
+            f.seek(pos)
+
+    width = tags.get(256, 0)
+    height = tags.get(257, 0)
+    channels = tags.get(277, 1)
+    has_alpha = 338 in tags or (channels in (2, 4) and tags.get(262) != 5)  # 262=5 : CMJN
+    compression = TIFF_COMPRESSION.get(tags.get(259, 1), str(tags.get(259)))
+    return _info('tiff', width, height, tags.get(258, 1), channels, has_alpha, compression)
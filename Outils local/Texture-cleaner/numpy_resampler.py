@@ -0,0 +1,166 @@
+"""
+Rééchantillonnage vectorisé (numpy)
+Filtres séparables box / Mitchell / Lanczos, réduction en lumière linéaire
+(sRGB décodé) avec alpha prémultiplié ; exécutable dans des processus de travail
+"""
+
+import os
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import numpy as np
+from PyQt6.QtGui import QImage
+
+from streaming_resize import filter_weights, _image_to_array
+
+RESAMPLE_QT = 'qt'
+RESAMPLERS = [("Qt (lissé)", RESAMPLE_QT), ("Box", 'box'), ("Mitchell", 'mitchell'), ("Lanczos 3", 'lanczos3')]
+
+SIXTEEN_BIT_FORMATS = (QImage.Format.Format_RGBA64, QImage.Format.Format_RGBX64,
+                       QImage.Format.Format_RGBA64_Premultiplied, QImage.Format.Format_Grayscale16)
+
+
+def _box(x):
+    return ((x >= -0.5) & (x < 0.5)).astype(np.float64)
+
+
+def _mitchell(x):
+    """Mitchell-Netravali B = C = 1/3"""
+    x = np.abs(x)
+    near = (7 * x ** 3 - 12 * x ** 2 + 16 / 3) / 6
+    far = (-7 / 3 * x ** 3 + 12 * x ** 2 - 20 * x + 32 / 3) / 6
+    return np.where(x < 1, near, np.where(x < 2, far, 0.0))
+
+
+def _lanczos3(x):
+    return np.where(np.abs(x) < 3, np.sinc(x) * np.sinc(x / 3), 0.0)
+
+
+# Noyau et demi-largeur (support) par filtre
+KERNELS = {
+    'box': (_box, 0.5),
+    'mitchell': (_mitchell, 2.0),
+    'lanczos3': (_lanczos3, 3.0),
+}
+
+_srgb_luts = {}
+
+
+def uses_numpy(settings):
+    return settings.get('resampler', RESAMPLE_QT) in KERNELS
+
+
+def srgb_to_linear_lut(max_value):
+    """Table code sRGB -> lumière linéaire [0, 1] (float32)"""
+    if max_value not in _srgb_luts:
+        v = np.arange(max_value + 1, dtype=np.float64) / max_value
+        _srgb_luts[max_value] = np.where(v <= 0.04045, v / 12.92, ((v + 0.055) / 1.055) ** 2.4).astype(np.float32)
+    return _srgb_luts[max_value]
+
+
+def linear_to_srgb(v):
+    v = np.clip(v, 0.0, 1.0)
+    return np.where(v <= 0.0031308, v * 12.92, 1.055 * np.power(v, 1 / 2.4) - 0.055)
+
+
+def _resample_axis(data, size, kernel, support, axis):
+    """Passe du filtre séparable le long d'un axe (0 = lignes, 1 = colonnes)"""
+    indices, weights = filter_weights(data.shape[axis], size, kernel, support)
+    shape = [1] * data.ndim
+    shape[axis] = size
+    out = np.zeros(data.shape[:axis] + (size,) + data.shape[axis + 1:], dtype=np.float32)
+    for tap in range(indices.shape[1]):
+        out += np.take(data, indices[:, tap], axis=axis) * weights[:, tap].reshape(shape)
+    return out
+
+
+def resample_array(pixels, new_w, new_h, filter_name='lanczos3', linear=True):
+    """Redimensionne un tableau (h, w, 4) RGBA uint8/uint16 non prémultiplié"""
+    kernel, support = KERNELS[filter_name]
+    max_value = 65535 if pixels.dtype == np.uint16 else 255
+    height, width = pixels.shape[:2]
+
+    work = np.empty(pixels.shape, dtype=np.float32)
+    if linear:
+        work[..., :3] = srgb_to_linear_lut(max_value)[pixels[..., :3]]
+    else:
+        work[..., :3] = pixels[..., :3] * np.float32(1 / max_value)
+    work[..., 3] = pixels[..., 3] * np.float32(1 / max_value)
+    has_alpha = bool((pixels[..., 3] != max_value).any())
+    if has_alpha:
+        work[..., :3] *= work[..., 3:4]
+
+    # Ordre des passes : la moins coûteuse (taille intermédiaire x prises) d'abord
+    h_taps = filter_weights(width, new_w, kernel, support)[0].shape[1]
+    v_taps = filter_weights(height, new_h, kernel, support)[0].shape[1]
+    if height * new_w * h_taps + new_w * new_h * v_taps <= new_h * width * v_taps + new_w * new_h * h_taps:
+        work = _resample_axis(work, new_w, kernel, support, 1)
+        work = _resample_axis(work, new_h, kernel, support, 0)
+    else:
+        work = _resample_axis(work, new_h, kernel, support, 0)
+        work = _resample_axis(work, new_w, kernel, support, 1)
+
+    alpha = np.clip(work[..., 3:4], 0.0, 1.0)
+    if has_alpha:
+        work[..., :3] = np.where(alpha > 1e-6, work[..., :3] / np.maximum(alpha, 1e-6), 0.0)
+    work[..., 3:4] = alpha
+    if linear:
+        work[..., :3] = linear_to_srgb(work[..., :3])
+    return np.rint(np.clip(work, 0.0, 1.0) * max_value).astype(pixels.dtype)
+
+
+def resample_image(image, new_w, new_h, filter_name='lanczos3', linear=True):
+    """QImage -> QImage redimensionnée (format d'origine conservé si possible)"""
+    sixteen_bit = image.format() in SIXTEEN_BIT_FORMATS
+    pixels = _image_to_array(image, 16 if sixteen_bit else 8)
+    out = resample_array(pixels, new_w, new_h, filter_name, linear)
+    fmt = QImage.Format.Format_RGBA64 if sixteen_bit else QImage.Format.Format_RGBA8888
+    result = QImage(out.tobytes(), new_w, new_h, out.shape[1] * out.itemsize * 4, fmt).copy()
+    if image.format() in (QImage.Format.Format_Grayscale8, QImage.Format.Format_Grayscale16):
+        return result.convertToFormat(image.format())
+    if not image.hasAlphaChannel():
+        return result.convertToFormat(QImage.Format.Format_RGBX64 if sixteen_bit else QImage.Format.Format_RGB32)
+    return result
+
+
+def resample_memory(width, height, new_w, new_h):
+    """Empreinte estimée (octets) : décodage, tableau de travail float32,
+    passe intermédiaire et sortie"""
+    return width * height * (4 + 16) + max(new_w * height, new_h * width) * 16 + new_w * new_h * (16 + 4)
+
+
+# --- Exécution dans des processus de travail (hors GIL) ---
+
+_process_pool = None
+_process_pool_lock = threading.Lock()
+
+
+def process_pool():
+    global _process_pool
+    with _process_pool_lock:
+        if _process_pool is None:
+            # spawn : pas de fork d'un processus Qt multi-thread
+            _process_pool = ProcessPoolExecutor(max_workers=os.cpu_count() or 1,
+                                                mp_context=multiprocessing.get_context('spawn'))
+        return _process_pool
+
+
+def run_in_process(function, *args):
+    """Exécute function(*args) dans le pool de processus (repli dans le
+    processus courant si le pool est inutilisable)"""
+    global _process_pool
+    try:
+        return process_pool().submit(function, *args).result()
+    except (BrokenProcessPool, OSError):
+        with _process_pool_lock:
+            _process_pool = None
+        return function(*args)
+
+
+def shutdown_process_pool():
+    global _process_pool
+    with _process_pool_lock:
+        if _process_pool is not None:
+            _process_pool.shutdown(cancel_futures=True)
+            _process_pool = None
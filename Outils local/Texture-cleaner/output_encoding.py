@@ -0,0 +1,170 @@
+"""
+Options d'encodage de sortie
+Format, qualité, compression PNG, suppression de l'alpha et recherche de la
+qualité optimale (poids cible ou budget d'erreur PSNR)
+"""
+
+import math
+import os
+from contextlib import contextmanager
+import numpy as np
+from PyQt6.QtGui import QImage
+
+from size_estimator import encode_image
+
+# Formats proposés ('' = format d'origine)
+OUTPUT_FORMATS = [("Identique", ''), ("PNG", 'png'), ("JPEG", 'jpg'), ("WebP", 'webp')]
+LOSSY_FORMATS = ('jpg', 'jpeg', 'webp')
+
+OPTIMIZE_NONE = 0
+OPTIMIZE_TARGET_SIZE = 1
+OPTIMIZE_ERROR_BUDGET = 2
+
+DEFAULT_OUTPUT_SETTINGS = {
+    'format': '',
+    'quality': 90,
+    'png_compression': 6,
+    'strip_alpha': False,
+    'optimize': OPTIMIZE_NONE,
+    'target_kb': 256,
+    'min_psnr': 40.0,
+}
+
+MIN_QUALITY = 10
+PARTIAL_SUFFIX = '.partial'
+
+
+def output_path(save_path, fmt):
+    """Chemin de sortie avec l'extension du format choisi"""
+    if not fmt:
+        return save_path
+    return os.path.splitext(save_path)[0] + '.' + fmt
+
+
+def partial_path(path):
+    """Fichier temporaire d'écriture, dans le même dossier (renommage atomique)
+    et avec la même extension (format déduit par Qt)"""
+    root, ext = os.path.splitext(path)
+    return root + PARTIAL_SUFFIX + ext
+
+
+@contextmanager
+def atomic_output(path):
+    """Fournit un chemin temporaire ; à la sortie sans erreur, le fichier est
+    synchronisé sur disque puis renommé en path. Un arrêt brutal laisse donc
+    soit l'ancien fichier intact, soit le nouveau complet"""
+    tmp_path = partial_path(path)
+    try:
+        yield tmp_path
+        with open(tmp_path, 'rb+') as f:
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def png_quality(level):
+    """Qualité Qt équivalente à un niveau zlib 0-9 (le plugin PNG ignore
+    setCompression et calcule niveau = (100 - qualité) * 9 / 91)"""
+    return 100 - math.ceil(level * 91 / 9)
+
+
+def write_quality(fmt, settings, quality=None):
+    """Paramètre qualité passé à QImage.save pour ce format"""
+    if fmt == 'png':
+        return png_quality(settings.get('png_compression', 6))
+    if fmt in LOSSY_FORMATS:
+        return settings.get('quality', -1) if quality is None else quality
+    return -1
+
+
+def prepare_image(image, fmt, settings):
+    """Supprime l'alpha si demandé (ou si le format ne le gère pas)"""
+    if (settings.get('strip_alpha') or fmt in ('jpg', 'jpeg')) and image.hasAlphaChannel():
+        return image.convertToFormat(QImage.Format.Format_RGB32)
+    return image
+
+
+def _to_array(image):
+    image = image.convertToFormat(QImage.Format.Format_RGBA8888)
+    data = np.frombuffer(image.constBits().asstring(image.sizeInBytes()), dtype=np.uint8)
+    data = data.reshape(image.height(), image.bytesPerLine())[:, :image.width() * 4]
+    return data.reshape(image.height(), image.width(), 4).astype(np.float32)
+
+
+def psnr(reference, data, fmt):
+    """PSNR (dB) de l'image encodée data par rapport à reference"""
+    decoded = QImage.fromData(data, fmt)
+    if decoded.isNull():
+        return 0.0
+    # Sur RVB : un alpha constant diluerait l'erreur
+    mse = float(np.mean((_to_array(reference)[..., :3] - _to_array(decoded)[..., :3]) ** 2))
+    return float('inf') if mse == 0 else 10 * math.log10(255.0 ** 2 / mse)
+
+
+def optimize_quality(image, fmt, settings):
+    """Recherche dichotomique de la qualité (formats avec perte) :
+    - poids cible : qualité la plus haute dont l'encodage tient dans target_kb
+    - budget d'erreur : qualité la plus basse qui garde un PSNR >= min_psnr
+    Retourne (qualité, octets encodés)"""
+    mode = settings.get('optimize', OPTIMIZE_NONE)
+
+    def acceptable(data):
+        if mode == OPTIMIZE_TARGET_SIZE:
+            return len(data) <= settings['target_kb'] * 1024
+        return psnr(image, data, fmt) >= settings['min_psnr']
+
+    encoded = {}
+
+    def encode(quality):
+        if quality not in encoded:
+            encoded[quality] = encode_image(image, fmt, quality)
+        return encoded[quality]
+
+    low, high = MIN_QUALITY, 100
+    best = None
+    while low <= high:
+        quality = (low + high) // 2
+        data = encode(quality)
+        if data is None:
+            raise ValueError(f"Format non inscriptible : {fmt}")
+        ok = acceptable(data)
+        if mode == OPTIMIZE_TARGET_SIZE:
+            # Le poids croît avec la qualité : chercher la plus haute acceptable
+            if ok:
+                best, low = quality, quality + 1
+            else:
+                high = quality - 1
+        else:
+            # L'erreur décroît avec la qualité : chercher la plus basse acceptable
+            if ok:
+                best, high = quality, quality - 1
+            else:
+                low = quality + 1
+    if best is None:
+        # Cible inatteignable : qualité minimale (poids) ou maximale (erreur)
+        best = MIN_QUALITY if mode == OPTIMIZE_TARGET_SIZE else 100
+    return best, encode(best)
+
+
+def save_image(image, path, settings, quality=None):
+    """Encode et écrit image selon les options de sortie.
+    quality force la qualité (niveaux de mip : celle trouvée pour le niveau 0).
+    Retourne la qualité utilisée"""
+    fmt = os.path.splitext(path)[1][1:].lower()
+    image = prepare_image(image, fmt, settings)
+    if quality is None and fmt in LOSSY_FORMATS and settings.get('optimize', OPTIMIZE_NONE) != OPTIMIZE_NONE:
+        quality, data = optimize_quality(image, fmt, settings)
+        with atomic_output(path) as tmp_path:
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+        return quality
+    quality = write_quality(fmt, settings, quality)
+    with atomic_output(path) as tmp_path:
+        if not image.save(tmp_path, None, quality):
+            raise ValueError(f"Écriture impossible : {path}")
+    return quality
@@ -0,0 +1,179 @@
+"""
+Recompression PNG sans perte
+Suppression des chunks non essentiels, essai des stratégies de filtrage et
+des réglages zlib, vérification pixel à pixel du résultat retenu
+"""
+
+import struct
+import zlib
+import numpy as np
+from PyQt6.QtGui import QImage
+
+from image_headers import read_image_info
+from output_encoding import atomic_output
+from streaming_resize import PNG_SIGNATURE, PNG_CHANNELS, PNG_SAMPLES, _chunk, _read_chunks, _image_bytes, _image_to_array
+# Chunks conservés : critiques, transparence, et gamma/espace sRGB (affichage)
+KEPT_CHUNKS = (b'IHDR', b'PLTE', b'tRNS', b'gAMA', b'sRGB', b'cHRM', b'sBIT')
+FILTER_NAMES = ['none', 'sub', 'up', 'average', 'paeth', 'adaptatif']
+ZLIB_STRATEGIES = [('défaut', zlib.Z_DEFAULT_STRATEGY), ('filtered', zlib.Z_FILTERED)]
+PNG_REPORT_NAME = 'rapport_recompression_png.csv'
+# Pic mémoire / octets des lignes brutes, mesuré (tracemalloc et RSS, 8 et
+# 16 bits, RVB et RVBA : ~28 numpy/zlib + ~2 QImage) : tableaux int16 du
+# filtre Paeth, 5 variantes filtrées, empilement de l'adaptatif, candidat zlib
+MEMORY_FACTOR = 32
+
+
+def read_png(path):
+    """Retourne (ihdr, chunks conservés [(type, données)], octets IDAT concaténés)"""
+    with open(path, 'rb') as f:
+        if f.read(8) != PNG_SIGNATURE:
+            raise ValueError("Pas un fichier PNG")
+        ihdr = None
+        kept = []
+        idat = []
+        for chunk_type, data in _read_chunks(f):
+            if chunk_type == b'IHDR':
+                ihdr = data
+            elif chunk_type == b'IDAT':
+                idat.append(data)
+            elif chunk_type in KEPT_CHUNKS:
+                kept.append((chunk_type, data))
+    if ihdr is None or not idat:
+        raise ValueError("PNG incomplet")
+    return ihdr, kept, b''.join(idat)
+
+
+def build_png(ihdr, chunks, compressed):
+    return (PNG_SIGNATURE + _chunk(b'IHDR', ihdr)
+            + b''.join(_chunk(chunk_type, data) for chunk_type, data in chunks)
+            + _chunk(b'IDAT', compressed) + _chunk(b'IEND', b''))
+
+
+def raw_rows(image, width, color_type, bit_depth):
+    """Lignes brutes (h, octets par ligne) uint8 telles que stockées avant filtrage"""
+    if color_type == 3:
+        if image.format() != QImage.Format.Format_Indexed8:
+            raise ValueError("Palette non conservée au décodage")
+        return np.ascontiguousarray(_image_bytes(image)[:, :width])
+    samples = _image_to_array(image, bit_depth)[..., PNG_CHANNELS[color_type]]
+    if bit_depth == 16:
+        samples = samples.astype('>u2')
+    return np.ascontiguousarray(samples).view(np.uint8).reshape(image.height(), -1)
+
+
+def filter_candidates(raw, bpp):
+    """Données filtrées (h, n) pour chaque filtre PNG, calculées sur toute l'image"""
+    prior = np.vstack([np.zeros((1, raw.shape[1]), dtype=np.uint8), raw[:-1]])
+    left = np.zeros_like(raw)
+    left[:, bpp:] = raw[:, :-bpp]
+    upper_left = np.zeros_like(raw)
+    upper_left[:, bpp:] = prior[:, :-bpp]
+
+    a, b, c = left.astype(np.int16), prior.astype(np.int16), upper_left.astype(np.int16)
+    p = a + b - c
+    pa, pb, pc = np.abs(p - a), np.abs(p - b), np.abs(p - c)
+    paeth = np.where((pa <= pb) & (pa <= pc), a, np.where(pb <= pc, b, c)).astype(np.uint8)
+
+    return [
+        raw,
+        raw - left,
+        raw - prior,
+        raw - ((a + b) // 2).astype(np.uint8),
+        raw - paeth,
+    ]
+
+
+def assemble(filtered, filter_types):
+    """Préfixe chaque ligne de son octet de type de filtre"""
+    return np.hstack([filter_types.astype(np.uint8)[:, None], filtered]).tobytes()
+
+
+def filter_strategies(raw, bpp):
+    """Itère (nom, données filtrées prêtes à compresser)"""
+    candidates = filter_candidates(raw, bpp)
+    rows = raw.shape[0]
+    for index, filtered in enumerate(candidates):
+        yield FILTER_NAMES[index], assemble(filtered, np.full(rows, index))
+    # Adaptatif : par ligne, plus petite somme des valeurs signées absolues
+    scores = np.stack([np.abs(f.view(np.int8).astype(np.int32)).sum(axis=1) for f in candidates])
+    best = scores.argmin(axis=0)
+    chosen = np.stack(candidates)[best, np.arange(rows)]
+    yield FILTER_NAMES[-1], assemble(chosen, best)
+
+
+def same_pixels(reference, data):
+    decoded = QImage.fromData(data, 'PNG')
+    if decoded.isNull():
+        return False
+    fmt = QImage.Format.Format_RGBA64
+    return decoded.convertToFormat(fmt) == reference.convertToFormat(fmt)
+
+
+def optimize_png(path, save_path):
+    """Recompresse un PNG sans perte ; écrit le plus petit résultat vérifié
+    (ou l'original inchangé). Retourne un dict résultat"""
+    result = {'path': path, 'save_path': save_path, 'ok': False, 'error': None,
+              'bytes_in': 0, 'bytes_out': 0, 'method': 'original'}
+    try:
+        with open(path, 'rb') as f:
+            original = f.read()
+        result['bytes_in'] = len(original)
+        ihdr, kept, idat = read_png(path)
+        width, height, bit_depth, color_type, _, _, interlace = struct.unpack('>IIBBBBB', ihdr)
+
+        reference = QImage.fromData(original, 'PNG')
+        if reference.isNull():
+            raise ValueError("Décodage impossible")
+
+        # Étape 1 : mêmes données compressées, chunks non essentiels retirés
+        best_data, best_method = build_png(ihdr, kept, idat), 'chunks'
+
+        # Étape 2 : refiltrage + zlib (8 bits et plus, non entrelacé)
+        if not interlace and bit_depth >= 8 and color_type in PNG_SAMPLES:
+            raw = raw_rows(reference, width, color_type, bit_depth)
+            bpp = max(PNG_SAMPLES[color_type] * bit_depth // 8, 1)
+            for filter_name, filtered in filter_strategies(raw, bpp):
+                for zlib_name, strategy in ZLIB_STRATEGIES:
+                    compressor = zlib.compressobj(9, zlib.DEFLATED, 15, 9, strategy)
+                    compressed = compressor.compress(filtered) + compressor.flush()
+                    candidate = build_png(ihdr, kept, compressed)
+                    if len(candidate) < len(best_data) and same_pixels(reference, candidate):
+                        best_data, best_method = candidate, f"{filter_name} / zlib {zlib_name}"
+
+        if len(best_data) < len(original) and (best_method != 'chunks' or same_pixels(reference, best_data)):
+            data = best_data
+            result['method'] = best_method
+        else:
+            data = original
+        if save_path != path or data is not original:
+            with atomic_output(save_path) as tmp_path:
+                with open(tmp_path, 'wb') as f:
+                    f.write(data)
+        result['bytes_out'] = len(data)
+        result['ok'] = True
+    except Exception as e:
+        result['error'] = str(e)
+    return result
+
+
+def optimize_png_job(job):
+    """Point d'entrée pour BatchResizeEngine (job['worker'])"""
+    return optimize_png(job['path'], job['save_path'])
+
+
+def optimize_png_memory(width, height, bytes_per_pixel=4):
+    """Empreinte estimée (octets) de optimize_png pour des lignes brutes de
+    bytes_per_pixel octets par pixel (canaux x octets par canal)"""
+    return width * height * bytes_per_pixel * MEMORY_FACTOR
+
+
+def png_job_memory(path, width=-1, height=-1, info=None):
+    """Empreinte d'un job de recompression : dimensions, canaux et profondeur
+    de l'en-tête (info déjà lue, ex. cache du parcours, sinon lue ici) ;
+    width / height du parcours (-1 = pas encore lus) et 8 octets par pixel
+    (RVBA 16 bits) si l'en-tête est illisible"""
+    info = info or read_image_info(path)
+    if info:
+        return optimize_png_memory(info['width'], info['height'],
+                                   info['channels'] * max(info['bit_depth'], 8) // 8)
+    return optimize_png_memory(max(width, 0), max(height, 0), 8)
@@ -0,0 +1,122 @@
+"""
+Quarantaine des fichiers supprimés
+Les fichiers sont renommés (O(1), sans copie) dans une session de quarantaine
+située dans le dossier analysé, donc sur le même système de fichiers.
+Le journal de session est écrit avant les renommages : restaurer = renommer
+en sens inverse les fichiers encore présents ; purger = renommer la session
+puis l'effacer en arrière-plan
+"""
+
+import os
+import json
+import time
+import shutil
+import threading
+
+QUARANTINE_DIR = '.texture_cleaner_quarantine'   # Ignoré par les parcours de dossiers
+JOURNAL_NAME = 'journal.jsonl'
+PURGE_PREFIX = '.purge-'
+JOURNAL_VERSION = 1
+
+
+def quarantine_root(folder):
+    return os.path.join(folder, QUARANTINE_DIR)
+
+
+def new_session(folder, paths):
+    """Crée une session et journalise les fichiers à mettre en quarantaine.
+    Retourne (dossier de session, jobs {path, dest_path})"""
+    session_dir = os.path.join(quarantine_root(folder), time.strftime('%Y%m%d_%H%M%S'))
+    suffix = 1
+    while os.path.exists(session_dir):
+        session_dir = os.path.join(quarantine_root(folder), f"{time.strftime('%Y%m%d_%H%M%S')}_{suffix}")
+        suffix += 1
+    os.makedirs(session_dir)
+
+    jobs = []
+    for index, path in enumerate(paths):
+        try:
+            relative = os.path.relpath(path, folder)
+        except ValueError:  # Autre lecteur (Windows)
+            relative = os.pardir
+        if relative.startswith(os.pardir):
+            # Hors du dossier : à plat, préfixé pour éviter les collisions
+            relative = os.path.join('_hors_dossier', f"{index}_{os.path.basename(path)}")
+        jobs.append({'path': path, 'dest_path': os.path.join(session_dir, relative)})
+
+    with open(os.path.join(session_dir, JOURNAL_NAME), 'w', encoding='utf-8') as f:
+        f.write(json.dumps({'version': JOURNAL_VERSION, 'root': folder, 'created': time.time()}) + '\n')
+        for job in jobs:
+            f.write(json.dumps([job['path'], job['dest_path']]) + '\n')
+        f.flush()
+        os.fsync(f.fileno())
+    return session_dir, jobs
+
+
+def _read_journal(session_dir):
+    with open(os.path.join(session_dir, JOURNAL_NAME), 'r', encoding='utf-8') as f:
+        header = json.loads(f.readline())
+        entries = [json.loads(line) for line in f if line.strip()]
+    if header.get('version') != JOURNAL_VERSION:
+        raise ValueError("Version de journal inconnue")
+    return header, entries
+
+
+def list_sessions(folder):
+    """Sessions du dossier, plus récentes d'abord :
+    [{'path', 'created', 'count', 'bytes'}] (fichiers encore en quarantaine)"""
+    root = quarantine_root(folder)
+    sessions = []
+    try:
+        names = os.listdir(root)
+    except OSError:
+        return sessions
+    for name in names:
+        session_dir = os.path.join(root, name)
+        if name.startswith(PURGE_PREFIX):
+            purge_in_background(session_dir)  # Purge interrompue
+            continue
+        try:
+            header, entries = _read_journal(session_dir)
+        except (OSError, ValueError):
+            continue
+        count, total = 0, 0
+        for _, quarantined in entries:
+            try:
+                total += os.path.getsize(quarantined)
+                count += 1
+            except OSError:
+                pass
+        sessions.append({'path': session_dir, 'created': header['created'], 'count': count, 'bytes': total})
+    sessions.sort(key=lambda s: s['created'], reverse=True)
+    return sessions
+
+
+def restore_jobs(session_dir):
+    """Jobs {path, dest_path} ramenant les fichiers encore en quarantaine"""
+    _, entries = _read_journal(session_dir)
+    return [{'path': quarantined, 'dest_path': original}
+            for original, quarantined in entries if os.path.exists(quarantined)]
+
+
+def purge_in_background(path):
+    """Renomme la session (instantané, elle disparaît de la liste) puis
+    l'efface dans un thread ; une purge interrompue reprend au prochain listage"""
+    name = os.path.basename(path)
+    if not name.startswith(PURGE_PREFIX):
+        target = os.path.join(os.path.dirname(path), PURGE_PREFIX + name)
+        os.rename(path, target)
+        path = target
+    thread = threading.Thread(target=shutil.rmtree, args=(path,), kwargs={'ignore_errors': True}, daemon=True)
+    thread.start()
+    return thread
+
+
+def discard_if_empty(session_dir):
+    """Session entièrement restaurée : supprimée"""
+    try:
+        _, entries = _read_journal(session_dir)
+    except (OSError, ValueError):
+        return
+    if not any(os.path.exists(quarantined) for _, quarantined in entries):
+        purge_in_background(session_dir)
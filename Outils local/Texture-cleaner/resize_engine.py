@@ -0,0 +1,428 @@
+"""
+Moteur de redimensionnement par lots
+Calcul des dimensions cibles, traitement d'une image, exécution parallèle
+(QThreadPool) sous budget mémoire avec progression, pause, reprise et annulation
+"""
+
+import os
+import time
+from collections import deque
+from PyQt6.QtCore import Qt, QObject, QRunnable, QThreadPool, pyqtSignal
+from PyQt6.QtGui import QImage
+
+from image_headers import read_image_info
+from streaming_resize import STREAMING_THRESHOLD, should_stream, streaming_memory, streaming_resize
+from output_encoding import DEFAULT_OUTPUT_SETTINGS, atomic_output, save_image
+from numpy_resampler import RESAMPLE_QT, KERNELS, uses_numpy, resample_image, resample_memory, run_in_process
+
+DEFAULT_MEMORY_BUDGET = 2048 * 1024 * 1024
+LOOKAHEAD = 64       # Jobs examinés derrière un job trop gros pour le budget restant
+MAX_BYPASS = 256     # Dépassements tolérés avant de réserver la place au gros job
+
+# Modes du ratio (index de ratio_type_combo)
+RATIO_PERCENT = 0
+RATIO_WIDTH = 1
+RATIO_HEIGHT = 2
+POT_NEAREST = 3
+POT_FLOOR = 4
+POT_CEIL = 5
+MAX_DIMENSION = 6
+
+DEFAULT_RESIZE_SETTINGS = {
+    'is_ratio': True,
+    'ratio_mode': RATIO_PERCENT,
+    'value': 50,
+    'fixed_width': 1024,
+    'fixed_height': 1024,
+    'mipmaps': False,
+    'resampler': RESAMPLE_QT,
+    'linear_light': True,
+    **DEFAULT_OUTPUT_SETTINGS,
+}
+
+
+def pot_floor(size):
+    """Plus grande puissance de deux <= size"""
+    return 1 << (max(int(size), 1).bit_length() - 1)
+
+
+def pot_ceil(size):
+    """Plus petite puissance de deux >= size"""
+    return 1 << (max(int(size), 1) - 1).bit_length()
+
+
+def pot_nearest(size):
+    """Puissance de deux la plus proche (supérieure en cas d'égalité)"""
+    lower, upper = pot_floor(size), pot_ceil(size)
+    return lower if size - lower < upper - size else upper
+
+
+POT_FUNCTIONS = {POT_NEAREST: pot_nearest, POT_FLOOR: pot_floor, POT_CEIL: pot_ceil}
+
+
+def target_size(orig_w, orig_h, settings):
+    """Dimensions de sortie (largeur, hauteur) pour des réglages donnés"""
+    if not settings['is_ratio']:
+        return settings['fixed_width'], settings['fixed_height']
+
+    val = settings['value']
+    mode = settings['ratio_mode']
+    if mode == RATIO_PERCENT:
+        scale = val / 100.0
+        return int(orig_w * scale), int(orig_h * scale)
+    if mode == RATIO_WIDTH:
+        return val, int(orig_h * (val / orig_w)) if orig_w > 0 else 0
+    if mode == RATIO_HEIGHT:
+        return int(orig_w * (val / orig_h)) if orig_h > 0 else 0, val
+    if mode in POT_FUNCTIONS:
+        # Chaque côté indépendamment (textures non carrées autorisées)
+        snap = POT_FUNCTIONS[mode]
+        return (snap(orig_w), snap(orig_h)) if orig_w > 0 and orig_h > 0 else (0, 0)
+    if mode == MAX_DIMENSION:
+        # Plafond sur le plus grand côté, jamais d'agrandissement
+        largest = max(orig_w, orig_h)
+        if largest <= val:
+            return orig_w, orig_h
+        scale = val / largest
+        return max(int(orig_w * scale), 1), max(int(orig_h * scale), 1)
+    return 0, 0
+
+
+def scale_image(image, width, height, settings):
+    """Redimensionne une QImage avec le filtre choisi (lissage Qt ou numpy)"""
+    if uses_numpy(settings):
+        return resample_image(image, width, height, settings['resampler'], settings.get('linear_light', True))
+    return image.scaled(width, height, Qt.AspectRatioMode.IgnoreAspectRatio,
+                        Qt.TransformationMode.SmoothTransformation)
+
+
+def streaming_kernel(settings):
+    """(noyau, support) du chemin en flux : filtre numpy choisi, sinon triangle"""
+    return KERNELS[settings['resampler']] if uses_numpy(settings) else (None, None)
+
+
+def mip_sizes(width, height):
+    """Dimensions des niveaux 1..n de la chaîne de mipmaps (jusqu'à 1x1)"""
+    sizes = []
+    while width > 1 or height > 1:
+        width, height = max(width // 2, 1), max(height // 2, 1)
+        sizes.append((width, height))
+    return sizes
+
+
+def mip_path(save_path, level):
+    """Chemin du niveau de mip : texture_mip1.png, texture_mip2.png..."""
+    stem, ext = os.path.splitext(save_path)
+    return f"{stem}_mip{level}{ext}"
+
+
+def write_mip_chain(save_path, width, height, settings, image=None, quality=None):
+    """Écrit les niveaux 1..n, chacun réduit de moitié depuis le précédent
+    (coût total ~1/3 d'un redimensionnement). image : niveau 0 en mémoire,
+    None s'il a été écrit en flux (les niveaux encore trop gros le sont aussi).
+    quality : qualité retenue pour le niveau 0, réutilisée sans nouvelle recherche.
+    Retourne le total d'octets écrits"""
+    written = 0
+    previous_path = save_path
+    previous_size = (width, height)
+    for level, (w, h) in enumerate(mip_sizes(width, height), 1):
+        path = mip_path(save_path, level)
+        if image is None:
+            if previous_size[0] * previous_size[1] * 4 > STREAMING_THRESHOLD:
+                with atomic_output(path) as tmp_path:
+                    streaming_resize(previous_path, tmp_path, w, h, settings['png_compression'], settings['strip_alpha'],
+                                     *streaming_kernel(settings))
+                previous_path, previous_size = path, (w, h)
+                written += os.path.getsize(path)
+                continue
+            image = QImage(previous_path)
+            if image.isNull():
+                raise ValueError(f"Relecture impossible : {previous_path}")
+        image = scale_image(image, w, h, settings)
+        save_image(image, path, settings, quality)
+        written += os.path.getsize(path)
+    return written
+
+
+def job_memory(job):
+    """Empreinte mémoire estimée d'un job : source + destination décodées (32 bits),
+    ou fenêtre de lignes si l'image passera par le chemin en flux.
+    Utilise job['width'] / job['height'] si connus (> 0 ; -1 = pas encore
+    lu au parcours), sinon l'en-tête du fichier"""
+    width, height = job.get('width'), job.get('height')
+    info = None
+    if (width or 0) <= 0 or (height or 0) <= 0:
+        info = read_image_info(job['path'])
+        if not info:
+            return 0
+        width, height = info['width'], info['height']
+    new_w, new_h = target_size(width, height, job['settings'])
+    new_w, new_h = max(new_w, 0), max(new_h, 0)
+
+    if width * height * 4 > STREAMING_THRESHOLD:
+        info = info or read_image_info(job['path'])
+        if should_stream(info, job['save_path']):
+            return streaming_memory(width, height, new_w, new_h, info['bit_depth'])
+    if uses_numpy(job['settings']):
+        return resample_memory(width, height, new_w, new_h) + (new_w * new_h * 4 // 2 if job['settings'].get('mipmaps') else 0)
+    return (width * height + new_w * new_h) * 4 + (new_w * new_h * 4 // 2 if job['settings'].get('mipmaps') else 0)
+
+
+def resize_file(path, save_path, settings):
+    """Charge, redimensionne et sauvegarde une image.
+    Retourne un dict résultat (jamais d'exception : l'erreur est dans 'error')"""
+    result = {'path': path, 'save_path': save_path, 'ok': False, 'error': None,
+              'bytes_in': 0, 'bytes_out': 0, 'streamed': False}
+    try:
+        if not os.path.exists(path):
+            result['error'] = "Fichier introuvable"
+            return result
+        result['bytes_in'] = os.path.getsize(path)
+
+        # Très gros PNG : décodage par bandes, la source n'est jamais entière en mémoire
+        info = read_image_info(path)
+        if should_stream(info, save_path):
+            new_w, new_h = target_size(info['width'], info['height'], settings)
+            if new_w <= 0 or new_h <= 0:
+                result['error'] = f"Dimensions invalides ({new_w}x{new_h})"
+                return result
+            # Fichier temporaire : en écrasement, la source est lue pendant l'écriture
+            with atomic_output(save_path) as tmp_path:
+                streaming_resize(path, tmp_path, new_w, new_h, settings['png_compression'], settings['strip_alpha'],
+                                 *streaming_kernel(settings))
+            result['bytes_out'] = os.path.getsize(save_path)
+            if settings.get('mipmaps'):
+                result['bytes_out'] += write_mip_chain(save_path, new_w, new_h, settings)
+            result['ok'] = result['streamed'] = True
+            return result
+
+        image = QImage(path)
+        if image.isNull():
+            result['error'] = "Lecture impossible"
+            return result
+
+        new_w, new_h = target_size(image.width(), image.height(), settings)
+        if new_w <= 0 or new_h <= 0:
+            result['error'] = f"Dimensions invalides ({new_w}x{new_h})"
+            return result
+
+        scaled = scale_image(image, new_w, new_h, settings)
+        del image  # Libérer la source avant l'encodage
+        result['quality'] = save_image(scaled, save_path, settings)
+
+        result['bytes_out'] = os.path.getsize(save_path)
+        if settings.get('mipmaps'):
+            result['bytes_out'] += write_mip_chain(save_path, new_w, new_h, settings, scaled, result['quality'])
+        result['ok'] = True
+    except Exception as e:
+        result['error'] = str(e)
+    return result
+
+
+def process_resize(path, save_path, settings):
+    """resize_file, dans un processus de travail pour les filtres numpy
+    (le calcul n'est plus limité par le GIL des threads du pool)"""
+    if uses_numpy(settings):
+        return run_in_process(resize_file, path, save_path, settings)
+    return resize_file(path, save_path, settings)
+
+
+def resize_job(job):
+    """Traitement par défaut d'un job : redimensionnement"""
+    return process_resize(job['path'], job['save_path'], job['settings'])
+
+
+class _ResizeTask(QRunnable):
+    def __init__(self, engine, job):
+        super().__init__()
+        self.engine = engine
+        self.job = job
+
+    def run(self):
+        # Toujours un résultat : sans lui, le job resterait en vol avec sa part du budget
+        try:
+            result = self.job.get('worker', resize_job)(self.job)
+        except Exception as e:  # Pool de processus cassé, MemoryError, fichier corrompu...
+            result = {'path': self.job['path'], 'save_path': self.job.get('save_path'), 'ok': False,
+                      'error': str(e) or type(e).__name__, 'bytes_in': 0, 'bytes_out': 0, 'streamed': False}
+        result['memory'] = self.job['memory']
+        self.engine._job_done.emit(result)
+
+
+class BatchResizeEngine(QObject):
+    """Exécute une liste de jobs {path, save_path, settings[, width, height,
+    memory, worker]} en parallèle. worker(job) -> dict résultat remplace le
+    redimensionnement (ex. recompression PNG) ; memory remplace l'estimation.
+
+    Les jobs sont soumis au pool au fil de l'eau : au plus max_workers en vol
+    et une empreinte décodée cumulée sous memory_budget. Un job qui ne tient
+    pas laisse passer les petits derrière lui (fenêtre LOOKAHEAD), puis, après
+    MAX_BYPASS dépassements, bloque l'admission jusqu'à ce qu'il tienne ; un
+    job plus gros que le budget entier passe seul. reserve()/release()
+    comptent dans ce budget le travail fait hors lot (estimations de poids).
+    Pause et annulation
+    arrêtent simplement l'alimentation, les images en cours se terminent.
+    Les signaux sont émis dans le thread de l'objet (GUI).
+    """
+    progress = pyqtSignal(int, int)      # terminés, total
+    job_finished = pyqtSignal(object)    # dict résultat de resize_file
+    finished = pyqtSignal(object)        # résumé du lot
+
+    _job_done = pyqtSignal(object)
+
+    def __init__(self, max_workers=None, memory_budget=DEFAULT_MEMORY_BUDGET, parent=None):
+        super().__init__(parent)
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(max_workers or QThreadPool.globalInstance().maxThreadCount())
+        self.memory_budget = memory_budget
+        self._queue = deque()
+        self._in_flight = 0
+        self._memory_in_use = 0
+        self._reserved = 0  # Réservations hors lot (reserve/release)
+        self._peak_memory = 0
+        self._bypassed = 0
+        self._total = 0
+        self._done = 0
+        self._errors = []
+        self._skipped = 0
+        self._bytes_in = 0
+        self._bytes_out = 0
+        self._started_at = 0.0
+        self._running = False
+        self._paused = False
+        self._cancelled = False
+        self._job_done.connect(self._on_job_done)
+
+    @property
+    def max_workers(self):
+        return self.pool.maxThreadCount()
+
+    def is_running(self):
+        return self._running
+
+    def is_paused(self):
+        return self._paused
+
+    def start(self, jobs):
+        if self._running:
+            raise RuntimeError("Un lot est déjà en cours")
+        self._queue = deque(jobs)
+        for job in self._queue:
+            if 'memory' not in job:
+                job['memory'] = job_memory(job)
+        self._total = len(self._queue)
+        self._memory_in_use = 0
+        self._peak_memory = 0
+        self._bypassed = 0
+        self._done = 0
+        self._errors = []
+        self._skipped = 0
+        self._bytes_in = 0
+        self._bytes_out = 0
+        self._started_at = time.perf_counter()
+        self._running = True
+        self._paused = False
+        self._cancelled = False
+        self.progress.emit(0, self._total)
+        self._pump()
+
+    def pause(self):
+        self._paused = True
+
+    def resume(self):
+        if not self._paused:
+            return
+        self._paused = False
+        self._pump()
+
+    def cancel(self):
+        """Abandonne les jobs non commencés ; le lot se termine avec les jobs en cours"""
+        self._cancelled = True
+        self._queue.clear()
+        self._finish_if_idle()
+
+    def wait(self):
+        """Bloque jusqu'à la fin des jobs en vol (fermeture de l'application)"""
+        self.pool.waitForDone()
+
+    def memory_in_use(self):
+        """Empreinte estimée des jobs en vol et des réservations (octets)"""
+        return self._memory_in_use + self._reserved
+
+    def reserve(self, memory):
+        """Réserve memory octets du budget pour un travail hors lot ; False si
+        le lot en cours et les autres réservations ne laissent pas la place"""
+        if (self._in_flight or self._reserved) and self.memory_in_use() + memory > self.memory_budget:
+            return False
+        self._reserved += memory
+        return True
+
+    def release(self, memory):
+        """Rend une réservation ; les jobs en attente de place sont relancés"""
+        self._reserved -= memory
+        self._pump()
+
+    def throughput(self):
+        """Images traitées par seconde depuis le début du lot"""
+        elapsed = time.perf_counter() - self._started_at
+        return self._done / elapsed if elapsed > 0 else 0.0
+
+    def _fits(self, job):
+        return self._in_flight == 0 or self.memory_in_use() + job['memory'] <= self.memory_budget
+
+    def _next_job(self):
+        """Premier job admissible ; None si rien ne tient dans le budget restant"""
+        if self._fits(self._queue[0]):
+            self._bypassed = 0
+            return self._queue.popleft()
+        if self._bypassed >= MAX_BYPASS:
+            return None  # Réserver la place au job en tête
+        for index in range(1, min(len(self._queue), LOOKAHEAD)):
+            job = self._queue[index]
+            if self._fits(job):
+                del self._queue[index]
+                self._bypassed += 1
+                return job
+        return None
+
+    def _pump(self):
+        while self._queue and not self._paused and self._in_flight < self.max_workers:
+            job = self._next_job()
+            if job is None:
+                break
+            self._in_flight += 1
+            self._memory_in_use += job['memory']
+            self._peak_memory = max(self._peak_memory, self.memory_in_use())
+            self.pool.start(_ResizeTask(self, job))
+        self._finish_if_idle()
+
+    def _on_job_done(self, result):
+        self._in_flight -= 1
+        self._memory_in_use -= result['memory']
+        self._done += 1
+        self._bytes_in += result['bytes_in']
+        self._bytes_out += result['bytes_out']
+        if not result['ok']:
+            self._errors.append(result)
+        if result.get('skipped'):
+            self._skipped += 1
+        self.job_finished.emit(result)
+        self.progress.emit(self._done, self._total)
+        self._pump()
+
+    def _finish_if_idle(self):
+        if not self._running or self._in_flight or (self._queue and not self._cancelled):
+            return
+        self._running = False
+        self.finished.emit({
+            'total': self._total,
+            'done': self._done,
+            'success': self._done - len(self._errors),
+            'skipped': self._skipped,
+            'errors': list(self._errors),
+            'cancelled': self._cancelled,
+            'bytes_in': self._bytes_in,
+            'bytes_out': self._bytes_out,
+            'elapsed': time.perf_counter() - self._started_at,
+            'peak_memory': self._peak_memory,
+        })
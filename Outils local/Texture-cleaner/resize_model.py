@@ -0,0 +1,369 @@
+"""
+Modèle du tableau de l'onglet Resize
+Données par ligne dans des tableaux numpy compacts (dimensions, poids, état,
+prévisions) ; réglages partagés sous forme de profils indexés. Les prévisions
+sont recalculées par lots vectorisés, seulement pour les lignes concernées
+"""
+
+import os
+import numpy as np
+from PyQt6.QtCore import Qt, QAbstractTableModel, QModelIndex
+from PyQt6.QtGui import QColor
+
+from resize_engine import (
+    DEFAULT_RESIZE_SETTINGS, RATIO_PERCENT, RATIO_WIDTH, RATIO_HEIGHT,
+    POT_NEAREST, POT_FLOOR, POT_CEIL, MAX_DIMENSION,
+)
+from output_encoding import LOSSY_FORMATS, OPTIMIZE_TARGET_SIZE, output_path, write_quality
+from size_estimator import SizeEstimator, output_format
+
+COL_NAME = 0
+COL_DIMENSIONS = 1
+COL_SIZE = 2
+HEADERS = ["Fichier", "Dimensions (Av. > Ap.)", "Poids (Av. > Ap.)"]
+
+# Origine du poids prévu
+ESTIMATE_NONE = 0          # Pas encore calculé
+ESTIMATE_PROPORTIONAL = 1  # Proportionnel aux pixels (~)
+ESTIMATE_ENCODED = 2       # Encodage d'essai (≈)
+
+REDUCED_COLOR = QColor(Qt.GlobalColor.green)
+DEFAULT_COLOR = QColor(Qt.GlobalColor.white)
+
+
+def _pot_floor(sizes):
+    """Plus grande puissance de deux <= size (vectorisé, exact sur entiers)"""
+    _, exponent = np.frexp(np.maximum(sizes, 1).astype(np.float64))
+    return np.left_shift(1, exponent - 1).astype(np.int64)
+
+
+def _pot_ceil(sizes):
+    _, exponent = np.frexp((np.maximum(sizes, 1) - 1).astype(np.float64))
+    return np.left_shift(1, exponent).astype(np.int64)
+
+
+def _pot_nearest(sizes):
+    lower, upper = _pot_floor(sizes), _pot_ceil(sizes)
+    return np.where(sizes - lower < upper - sizes, lower, upper)
+
+
+_POT = {POT_NEAREST: _pot_nearest, POT_FLOOR: _pot_floor, POT_CEIL: _pot_ceil}
+
+
+def target_sizes(widths, heights, settings):
+    """Version vectorisée de resize_engine.target_size (mêmes arrondis)"""
+    widths = widths.astype(np.int64)
+    heights = heights.astype(np.int64)
+    zeros = np.zeros_like(widths)
+    if not settings['is_ratio']:
+        return zeros + settings['fixed_width'], zeros + settings['fixed_height']
+
+    val = settings['value']
+    mode = settings['ratio_mode']
+    valid = (widths > 0) & (heights > 0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        if mode == RATIO_PERCENT:
+            scale = val / 100.0
+            return (widths * scale).astype(np.int64), (heights * scale).astype(np.int64)
+        if mode == RATIO_WIDTH:
+            return zeros + val, np.where(widths > 0, heights * (val / np.maximum(widths, 1)), 0).astype(np.int64)
+        if mode == RATIO_HEIGHT:
+            return np.where(heights > 0, widths * (val / np.maximum(heights, 1)), 0).astype(np.int64), zeros + val
+        if mode in _POT:
+            snap = _POT[mode]
+            return np.where(valid, snap(widths), 0), np.where(valid, snap(heights), 0)
+        if mode == MAX_DIMENSION:
+            largest = np.maximum(widths, heights)
+            scale = val / np.maximum(largest, 1)
+            keep = largest <= val
+            return (np.where(keep, widths, np.maximum((widths * scale).astype(np.int64), 1)),
+                    np.where(keep, heights, np.maximum((heights * scale).astype(np.int64), 1)))
+    return zeros, zeros
+
+
+def _runs(rows):
+    """Plages [début, fin] de lignes consécutives (lignes triées)"""
+    if not len(rows):
+        return []
+    breaks = np.flatnonzero(np.diff(rows) != 1)
+    starts = np.concatenate(([rows[0]], rows[breaks + 1]))
+    ends = np.concatenate((rows[breaks], [rows[-1]]))
+    return list(zip(starts.tolist(), ends.tolist()))
+
+
+class ResizeTableModel(QAbstractTableModel):
+    """Fichiers de l'onglet Resize.
+
+    Réglages : self.profiles (liste de dicts distincts) et un index de
+    profil par ligne ; profil 0 = DEFAULT_RESIZE_SETTINGS. update_preview()
+    recalcule dimensions cibles (vectorisé par profil) et poids prévus des
+    lignes demandées puis n'émet dataChanged que pour celles-ci.
+    """
+
+    def __init__(self, format_size, parent=None):
+        super().__init__(parent)
+        self.format_size = format_size
+        self._set_arrays([], [], [], [], True)
+
+    def _set_arrays(self, paths, widths, heights, sizes, checked):
+        count = len(paths)
+        self.paths = list(paths)
+        self.names = [os.path.basename(path) for path in self.paths]
+        self._extensions = []  # Extensions distinctes (minuscules), indexées par self.extension
+        self._extension_codes = {}
+        self.extension = self._extension_array(self.paths)
+        self.widths = np.asarray(widths, dtype=np.int32).reshape(count)
+        self.heights = np.asarray(heights, dtype=np.int32).reshape(count)
+        self.file_sizes = np.asarray(sizes, dtype=np.int64).reshape(count)
+        self.checked = np.full(count, checked, dtype=bool)
+        self.profile = np.zeros(count, dtype=np.int32)
+        self.new_widths = np.zeros(count, dtype=np.int32)
+        self.new_heights = np.zeros(count, dtype=np.int32)
+        self.estimates = np.zeros(count, dtype=np.float64)
+        self.estimate_kind = np.zeros(count, dtype=np.int8)
+        self.profiles = [dict(DEFAULT_RESIZE_SETTINGS)]
+        self._profile_keys = {self._profile_key(self.profiles[0]): 0}
+        self._rows_by_path = {path: row for row, path in enumerate(self.paths)}
+
+    def _extension_array(self, paths):
+        """Index d'extension par chemin (le format de sortie n'en dépend que)"""
+        codes = self._extension_codes
+        for path in paths:
+            ext = os.path.splitext(path)[1].lower()
+            if ext not in codes:
+                codes[ext] = len(self._extensions)
+                self._extensions.append(ext)
+        return np.fromiter((codes[os.path.splitext(path)[1].lower()] for path in paths),
+                           dtype=np.int32, count=len(paths))
+
+    # --- Contenu ---
+
+    def set_files(self, paths, widths, heights, sizes, checked=True):
+        self.beginResetModel()
+        self._set_arrays(paths, widths, heights, sizes, checked)
+        self.endResetModel()
+
+    def append_rows(self, paths, widths, heights, sizes, checked=True):
+        """Ajoute des lignes en fin (remplissage progressif).
+        Dimension négative = pas encore connue (voir set_dimensions)"""
+        count = len(paths)
+        if not count:
+            return
+        first = len(self.paths)
+        self.beginInsertRows(QModelIndex(), first, first + count - 1)
+        self.paths.extend(paths)
+        self.names.extend(os.path.basename(path) for path in paths)
+        sizes = np.asarray(sizes, dtype=np.int64)
+        for name, values in (('extension', self._extension_array(paths)),
+                             ('widths', np.asarray(widths, dtype=np.int32)),
+                             ('heights', np.asarray(heights, dtype=np.int32)),
+                             ('file_sizes', sizes),
+                             ('checked', np.full(count, checked, dtype=bool)),
+                             ('profile', np.zeros(count, dtype=np.int32)),
+                             ('new_widths', np.zeros(count, dtype=np.int32)),
+                             ('new_heights', np.zeros(count, dtype=np.int32)),
+                             ('estimates', sizes.astype(np.float64)),  # En attendant la prévision
+                             ('estimate_kind', np.zeros(count, dtype=np.int8))):
+            setattr(self, name, np.concatenate((getattr(self, name), values)))
+        for row, path in enumerate(paths, first):
+            self._rows_by_path[path] = row
+        self.endInsertRows()
+
+    def set_dimensions(self, paths, widths, heights):
+        """Complète les dimensions lues en arrière-plan ; retourne les lignes touchées"""
+        rows = []
+        for path, width, height in zip(paths, widths, heights):
+            row = self._rows_by_path.get(path)
+            if row is not None:
+                self.widths[row] = width
+                self.heights[row] = height
+                rows.append(row)
+        rows.sort()
+        for first, last in _runs(np.asarray(rows, dtype=np.int64)):
+            self.dataChanged.emit(self.index(first, COL_DIMENSIONS), self.index(last, COL_DIMENSIONS),
+                                  [Qt.ItemDataRole.DisplayRole])
+        return rows
+
+    def path(self, row):
+        return self.paths[row]
+
+    def row_for_path(self, path):
+        return self._rows_by_path.get(path)
+
+    def settings(self, row):
+        """Réglages complets de la ligne (copie)"""
+        return dict(self.profiles[self.profile[row]])
+
+    @staticmethod
+    def _profile_key(settings):
+        return tuple(sorted(settings.items()))
+
+    def set_settings(self, rows, settings):
+        """Assigne des réglages (complétés par les défauts) aux lignes"""
+        settings = dict(DEFAULT_RESIZE_SETTINGS, **settings)
+        key = self._profile_key(settings)
+        index = self._profile_keys.get(key)
+        if index is None:
+            index = len(self.profiles)
+            self.profiles.append(settings)
+            self._profile_keys[key] = index
+        self.profile[np.asarray(rows, dtype=np.int64)] = index
+
+    def checked_rows(self):
+        return np.flatnonzero(self.checked).tolist()
+
+    def set_all_checked(self, checked):
+        if not len(self.checked):
+            return
+        self.checked[:] = checked
+        self.dataChanged.emit(self.index(0, COL_NAME), self.index(len(self.checked) - 1, COL_NAME),
+                              [Qt.ItemDataRole.CheckStateRole])
+
+    def totals(self):
+        """(poids d'origine, poids prévu) sur toutes les lignes"""
+        return int(self.file_sizes.sum()), float(self.estimates.sum())
+
+    # --- Prévisions ---
+
+    def update_preview(self, estimator, rows=None):
+        """Recalcule les prévisions des lignes (toutes si None).
+        Retourne le nombre d'estimations demandées à l'estimateur"""
+        rows = np.arange(len(self.paths)) if rows is None else np.unique(np.asarray(rows, dtype=np.int64))
+        rows = rows[self.widths[rows] >= 0]  # Dimensions encore inconnues : plus tard
+        if not len(rows):
+            return 0
+        pending = 0
+        profiles = self.profile[rows]
+        for index in np.unique(profiles):
+            settings = self.profiles[index]
+            group = rows[profiles == index]
+            widths, heights = self.widths[group], self.heights[group]
+            new_w, new_h = target_sizes(widths, heights, settings)
+            self.new_widths[group] = new_w
+            self.new_heights[group] = new_h
+
+            # Repli proportionnel aux pixels, remplacé par l'estimation si connue
+            pixels = widths.astype(np.float64) * heights
+            sizes = self.file_sizes[group].astype(np.float64)
+            estimates = np.where(pixels > 0, sizes * (new_w * new_h) / np.maximum(pixels, 1), sizes)
+            kinds = np.full(len(group), ESTIMATE_PROPORTIONAL, dtype=np.int8)
+
+            # Format et qualité par extension, puis clés construites colonne par colonne
+            formats = [output_format(output_path('_' + ext, settings['format'])) for ext in self._extensions]
+            qualities = [write_quality(fmt, settings) for fmt in formats]
+            positions = np.flatnonzero((new_w > 0) & (new_h > 0))
+            valid_rows = group[positions]
+            codes = self.extension[valid_rows]
+            keys = SizeEstimator.make_keys([self.paths[row] for row in valid_rows.tolist()],
+                                           self.file_sizes[valid_rows].tolist(),
+                                           new_w[positions].tolist(), new_h[positions].tolist(),
+                                           [formats[code] for code in codes.tolist()],
+                                           [qualities[code] for code in codes.tolist()],
+                                           settings['strip_alpha'])
+            cached = np.array([estimator.cached(key) for key in keys], dtype=np.float64)  # NaN : absente
+            known = ~np.isnan(cached)
+            pending += sum(estimator.request(keys[index]) for index in np.flatnonzero(~known).tolist())
+            if settings['optimize'] == OPTIMIZE_TARGET_SIZE:
+                lossy = np.array([fmt in LOSSY_FORMATS for fmt in formats], dtype=bool)[codes]
+                cached = np.where(lossy, np.minimum(cached, settings['target_kb'] * 1024), cached)
+            estimates[positions[known]] = cached[known]
+            kinds[positions[known]] = ESTIMATE_ENCODED
+
+            if settings['mipmaps']:
+                estimates *= 4 / 3  # Chaîne complète : 1 + 1/4 + 1/16 + ... du niveau 0
+            self.estimates[group] = estimates
+            self.estimate_kind[group] = kinds
+
+        for first, last in _runs(rows):
+            self.dataChanged.emit(self.index(first, COL_DIMENSIONS), self.index(last, COL_SIZE),
+                                  [Qt.ItemDataRole.DisplayRole, Qt.ItemDataRole.ForegroundRole])
+        return pending
+
+    def rows_for_paths(self, paths):
+        return [self._rows_by_path[path] for path in paths if path in self._rows_by_path]
+
+    # --- QAbstractTableModel ---
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.paths)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(HEADERS)
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if orientation == Qt.Orientation.Horizontal and role == Qt.ItemDataRole.DisplayRole:
+            return HEADERS[section]
+        return None
+
+    def flags(self, index):
+        flags = super().flags(index)
+        if index.column() == COL_NAME:
+            flags |= Qt.ItemFlag.ItemIsUserCheckable
+        return flags
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        row, column = index.row(), index.column()
+        if role == Qt.ItemDataRole.DisplayRole:
+            if column == COL_NAME:
+                return self.names[row]
+            computed = self.estimate_kind[row] != ESTIMATE_NONE
+            if column == COL_DIMENSIONS:
+                if self.widths[row] < 0:
+                    return "…"
+                text = f"{self.widths[row]}x{self.heights[row]}"
+                if not computed:
+                    return text + " px"
+                mips = " +mips" if self.profiles[self.profile[row]]['mipmaps'] else ""
+                return f"{text} ➜ {self.new_widths[row]}x{self.new_heights[row]}{mips}"
+            if column == COL_SIZE:
+                text = self.format_size(int(self.file_sizes[row]))
+                if not computed:
+                    return text
+                approx = "≈" if self.estimate_kind[row] == ESTIMATE_ENCODED else "~"
+                return f"{text} ➜ {approx}{self.format_size(self.estimates[row])}"
+        elif role == Qt.ItemDataRole.CheckStateRole and column == COL_NAME:
+            return Qt.CheckState.Checked if self.checked[row] else Qt.CheckState.Unchecked
+        elif role == Qt.ItemDataRole.ForegroundRole and column != COL_NAME:
+            if self.estimate_kind[row] != ESTIMATE_NONE and self.estimates[row] < self.file_sizes[row]:
+                return REDUCED_COLOR
+            return DEFAULT_COLOR
+        elif role == Qt.ItemDataRole.ToolTipRole and column == COL_NAME:
+            return self.paths[row]
+        return None
+
+    def setData(self, index, value, role=Qt.ItemDataRole.EditRole):
+        if role == Qt.ItemDataRole.CheckStateRole and index.column() == COL_NAME:
+            self.checked[index.row()] = Qt.CheckState(value) == Qt.CheckState.Checked
+            self.dataChanged.emit(index, index, [role])
+            return True
+        return False
+
+    def sort(self, column, order=Qt.SortOrder.AscendingOrder):
+        """Tri stable : nom (insensible à la casse), pixels, poids d'origine"""
+        if not self.paths:
+            return
+        if column == COL_NAME:
+            order_rows = np.array(sorted(range(len(self.names)), key=lambda row: self.names[row].lower()), dtype=np.int64)
+        elif column == COL_DIMENSIONS:
+            order_rows = np.argsort(self.widths.astype(np.int64) * self.heights, kind='stable')
+        else:
+            order_rows = np.argsort(self.file_sizes, kind='stable')
+        if order == Qt.SortOrder.DescendingOrder:
+            order_rows = order_rows[::-1]
+
+        self.layoutAboutToBeChanged.emit()
+        new_row = np.empty_like(order_rows)
+        new_row[order_rows] = np.arange(len(order_rows))
+        self.paths = [self.paths[row] for row in order_rows]
+        self.names = [self.names[row] for row in order_rows]
+        for name in ('extension', 'widths', 'heights', 'file_sizes', 'checked', 'profile',
+                     'new_widths', 'new_heights', 'estimates', 'estimate_kind'):
+            setattr(self, name, getattr(self, name)[order_rows])
+        self._rows_by_path = {path: row for row, path in enumerate(self.paths)}
+        # Sélection et index persistants suivent leurs lignes
+        old_indexes = self.persistentIndexList()
+        self.changePersistentIndexList(old_indexes, [
+            self.index(int(new_row[index.row()]), index.column()) for index in old_indexes])
+        self.layoutChanged.emit()
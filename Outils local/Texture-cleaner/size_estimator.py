@@ -0,0 +1,306 @@
+"""
+Estimation du poids de sortie par encodage d'essai
+Encode l'image (ou quelques tuiles) à la taille et au format cibles et extrapole ;
+la source n'est jamais décodée entière au-delà de CHEAP_DECODE_BYTES
+"""
+
+import os
+from collections import OrderedDict
+from PyQt6.QtCore import Qt, QObject, QRunnable, QThreadPool, QByteArray, QBuffer, QIODevice, QRect, QSize, pyqtSignal
+from PyQt6.QtGui import QImage, QImageReader, QImageIOHandler, QPainter
+
+from streaming_resize import STRIP_ROWS, PngStripReader
+
+SAMPLE_PIXELS = 512 * 512   # En dessous : l'image cible entière est encodée (poids exact)
+SAMPLE_TILE = 256           # Au-dessus : tuiles de cette taille, grille SAMPLE_GRID x SAMPLE_GRID
+SAMPLE_GRID = 3
+CHEAP_DECODE_BYTES = 16 * 1024 * 1024   # Source décodée entière au plus ; au-delà, échantillon réduit
+ESTIMATE_MEMORY = 3 * CHEAP_DECODE_BYTES  # Réservé dans le budget du lot par estimation en cours
+
+
+def output_format(save_path):
+    """Format d'écriture Qt déduit de l'extension ('jpg', 'png', 'webp'...)"""
+    return os.path.splitext(save_path)[1][1:].lower() or 'png'
+
+
+def encode_image(image, fmt, quality=-1):
+    """Encode un QImage en mémoire ; retourne les octets ou None si le format
+    n'est pas inscriptible"""
+    data = QByteArray()
+    buffer = QBuffer(data)
+    buffer.open(QIODevice.OpenModeFlag.WriteOnly)
+    ok = image.save(buffer, fmt, quality)
+    buffer.close()
+    return bytes(data) if ok else None
+
+
+def load_at_size(path, width, height):
+    """Décode l'image directement à la taille cible si le format le permet"""
+    reader = QImageReader(path)
+    if reader.supportsOption(QImageIOHandler.ImageOption.ScaledSize):
+        reader.setScaledSize(QSize(width, height))
+        return reader.read()
+    image = reader.read()
+    return image if image.isNull() else _scaled(image, width, height)
+
+
+def _scaled(image, width, height):
+    return image.scaled(width, height, Qt.AspectRatioMode.IgnoreAspectRatio,
+                        Qt.TransformationMode.SmoothTransformation)
+
+
+def _grid_rects(width, height):
+    """Tuiles SAMPLE_TILE réparties en grille SAMPLE_GRID sur l'image cible"""
+    tile_w, tile_h = min(SAMPLE_TILE, width), min(SAMPLE_TILE, height)
+    step = max(SAMPLE_GRID - 1, 1)
+    return [((width - tile_w) * col // step, (height - tile_h) * row // step, tile_w, tile_h)
+            for row in range(SAMPLE_GRID) for col in range(SAMPLE_GRID)]
+
+
+def _source_rect(rect, scale_x, scale_y, source):
+    """Zone source (QRect) correspondant à une tuile cible"""
+    x, y, w, h = rect
+    left, top = int(x * scale_x), int(y * scale_y)
+    right = min(max(int(round((x + w) * scale_x)), left + 1), source.width())
+    bottom = min(max(int(round((y + h) * scale_y)), top + 1), source.height())
+    return QRect(left, top, right - left, bottom - top)
+
+
+def _read_band(reader, rows, width, height):
+    """Décode rows lignes depuis la position du lecteur, à l'échelle cible"""
+    start = reader.rows_read
+    rows = min(rows, reader.height - start)
+    band_h = max(1, round(rows * height / reader.height))
+    band = QImage(width, band_h, QImage.Format.Format_ARGB32_Premultiplied)
+    painter = QPainter(band)
+    painter.setRenderHint(QPainter.RenderHint.SmoothPixmapTransform)
+    try:
+        while reader.rows_read < start + rows:
+            first = reader.rows_read - start
+            strip = reader.read_strip_image(min(STRIP_ROWS, rows - first))
+            top = round(first * band_h / rows)
+            bottom = round((reader.rows_read - start) * band_h / rows)
+            if bottom > top:
+                painter.drawImage(QRect(0, top, width, bottom - top), strip)
+    finally:
+        painter.end()
+    return band
+
+
+def _png_bands(path, width, height):
+    """SAMPLE_GRID bandes d'un PNG réparties du haut en bas (au plus
+    CHEAP_DECODE_BYTES décodés en tout), à l'échelle cible. Les lignes entre
+    deux bandes sont décompressées sans être décodées (PngStripReader.skip_rows) ;
+    moins de bandes si le PNG n'offre pas de point de reprise. None si le PNG
+    n'est pas lisible par bandes"""
+    try:
+        reader = PngStripReader(path)
+    except (OSError, ValueError):
+        return None
+    try:
+        rows = max(1, min(reader.height, CHEAP_DECODE_BYTES // (reader.width * 4 * SAMPLE_GRID)))
+        step = max(SAMPLE_GRID - 1, 1)
+        bands = []
+        for index in range(SAMPLE_GRID):
+            start = (reader.height - rows) * index // step
+            if start > reader.rows_read:
+                reader.skip_rows(start - reader.rows_read)
+            if reader.rows_read >= reader.height:
+                break
+            bands.append(_read_band(reader, rows, width, height))
+        return bands
+    except ValueError:
+        return None
+    finally:
+        reader.close()
+
+
+def _samples(path, width, height):
+    """Échantillons de l'image à l'échelle cible, sans décoder plus de
+    CHEAP_DECODE_BYTES de source : tuiles lues par zone si le format sait
+    réduire au décodage, sinon tuiles d'une source petite, sinon bandes
+    réparties d'un PNG. Liste vide si aucun ne s'applique"""
+    reader = QImageReader(path)
+    source = reader.size()
+    if not source.isValid():
+        return []
+    scale_x, scale_y = source.width() / width, source.height() / height
+    rects = _grid_rects(width, height)
+    if (reader.supportsOption(QImageIOHandler.ImageOption.ClipRect)
+            and reader.supportsOption(QImageIOHandler.ImageOption.ScaledSize)):
+        samples = []
+        for rect in rects:
+            tile_reader = QImageReader(path)
+            tile_reader.setClipRect(_source_rect(rect, scale_x, scale_y, source))
+            tile_reader.setScaledSize(QSize(rect[2], rect[3]))
+            samples.append(tile_reader.read())
+        return samples
+    if source.width() * source.height() * 4 <= CHEAP_DECODE_BYTES:
+        image = reader.read()
+        if image.isNull():
+            return []
+        return [_scaled(image.copy(_source_rect(rect, scale_x, scale_y, source)), rect[2], rect[3])
+                for rect in rects]
+    bands = _png_bands(path, width, height)
+    if not bands:
+        return []
+    tile_w = min(SAMPLE_TILE, width)
+    step = max(SAMPLE_GRID - 1, 1)
+    return [band.copy((width - tile_w) * col // step, 0, tile_w, band.height())
+            for band in bands for col in range(SAMPLE_GRID)]
+
+
+def _prepared(image, fmt, strip_alpha):
+    """Alpha supprimé comme à l'écriture (output_encoding.prepare_image)"""
+    if (strip_alpha or fmt in ('jpg', 'jpeg')) and image.hasAlphaChannel():
+        return image.convertToFormat(QImage.Format.Format_RGB32)
+    return image
+
+
+def estimate_output_size(path, width, height, fmt, quality=-1, strip_alpha=False):
+    """Poids estimé (octets) de l'image redimensionnée à width x height et
+    encodée en fmt (sans alpha si strip_alpha) ; None si le décodage ou
+    l'encodage échoue.
+    Petite cible décodable à bas coût : encodage exact. Sinon octets par
+    pixel (hors en-tête) d'échantillons encodés, extrapolés ; à défaut
+    d'échantillon, octets par pixel du fichier source"""
+    reader = QImageReader(path)
+    source = reader.size()
+    if not source.isValid():
+        return None
+    cheap = (reader.supportsOption(QImageIOHandler.ImageOption.ScaledSize)
+             or source.width() * source.height() * 4 <= CHEAP_DECODE_BYTES)
+    if width * height <= SAMPLE_PIXELS and cheap:
+        image = load_at_size(path, width, height)
+        if image.isNull():
+            return None
+        data = encode_image(_prepared(image, fmt, strip_alpha), fmt, quality)
+        return len(data) if data is not None else None
+
+    samples = _samples(path, width, height)
+    if not samples:
+        return int(os.path.getsize(path) / (source.width() * source.height()) * width * height)
+    if any(sample.isNull() for sample in samples):
+        return None
+    samples = [_prepared(sample, fmt, strip_alpha) for sample in samples]
+    header = encode_image(samples[0].copy(0, 0, 1, 1), fmt, quality)
+    if header is None:
+        return None
+    sample_bytes = 0
+    sample_pixels = 0
+    for sample in samples:
+        data = encode_image(sample, fmt, quality)
+        if data is None:
+            return None
+        sample_bytes += max(len(data) - len(header), 0)
+        sample_pixels += sample.width() * sample.height()
+    return len(header) + int(sample_bytes / sample_pixels * width * height)
+
+
+class _EstimateTask(QRunnable):
+    def __init__(self, estimator, key, path, width, height, fmt, quality, strip_alpha):
+        super().__init__()
+        self.estimator = estimator
+        self.args = (key, path, width, height, fmt, quality, strip_alpha)
+
+    def run(self):
+        key, path, width, height, fmt, quality, strip_alpha = self.args
+        try:
+            size = estimate_output_size(path, width, height, fmt, quality, strip_alpha)
+        except Exception as e:
+            print(f"Erreur estimation {path}: {e}")
+            size = None
+        self.estimator._estimated.emit(key, size)
+
+
+class SizeEstimator(QObject):
+    """Estimations de poids en arrière-plan, mises en cache par
+    (fichier, taille, dimensions cibles, format, qualité, suppression de l'alpha).
+
+    request() met la demande en file ; clear_pending() oublie les demandes
+    non commencées (réglages modifiés entre-temps). Le signal estimated(path)
+    est émis dans le thread de l'objet quand une valeur arrive en cache.
+    Avec set_budget(moteur de lot), chaque estimation réserve ESTIMATE_MEMORY
+    dans le budget mémoire du lot et attend qu'il y ait la place.
+    """
+    estimated = pyqtSignal(str)
+
+    _estimated = pyqtSignal(object, object)
+
+    def __init__(self, max_workers=2, max_entries=100000, parent=None):
+        super().__init__(parent)
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(max_workers)
+        self.max_entries = max_entries
+        self._cache = OrderedDict()  # clé -> octets (None = échec)
+        self._pending = OrderedDict()  # clés en attente, dans l'ordre des demandes
+        self._in_flight = set()
+        self._budget = None
+        self._estimated.connect(self._on_estimated)
+
+    def set_budget(self, engine):
+        """Partage le budget mémoire d'un BatchResizeEngine (reserve/release)"""
+        self._budget = engine
+        engine.job_finished.connect(self._pump)
+
+    @staticmethod
+    def make_key(path, file_size, width, height, fmt, quality=-1, strip_alpha=False):
+        """Clé de cache. file_size est celui relevé au listage : un fichier
+        réécrit change de taille et donc de clé, sans stat à chaque aperçu"""
+        return (path, file_size, width, height, fmt, quality, bool(strip_alpha))
+
+    @staticmethod
+    def make_keys(paths, file_sizes, widths, heights, fmts, qualities, strip_alpha=False):
+        """make_key sur des colonnes (listes de même longueur) ; strip_alpha
+        commun à toutes les clés"""
+        return [key + (bool(strip_alpha),) for key in zip(paths, file_sizes, widths, heights, fmts, qualities)]
+
+    def cached(self, key):
+        """Estimation en cache (octets) ou None"""
+        return self._cache.get(key)
+
+    def request(self, key):
+        """Demande une estimation ; retourne False si la clé est déjà résolue
+        (valeur ou échec en cache), True si elle est en attente"""
+        if key in self._cache:
+            return False
+        if key not in self._in_flight and key not in self._pending:
+            self._pending[key] = None
+            self._pump()
+        return True
+
+    def clear_pending(self):
+        self._pending.clear()
+
+    def discard_pending(self, paths):
+        """Oublie les demandes non commencées pour ces fichiers"""
+        for key in [key for key in self._pending if key[0] in paths]:
+            del self._pending[key]
+
+    def pending_count(self):
+        """Estimations en attente ou en cours"""
+        return len(self._pending) + len(self._in_flight)
+
+    def _pump(self):
+        while self._pending and len(self._in_flight) < self.pool.maxThreadCount():
+            if self._budget is not None and not self._budget.reserve(ESTIMATE_MEMORY):
+                break  # Relancé à la fin d'un job du lot
+            key, _ = self._pending.popitem(last=False)
+            path, _, width, height, fmt, quality, strip_alpha = key
+            self._in_flight.add(key)
+            self.pool.start(_EstimateTask(self, key, path, width, height, fmt, quality, strip_alpha))
+
+    def _on_estimated(self, key, size):
+        self._in_flight.discard(key)
+        if self._budget is not None:
+            self._budget.release(ESTIMATE_MEMORY)
+        self._cache[key] = size
+        while len(self._cache) > self.max_entries:
+            self._cache.popitem(last=False)
+        if size is not None:
+            self.estimated.emit(key[0])
+        self._pump()
+
+    def stop(self):
+        self._pending.clear()
+        self.pool.waitForDone()
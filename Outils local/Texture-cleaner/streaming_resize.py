@@ -0,0 +1,493 @@
+"""
+Redimensionnement en flux des PNG trop gros pour la mémoire
+Décodage par bandes de lignes, rééchantillonnage séparable, écriture incrémentale
+"""
+
+import math
+import struct
+import zlib
+import numpy as np
+from PyQt6.QtCore import Qt
+from PyQt6.QtGui import QImage
+
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+STRIP_ROWS = 64                   # Lignes source décodées à la fois
+STREAMING_THRESHOLD = 256 * 1024 * 1024  # Au-delà : flux (c'est aussi la limite d'allocation par défaut de QImageReader)
+IDAT_CHUNK_SIZE = 256 * 1024
+IDAT_READ_SIZE = 64 * 1024       # Octets compressés lus à la fois (un IDAT peut faire tout le fichier)
+CHECKPOINT_ROWS = 512             # Lignes entre deux points de reprise (lecture de zones)
+
+# Canaux PNG pris dans le tableau de travail RGBA, par type de couleur
+PNG_CHANNELS = {0: [0], 2: [0, 1, 2], 3: [0, 1, 2, 3], 4: [0, 3], 6: [0, 1, 2, 3]}
+PNG_SAMPLES = {0: 1, 2: 3, 3: 1, 4: 2, 6: 4}
+
+
+def _chunk(chunk_type, data):
+    return struct.pack('>I', len(data)) + chunk_type + data + struct.pack('>I', zlib.crc32(chunk_type + data))
+
+
+def _read_chunks(f):
+    """Itère (type, données) sur les chunks d'un PNG ouvert après la signature"""
+    while True:
+        header = f.read(8)
+        if len(header) < 8:
+            return
+        length, chunk_type = struct.unpack('>I4s', header)
+        data = f.read(length)
+        f.read(4)  # CRC
+        yield chunk_type, data
+        if chunk_type == b'IEND':
+            return
+
+
+class PngStripReader:
+    """Lit un PNG non entrelacé par bandes de lignes.
+
+    Les IDAT sont lus par morceaux de IDAT_READ_SIZE octets et décompressés
+    au fil de l'eau, quelle que soit leur taille ; chaque bande (lignes encore
+    filtrées) est décodée par Qt sous forme d'un mini PNG dont la première
+    ligne est la dernière ligne brute de la bande précédente, ce qui rend
+    valides les filtres Up/Average/Paeth sans tout décoder.
+    """
+
+    def __init__(self, path):
+        self.file = open(path, 'rb')
+        if self.file.read(8) != PNG_SIGNATURE:
+            self.file.close()
+            raise ValueError("Pas un fichier PNG")
+        chunk_type, ihdr = next(_read_chunks(self.file))
+        if chunk_type != b'IHDR':
+            self.file.close()
+            raise ValueError("IHDR manquant")
+        (self.width, self.height, self.bit_depth, self.color_type,
+         _, _, interlace) = struct.unpack('>IIBBBBB', ihdr)
+        if interlace or self.bit_depth < 8 or self.color_type not in PNG_SAMPLES:
+            self.file.close()
+            raise ValueError("PNG entrelacé ou profondeur < 8 bits : lecture en flux non gérée")
+
+        self.bytes_per_sample = self.bit_depth // 8
+        self.row_bytes = self.width * PNG_SAMPLES[self.color_type] * self.bytes_per_sample
+        self.has_alpha = self.color_type in (3, 4, 6)
+        self._extra_chunks = []  # PLTE / tRNS recopiés dans chaque mini PNG
+        self._decompressor = zlib.decompressobj()
+        self._pending = bytearray()
+        self._input = b''  # Données compressées lues, pas encore décompressées
+        self._idat_left = 0  # Octets du chunk IDAT courant restant à lire dans le fichier
+        self._idat_done = False
+        self._previous_raw = None
+        self.rows_read = 0
+
+        # Chunks avant le premier IDAT (petits) lus entiers ; IDAT : en-tête seul
+        while True:
+            header = self.file.read(8)
+            if len(header) < 8:
+                self.file.close()
+                raise ValueError("IDAT manquant")
+            length, chunk_type = struct.unpack('>I4s', header)
+            if chunk_type == b'IDAT':
+                self._idat_left = length
+                break
+            if chunk_type == b'IEND':
+                self.file.close()
+                raise ValueError("IDAT manquant")
+            data = self.file.read(length)
+            self.file.read(4)  # CRC
+            if chunk_type in (b'PLTE', b'tRNS'):
+                self._extra_chunks.append(_chunk(chunk_type, data))
+            if chunk_type == b'tRNS':
+                self.has_alpha = True
+
+    def close(self):
+        self.file.close()
+
+    def checkpoint(self):
+        """État de lecture courant, restaurable par restore() sur un autre
+        lecteur du même fichier : position dans le fichier et dans le chunk
+        IDAT, copie du décompresseur zlib ; les données compressées non encore
+        consommées sont relues, pas conservées"""
+        return {
+            'offset': self.file.tell() - len(self._input),
+            'decompressor': self._decompressor.copy(),
+            'pending': bytes(self._pending),
+            'idat_left': self._idat_left + len(self._input),
+            'idat_done': self._idat_done,
+            'previous_raw': self._previous_raw,
+            'rows_read': self.rows_read,
+        }
+
+    def restore(self, state):
+        """Reprend la lecture à un point obtenu par checkpoint()"""
+        self.file.seek(state['offset'])
+        self._idat_left = state['idat_left']
+        self._idat_done = state['idat_done']
+        self._decompressor = state['decompressor'].copy()
+        self._pending = bytearray(state['pending'])
+        self._input = b''
+        self._previous_raw = state['previous_raw']
+        self.rows_read = state['rows_read']
+
+    def _read_input(self):
+        """Morceau suivant (au plus IDAT_READ_SIZE octets) des données IDAT,
+        en passant d'un chunk IDAT au suivant ; b'' après le dernier"""
+        while not self._idat_left:
+            if self._idat_done:
+                return b''
+            self.file.read(4)  # CRC du chunk terminé
+            header = self.file.read(8)
+            if len(header) < 8:
+                self._idat_done = True
+                return b''
+            length, chunk_type = struct.unpack('>I4s', header)
+            if chunk_type != b'IDAT':
+                self._idat_done = True
+                return b''
+            self._idat_left = length
+        data = self.file.read(min(self._idat_left, IDAT_READ_SIZE))
+        if not data:
+            raise ValueError("Données PNG tronquées")
+        self._idat_left -= len(data)
+        return data
+
+    def _fill(self, size):
+        """Décompresse jusqu'à disposer de size octets filtrés (ou fin des IDAT).
+        La sortie est bornée à ce qui manque : un morceau très compressible
+        reste en partie compressé (unconsumed_tail) jusqu'à la bande suivante"""
+        while len(self._pending) < size:
+            if not self._input:
+                self._input = self._read_input()
+                if not self._input:
+                    self._pending += self._decompressor.flush()
+                    return
+            self._pending += self._decompressor.decompress(self._input, size - len(self._pending))
+            self._input = self._decompressor.unconsumed_tail
+
+    def skip_rows(self, count):
+        """Avance d'au moins count lignes sans les décoder par Qt. Les filtres
+        None / Sub / Up sont défaits en numpy pour garder la ligne brute
+        précédente ; après un filtre Average ou Paeth, l'arrêt attend une
+        ligne None ou Sub (sans référence à la précédente). Au pire va jusqu'à
+        la fin de l'image ; retourne les lignes sautées"""
+        stride = self.row_bytes + 1
+        pixel_bytes = PNG_SAMPLES[self.color_type] * self.bytes_per_sample
+        previous = None if self._previous_raw is None else np.frombuffer(self._previous_raw, dtype=np.uint8)
+        skipped = 0
+        while self.rows_read < self.height:
+            self._fill(stride)
+            if len(self._pending) < stride:
+                raise ValueError("Données PNG tronquées")
+            row_filter = self._pending[0]
+            if skipped >= count and (previous is not None or row_filter in (0, 1)):
+                break
+            line = np.frombuffer(self._pending, dtype=np.uint8, count=self.row_bytes, offset=1)
+            if row_filter == 0:
+                previous = line.copy()
+            elif row_filter == 1:
+                previous = np.cumsum(line.reshape(-1, pixel_bytes), axis=0, dtype=np.uint8).reshape(-1)
+            elif row_filter == 2 and previous is not None:
+                previous = line + previous
+            else:
+                previous = None
+            del line
+            del self._pending[:stride]
+            self.rows_read += 1
+            skipped += 1
+        self._previous_raw = None if previous is None else previous.tobytes()
+        return skipped
+
+    def read_strip(self, max_rows=STRIP_ROWS):
+        """Retourne la bande suivante en tableau (lignes, largeur, 4) RGBA
+        (uint8 ou uint16), ou None en fin d'image"""
+        decoded = self._decode_strip(max_rows)
+        if decoded is None:
+            return None
+        image, skip = decoded
+        return _image_to_array(image, self.bit_depth)[skip:]
+
+    def read_strip_image(self, max_rows=STRIP_ROWS):
+        """Bande suivante en QImage (format choisi par Qt), ou None en fin d'image"""
+        decoded = self._decode_strip(max_rows)
+        if decoded is None:
+            return None
+        image, skip = decoded
+        return image.copy(0, skip, image.width(), image.height() - skip) if skip else image
+
+    def _decode_strip(self, max_rows):
+        """(QImage de la bande, lignes de tête à ignorer) ou None"""
+        rows = min(max_rows, self.height - self.rows_read)
+        if rows <= 0:
+            return None
+        size = rows * (self.row_bytes + 1)
+        self._fill(size)
+        if len(self._pending) < size:
+            raise ValueError("Données PNG tronquées")
+        filtered = bytes(self._pending[:size])
+        del self._pending[:size]
+
+        # Mini PNG : dernière ligne brute précédente (filtre 0) + lignes filtrées
+        prefix = b'' if self._previous_raw is None else b'\x00' + self._previous_raw
+        skip = 0 if self._previous_raw is None else 1
+        ihdr = struct.pack('>IIBBBBB', self.width, rows + skip, self.bit_depth, self.color_type, 0, 0, 0)
+        png = (PNG_SIGNATURE + _chunk(b'IHDR', ihdr) + b''.join(self._extra_chunks)
+               + _chunk(b'IDAT', zlib.compress(prefix + filtered, 0)) + _chunk(b'IEND', b''))
+        image = QImage.fromData(png, 'PNG')
+        if image.isNull():
+            raise ValueError("Décodage de bande impossible")
+
+        self._previous_raw = self._raw_row(image, rows + skip - 1)
+        self.rows_read += rows
+        return image, skip
+
+    def _raw_row(self, image, y):
+        """Octets bruts (non filtrés) de la ligne y, tels que stockés dans le PNG"""
+        if self.color_type == 3:
+            indexed = image.convertToFormat(QImage.Format.Format_Indexed8) \
+                if image.format() != QImage.Format.Format_Indexed8 else image
+            line = indexed.copy(0, y, self.width, 1)
+            return _image_bytes(line)[0, :self.width].tobytes()
+        row = _image_to_array(image.copy(0, y, self.width, 1), self.bit_depth)[0]
+        samples = row[:, PNG_CHANNELS[self.color_type]]
+        if self.bit_depth == 16:
+            return samples.astype('>u2').tobytes()
+        return samples.astype(np.uint8).tobytes()
+
+
+def _image_bytes(image):
+    """Vue numpy (hauteur, octets par ligne) des pixels d'une QImage"""
+    data = np.frombuffer(image.constBits().asstring(image.sizeInBytes()), dtype=np.uint8)
+    return data.reshape(image.height(), image.bytesPerLine())
+
+
+def _image_to_array(image, bit_depth):
+    """QImage -> tableau (h, w, 4) RGBA non prémultiplié, uint8 ou uint16"""
+    if bit_depth == 16:
+        image = image.convertToFormat(QImage.Format.Format_RGBA64)
+        dtype, sample_bytes = np.uint16, 2
+    else:
+        image = image.convertToFormat(QImage.Format.Format_RGBA8888)
+        dtype, sample_bytes = np.uint8, 1
+    data = _image_bytes(image)[:, :image.width() * 4 * sample_bytes]
+    return np.ascontiguousarray(data).view(dtype).reshape(image.height(), image.width(), 4)
+
+
+def _pixels_view(image):
+    """Vue numpy modifiable (h, w, 4) des pixels d'une QImage 32 bits"""
+    bits = image.bits()
+    bits.setsize(image.sizeInBytes())
+    data = np.frombuffer(bits, dtype=np.uint8).reshape(image.height(), image.bytesPerLine())
+    return data[:, :image.width() * 4].reshape(image.height(), image.width(), 4)
+
+
+def png_proxy(path, factor, checkpoint_rows=CHECKPOINT_ROWS, cancelled=None):
+    """Lit le PNG une seule fois par bandes : image réduite d'un facteur
+    entier (moyenne de Qt sur des bandes alignées sur le facteur) et points
+    de reprise {ligne: état} tous les checkpoint_rows lignes pour png_region.
+    Mémoire : l'image réduite + une bande. cancelled() vrai : None"""
+    reader = PngStripReader(path)
+    try:
+        image = QImage(-(-reader.width // factor), -(-reader.height // factor),
+                       QImage.Format.Format_ARGB32_Premultiplied)
+        if image.isNull():
+            raise MemoryError("Image réduite trop grande")
+        target = _pixels_view(image)
+        checkpoints = {}
+        next_checkpoint = 0
+        rows = factor * max(1, STRIP_ROWS // factor)
+        while reader.rows_read < reader.height:
+            if cancelled is not None and cancelled():
+                return None
+            if checkpoint_rows and reader.rows_read >= next_checkpoint:
+                checkpoints[reader.rows_read] = reader.checkpoint()
+                next_checkpoint = reader.rows_read + checkpoint_rows
+            y = reader.rows_read // factor
+            strip = reader.read_strip_image(rows).convertToFormat(QImage.Format.Format_ARGB32_Premultiplied)
+            reduced = strip.scaled(image.width(), -(-strip.height() // factor), Qt.AspectRatioMode.IgnoreAspectRatio,
+                                   Qt.TransformationMode.SmoothTransformation)
+            target[y:y + reduced.height()] = _pixels_view(reduced)
+        return image, checkpoints
+    finally:
+        reader.close()
+
+
+def png_region(path, checkpoints, x, y, width, height, factor=1):
+    """Zone (x, y, width, height) d'un PNG réduite d'un facteur entier, lue à
+    partir du point de reprise le plus proche au-dessus (voir png_proxy)"""
+    reader = PngStripReader(path)
+    try:
+        start = max((row for row in checkpoints if row <= y), default=None)
+        if start is not None:
+            reader.restore(checkpoints[start])
+        region = QImage(width, height, QImage.Format.Format_ARGB32_Premultiplied)
+        target = _pixels_view(region)
+        while reader.rows_read < y + height:
+            first = reader.rows_read
+            strip = reader.read_strip_image()
+            if strip is None:
+                raise ValueError("Zone hors de l'image")
+            top, bottom = max(y - first, 0), min(y + height - first, strip.height())
+            if top < bottom:
+                part = strip.copy(x, top, width, bottom - top).convertToFormat(QImage.Format.Format_ARGB32_Premultiplied)
+                target[first + top - y:first + bottom - y] = _pixels_view(part)
+        if factor > 1:
+            region = region.scaled(-(-width // factor), -(-height // factor), Qt.AspectRatioMode.IgnoreAspectRatio,
+                                   Qt.TransformationMode.SmoothTransformation)
+        return region
+    finally:
+        reader.close()
+
+
+class PngStreamWriter:
+    """Écrit un PNG ligne par ligne (filtre choisi par ligne parmi None/Sub/Up)"""
+
+    def __init__(self, path, width, height, bit_depth, color_type, compression_level=6):
+        self.file = open(path, 'wb')
+        self.width = width
+        self.height = height
+        self.bit_depth = bit_depth
+        self.color_type = color_type
+        self.bpp = PNG_SAMPLES[color_type] * bit_depth // 8
+        self._compressor = zlib.compressobj(compression_level)
+        self._buffer = bytearray()
+        self._previous = None
+        self.rows_written = 0
+        self.file.write(PNG_SIGNATURE)
+        self.file.write(_chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, bit_depth, color_type, 0, 0, 0)))
+
+    def write_row(self, raw):
+        """raw : octets bruts de la ligne (tableau uint8)"""
+        candidates = [(0, raw)]
+        sub = raw.copy()
+        sub[self.bpp:] -= raw[:-self.bpp]
+        candidates.append((1, sub))
+        if self._previous is not None:
+            candidates.append((2, raw - self._previous))
+        # Heuristique classique : plus petite somme des valeurs signées absolues
+        filter_type, filtered = min(candidates, key=lambda c: int(np.abs(c[1].view(np.int8).astype(np.int32)).sum()))
+        self._buffer += self._compressor.compress(bytes((filter_type,)) + filtered.tobytes())
+        self._previous = raw
+        self.rows_written += 1
+        if len(self._buffer) >= IDAT_CHUNK_SIZE:
+            self._flush_idat()
+
+    def _flush_idat(self):
+        if self._buffer:
+            self.file.write(_chunk(b'IDAT', bytes(self._buffer)))
+            self._buffer.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        # Erreur : fichier simplement fermé (le .partial peut être supprimé, Windows compris)
+        if exc_type is None:
+            self.close()
+        else:
+            self.file.close()
+
+    def close(self):
+        if self.rows_written != self.height:
+            self.file.close()
+            raise ValueError(f"PNG incomplet ({self.rows_written}/{self.height} lignes)")
+        self._buffer += self._compressor.flush()
+        self._flush_idat()
+        self.file.write(_chunk(b'IEND', b''))
+        self.file.close()
+
+
+def _triangle(x):
+    return np.maximum(1.0 - np.abs(x), 0.0)
+
+
+def filter_weights(in_size, out_size, kernel=_triangle, support=1.0):
+    """Indices (out, taps) et poids normalisés d'un filtre séparable.
+    En réduction le noyau est élargi du facteur d'échelle (anti-crénelage)"""
+    scale = in_size / out_size
+    filter_scale = max(scale, 1.0)
+    radius = support * filter_scale
+    centers = (np.arange(out_size) + 0.5) * scale
+    left = np.floor(centers - radius).astype(np.int64)
+    taps = int(math.ceil(2 * radius)) + 1
+    indices = left[:, None] + np.arange(taps)[None, :]
+    weights = kernel((indices + 0.5 - centers[:, None]) / filter_scale)
+    weights /= np.maximum(weights.sum(axis=1, keepdims=True), 1e-12)
+    return np.clip(indices, 0, in_size - 1), weights.astype(np.float32)
+
+
+def streaming_memory(width, height, new_w, new_h, bit_depth=8):
+    """Empreinte estimée du redimensionnement en flux (octets)"""
+    bytes_per_sample = bit_depth // 8
+    strip = STRIP_ROWS * width * 4 * (4 * bytes_per_sample + 8)  # Copies QImage/numpy, float32
+    taps_v = int(math.ceil(2 * max(height / max(new_h, 1), 1.0))) + 1
+    ring = (taps_v + 2 * STRIP_ROWS) * new_w * 4 * 4  # Fenêtre verticale + passe horizontale
+    return strip + ring
+
+
+def can_read_strips(info):
+    """Vrai pour un PNG lisible par bandes (≥ 8 bits, non entrelacé)"""
+    return (info is not None and info['format'] == 'png'
+            and info['bit_depth'] >= 8 and 'Adam7' not in info['compression'])
+
+
+def should_stream(info, save_path):
+    """Vrai si l'image doit passer par le chemin en flux : PNG -> PNG lisible
+    par bandes, source décodée au-delà de STREAMING_THRESHOLD"""
+    return (can_read_strips(info) and save_path.lower().endswith('.png')
+            and info['width'] * info['height'] * 4 > STREAMING_THRESHOLD)
+
+
+def streaming_resize(path, save_path, new_w, new_h, compression_level=6, strip_alpha=False, kernel=None, support=None):
+    """Redimensionne un PNG en ne gardant en mémoire qu'une bande source et
+    la fenêtre de lignes horizontales nécessaire au filtre vertical.
+    kernel / support : noyau séparable (triangle par défaut)"""
+    reader = PngStripReader(path)
+    try:
+        width, height = reader.width, reader.height
+        kernel, support = kernel or _triangle, support or 1.0
+        h_indices, h_weights = filter_weights(width, new_w, kernel, support)
+        v_indices, v_weights = filter_weights(height, new_h, kernel, support)
+        max_value = float((1 << reader.bit_depth) - 1)
+        # Palette développée en RGBA ; sortie 8 ou 16 bits dans le type d'origine
+        out_color_type = 6 if reader.color_type == 3 else reader.color_type
+        if strip_alpha:
+            out_color_type = {4: 0, 6: 2}.get(out_color_type, out_color_type)
+        channels = PNG_CHANNELS[out_color_type]
+        with PngStreamWriter(save_path, new_w, new_h, reader.bit_depth, out_color_type, compression_level) as writer:
+            rows = {}  # ligne source -> ligne rééchantillonnée horizontalement (new_w, 4) prémultipliée
+            next_source = 0
+            for y in range(new_h):
+                needed = v_indices[y]
+                while next_source <= needed[-1]:
+                    strip = reader.read_strip()
+                    if strip is None:
+                        raise ValueError("Fin d'image prématurée")
+                    strip = strip.astype(np.float32) / max_value
+                    if reader.has_alpha:
+                        strip[..., :3] *= strip[..., 3:4]
+                    # Passe horizontale sur toute la bande, une prise du filtre à la fois ;
+                    # colonnes en premier pour que chaque collecte lise des blocs contigus
+                    columns = np.ascontiguousarray(strip.transpose(1, 0, 2)).reshape(width, -1)
+                    horizontal = np.zeros((new_w, columns.shape[1]), dtype=np.float32)
+                    for tap in range(h_indices.shape[1]):
+                        horizontal += columns[h_indices[:, tap]] * h_weights[:, tap, None]
+                    for line in horizontal.reshape(new_w, len(strip), 4).transpose(1, 0, 2):
+                        rows[next_source] = line
+                        next_source += 1
+
+                out = np.zeros((new_w, 4), dtype=np.float32)
+                for source_row, weight in zip(needed, v_weights[y]):
+                    out += rows[source_row] * weight
+                if reader.has_alpha:
+                    alpha = out[:, 3:4]
+                    out[:, :3] = np.where(alpha > 1e-6, out[:, :3] / np.maximum(alpha, 1e-6), 0.0)
+                out = np.clip(np.rint(out * max_value), 0, max_value)[:, channels]
+                if reader.bit_depth == 16:
+                    writer.write_row(np.frombuffer(out.astype('>u2').tobytes(), dtype=np.uint8).copy())
+                else:
+                    writer.write_row(out.astype(np.uint8).reshape(-1))
+
+                # Les lignes sous la fenêtre du prochain pixel ne serviront plus
+                if y + 1 < new_h:
+                    lowest = v_indices[y + 1][0]
+                    for source_row in [r for r in rows if r < lowest]:
+                        del rows[source_row]
+    finally:
+        reader.close()
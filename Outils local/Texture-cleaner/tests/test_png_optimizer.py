@@ -0,0 +1,28 @@
+import tracemalloc
+
+import numpy as np
+from PyQt6.QtGui import QImage
+
+from png_optimizer import optimize_png, optimize_png_memory
+
+
+def _noise_png(path, size, fmt, bytes_per_pixel):
+    pixels = np.random.default_rng(0).integers(0, 256, (size, size * bytes_per_pixel), dtype=np.uint8)
+    QImage(pixels.tobytes(), size, size, size * bytes_per_pixel, fmt).copy().save(str(path))
+
+
+def test_memory_estimate_covers_traced_peak(qt_app, tmp_path):
+    for fmt, bytes_per_pixel in ((QImage.Format.Format_RGBA8888, 4), (QImage.Format.Format_RGB888, 3),
+                                 (QImage.Format.Format_RGBA64, 8)):
+        source = tmp_path / f'source_{bytes_per_pixel}.png'
+        _noise_png(source, 256, fmt, bytes_per_pixel)
+        tracemalloc.start()
+        try:
+            result = optimize_png(str(source), str(tmp_path / 'out.png'))
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        assert result['ok'], result['error']
+        estimate = optimize_png_memory(256, 256, bytes_per_pixel)
+        # Ni sous-estimée (le budget laisserait passer trop de jobs), ni très au-dessus
+        assert peak <= estimate <= 2 * peak
@@ -0,0 +1,39 @@
+from PyQt6.QtCore import Qt
+
+from output_encoding import write_quality
+from resize_model import ResizeTableModel, COL_NAME, COL_SIZE
+
+
+class RecordingEstimator:
+    """Estimateur factice : mémorise les clés demandées"""
+
+    def __init__(self):
+        self.requested = []
+
+    def cached(self, key):
+        return None
+
+    def request(self, key):
+        self.requested.append(key)
+        return True
+
+
+def _keys_by_path(model):
+    estimator = RecordingEstimator()
+    model.update_preview(estimator)
+    return {key[0]: key for key in estimator.requested}
+
+
+def test_sort_keeps_output_format_with_its_row(qt_app):
+    model = ResizeTableModel(str)
+    model.append_rows(['/t/b.png', '/t/a.jpg', '/t/c.webp'], [64, 32, 16], [64, 32, 16], [300, 100, 200])
+    model.set_settings([0, 1, 2], {'quality': 90})
+    expected = {'/t/a.jpg': 'jpg', '/t/b.png': 'png', '/t/c.webp': 'webp'}
+
+    for column in (COL_NAME, COL_SIZE):
+        for order in (Qt.SortOrder.AscendingOrder, Qt.SortOrder.DescendingOrder):
+            model.sort(column, order)
+            keys = _keys_by_path(model)
+            for row, path in enumerate(model.paths):
+                fmt = expected[path]
+                assert keys[path][4:] == (fmt, write_quality(fmt, model.settings(row)), False)
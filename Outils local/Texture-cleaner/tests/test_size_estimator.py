@@ -0,0 +1,75 @@
+import struct
+import zlib
+
+import numpy as np
+import pytest
+from PyQt6.QtGui import QImage
+
+import size_estimator
+from size_estimator import SizeEstimator, estimate_output_size
+from streaming_resize import PngStripReader
+
+
+def _chunk(chunk_type, data):
+    return (struct.pack('>I', len(data)) + chunk_type + data
+            + struct.pack('>I', zlib.crc32(chunk_type + data) & 0xffffffff))
+
+
+def _write_png(path, pixels, filters):
+    """PNG RGBA 8 bits, un filtre (0 None, 1 Sub, 2 Up) par ligne"""
+    height, width, _ = pixels.shape
+    rows = pixels.reshape(height, width * 4)
+    sub = rows.copy()
+    sub[:, 4:] = rows[:, 4:] - rows[:, :-4]  # Modulo 256
+    up = rows.copy()
+    up[1:] = rows[1:] - rows[:-1]
+    filtered = {0: rows, 1: sub, 2: up}
+    data = b''.join(bytes([filters[y]]) + filtered[filters[y]][y].tobytes() for y in range(height))
+    ihdr = struct.pack('>IIBBBBB', width, height, 8, 6, 0, 0, 0)
+    with open(path, 'wb') as f:
+        f.write(b'\x89PNG\r\n\x1a\n' + _chunk(b'IHDR', ihdr)
+                + _chunk(b'IDAT', zlib.compress(data)) + _chunk(b'IEND', b''))
+
+
+@pytest.mark.parametrize('filters', [
+    [0] + [2] * 299,                                 # Up partout (PNG lisse écrit par Qt)
+    [0 if y % 10 == 0 else 1 for y in range(300)],   # None / Sub
+])
+def test_png_bands_cover_top_middle_and_bottom(qt_app, tmp_path, monkeypatch, filters):
+    pixels = np.zeros((300, 64, 4), dtype=np.uint8)
+    pixels[..., 3] = 255
+    for zone in range(3):
+        pixels[zone * 100:(zone + 1) * 100, :, zone] = 255
+    path = tmp_path / 'zones.png'
+    _write_png(path, pixels, filters)
+    monkeypatch.setattr(size_estimator, 'CHEAP_DECODE_BYTES', 64 * 4 * 3 * 20)  # 20 lignes par bande
+
+    bands = size_estimator._png_bands(str(path), 32, 150)
+    assert len(bands) == 3
+    for zone, band in enumerate(bands):
+        color = band.pixelColor(16, band.height() // 2)
+        assert (color.red(), color.green(), color.blue())[zone] == 255
+
+
+def test_skip_rows_keeps_following_rows_exact(tmp_path):
+    pixels = np.random.default_rng(0).integers(0, 256, (64, 16, 4), dtype=np.uint8)
+    pixels[..., 3] = 255
+    path = tmp_path / 'mixed.png'
+    _write_png(path, pixels, [(0, 1, 2)[y % 3] for y in range(64)])
+    reader = PngStripReader(str(path))
+    try:
+        assert reader.skip_rows(40) == 40
+        assert np.array_equal(reader.read_strip(8), pixels[40:48])
+    finally:
+        reader.close()
+
+
+def test_strip_alpha_is_part_of_the_estimate(qt_app, tmp_path):
+    assert SizeEstimator.make_key('a.png', 1, 2, 3, 'png') != SizeEstimator.make_key('a.png', 1, 2, 3, 'png', -1, True)
+
+    pixels = np.random.default_rng(0).integers(0, 256, (128, 128 * 4), dtype=np.uint8)
+    path = tmp_path / 'noise.png'
+    QImage(pixels.tobytes(), 128, 128, 128 * 4, QImage.Format.Format_RGBA8888).copy().save(str(path))
+    with_alpha = estimate_output_size(str(path), 128, 128, 'png')
+    without_alpha = estimate_output_size(str(path), 128, 128, 'png', strip_alpha=True)
+    assert without_alpha < with_alpha * 0.9
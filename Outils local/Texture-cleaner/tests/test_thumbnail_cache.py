@@ -0,0 +1,39 @@
+from thumbnail_cache import ThumbnailDiskCache
+
+
+def _wait_for_gc(cache):
+    thread = cache._gc_thread
+    if thread is not None:
+        thread.join()
+
+
+def test_replaced_entries_are_compacted_while_running(tmp_path, monkeypatch):
+    monkeypatch.setattr(ThumbnailDiskCache, 'GARBAGE_MIN_BYTES', 1000)
+    source = tmp_path / 'image.png'
+    source.write_bytes(b'x')
+    cache = ThumbnailDiskCache(str(tmp_path / 'cache'), max_bytes=1024 * 1024)
+    key = ThumbnailDiskCache.make_key(str(source), 64, 64)
+    try:
+        for version in range(20):
+            cache.put(key, bytes([version]) * 100)
+            _wait_for_gc(cache)
+        assert cache.pack_size() <= 1000
+        assert cache.get(key) == bytes([19]) * 100
+    finally:
+        cache.close()
+
+
+def test_oversized_pack_is_trimmed_without_closing(tmp_path):
+    cache = ThumbnailDiskCache(str(tmp_path / 'cache'), max_bytes=4000)
+    keys = []
+    try:
+        for index in range(10):
+            source = tmp_path / f'image{index}.png'
+            source.write_bytes(b'x')
+            keys.append(ThumbnailDiskCache.make_key(str(source), 64, 64))
+            cache.put(keys[-1], bytes([index]) * 500)
+            _wait_for_gc(cache)
+        assert cache.pack_size() <= 4000
+        assert cache.get(keys[-1]) == bytes([9]) * 500
+    finally:
+        cache.close()
@@ -0,0 +1,155 @@
+"""
+Index de lignes d'un fichier texte projeté en mémoire (mmap)
+Le fichier n'est jamais chargé entier : un thread relève par blocs les débuts
+de ligne et les occurrences d'un motif ; l'affichage ne décode que la
+fenêtre de lignes demandée
+"""
+
+import os
+import re
+import mmap
+import threading
+import numpy as np
+from PyQt6.QtCore import QObject, pyqtSignal
+
+INDEX_CHUNK = 16 * 1024 * 1024   # Octets analysés par bloc
+
+
+class MappedText:
+    """Fichier projeté en mémoire + index des débuts de ligne (complété par
+    add_chunk au fil de l'indexation)"""
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, 'rb')
+        self.size = os.fstat(self._file.fileno()).st_size
+        # mmap refuse les fichiers vides
+        self.data = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if self.size else b''
+        self._line_chunks = [np.zeros(1, dtype=np.int64)]
+        self._match_chunks = []
+        self._line_starts = None
+        self._matches = None
+        self.indexed_bytes = 0
+        self.complete = self.size == 0
+
+    def add_chunk(self, line_starts, matches, end):
+        self._line_chunks.append(line_starts)
+        self._match_chunks.append(matches)
+        self._line_starts = self._matches = None
+        self.indexed_bytes = end
+        self.complete = end >= self.size
+
+    @property
+    def line_starts(self):
+        if self._line_starts is None:
+            self._line_starts = np.concatenate(self._line_chunks)
+            self._line_chunks = [self._line_starts]
+        return self._line_starts
+
+    @property
+    def matches(self):
+        """Offsets (octets) des occurrences trouvées jusqu'ici"""
+        if self._matches is None:
+            self._matches = np.concatenate(self._match_chunks) if self._match_chunks else np.zeros(0, dtype=np.int64)
+            self._match_chunks = [self._matches]
+        return self._matches
+
+    def line_count(self):
+        """Lignes entièrement indexées (toutes une fois l'index complet)"""
+        starts = self.line_starts
+        if self.complete:
+            return len(starts) - (1 if self.size and starts[-1] == self.size else 0)
+        return len(starts) - 1
+
+    def line_of(self, offset):
+        return int(np.searchsorted(self.line_starts, offset, side='right')) - 1
+
+    def line_range(self, first, last):
+        """Plage d'octets [début, fin) des lignes first..last-1 (bornée à la
+        partie indexée tant que l'index n'est pas complet)"""
+        starts = self.line_starts
+        end = int(starts[last]) if last < len(starts) else self.indexed_bytes
+        return int(starts[first]), end
+
+    def decode(self, start, end):
+        """Octets [start, end) en texte (UTF-8, caractères invalides remplacés,
+        fins de ligne normalisées)"""
+        return self.data[start:end].decode('utf-8', errors='replace').replace('\r\n', '\n')
+
+    def close(self):
+        if isinstance(self.data, mmap.mmap):
+            try:
+                self.data.close()
+            except BufferError:  # Vue numpy encore vivante : libérée par le GC
+                pass
+        self._file.close()
+
+
+def scan_chunk(data, start, end, pattern):
+    """Débuts de ligne et occurrences (insensibles à la casse ASCII) du bloc
+    [start, end) ; les occurrences à cheval sur la fin du bloc sont comptées"""
+    view = np.frombuffer(data, dtype=np.uint8, count=end - start, offset=start)
+    line_starts = np.flatnonzero(view == 10).astype(np.int64) + (start + 1)
+    del view
+    if not pattern:
+        return line_starts, np.zeros(0, dtype=np.int64)
+    window = data[start:min(end + len(pattern) - 1, len(data))].lower()
+    matches = np.fromiter((m.start() + start for m in re.finditer(re.escape(pattern), window)),
+                          dtype=np.int64)
+    return line_starts, matches[matches < end]
+
+
+class TextIndexer(QObject):
+    """Indexe un MappedText dans un thread. chunk_indexed(fraction) est émis
+    après chaque bloc (les données sont déjà ajoutées au MappedText),
+    finished() à la fin ; cancel() arrête au bloc suivant"""
+    chunk_indexed = pyqtSignal(float)
+    finished = pyqtSignal()
+
+    _chunk = pyqtSignal(object, object, object, int)
+    _finished = pyqtSignal(object)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.text = None
+        self._cancelled = threading.Event()
+        self._thread = None
+        self._chunk.connect(self._on_chunk)
+        self._finished.connect(self._on_finished)
+
+    def start(self, text, pattern):
+        """pattern : chaîne recherchée (insensible à la casse)"""
+        self.cancel()
+        self.text = text
+        self._cancelled = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True,
+                                        args=(text, pattern.encode('utf-8').lower(), self._cancelled))
+        self._thread.start()
+
+    def cancel(self):
+        """Arrête l'indexation ; les blocs encore en file sont ignorés"""
+        self._cancelled.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.text = None
+
+    def _run(self, text, pattern, cancelled):
+        start = 0
+        while start < text.size and not cancelled.is_set():
+            end = min(start + INDEX_CHUNK, text.size)
+            line_starts, matches = scan_chunk(text.data, start, end, pattern)
+            self._chunk.emit(text, line_starts, matches, end)
+            start = end
+        self._finished.emit(text)
+
+    def _on_chunk(self, text, line_starts, matches, end):
+        # Ajout dans le thread GUI : pas d'accès concurrent à l'index
+        if text is not self.text:
+            return
+        text.add_chunk(line_starts, matches, end)
+        self.chunk_indexed.emit(end / text.size)
+
+    def _on_finished(self, text):
+        if text is self.text and text.complete:
+            self.finished.emit()
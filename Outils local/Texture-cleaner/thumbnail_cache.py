@@ -0,0 +1,260 @@
+"""
+Cache disque persistant des miniatures
+Un seul fichier pack (données PNG concaténées) + un index JSON
+"""
+
+import os
+import sys
+import json
+import time
+import threading
+
+
+def default_cache_dir():
+    """Dossier de cache utilisateur (LOCALAPPDATA sous Windows, ~/.cache sinon)"""
+    if sys.platform == 'win32':
+        base = os.environ.get('LOCALAPPDATA') or os.path.expanduser('~')
+    else:
+        base = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(base, 'TextureCleaner')
+
+
+class ThumbnailDiskCache:
+    """Cache des miniatures entre les sessions.
+
+    Les miniatures encodées sont ajoutées à la fin d'un fichier pack unique ;
+    l'index associe chaque clé (chemin + dimensions + mtime + taille) à
+    (offset, longueur, dernier accès). Le ramasse-miettes réécrit le pack en
+    ne gardant que les entrées valides les plus récemment utilisées ; put()
+    le lance en arrière-plan quand le pack dépasse max_bytes ou que les
+    entrées remplacées y pèsent plus de GARBAGE_RATIO.
+    """
+    PACK_NAME = 'thumbnails.pack'
+    INDEX_NAME = 'thumbnails.idx'
+    INDEX_VERSION = 1
+    GARBAGE_RATIO = 0.5
+    GARBAGE_MIN_BYTES = 32 * 1024 * 1024  # Pack plus petit : pas de compactage pour les entrées remplacées
+
+    def __init__(self, cache_dir, max_bytes=512 * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.pack_path = os.path.join(cache_dir, self.PACK_NAME)
+        self.index_path = os.path.join(cache_dir, self.INDEX_NAME)
+        self._lock = threading.Lock()
+        self._index = {}  # clé -> [offset, longueur, dernier_acces]
+        self._dirty = False
+        self._pack = None
+        self._live_bytes = 0  # Somme des longueurs indexées ; le reste du pack est perdu
+        self._gc_thread = None
+
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            self._pack = open(self.pack_path, 'a+b')
+            self._load_index()
+        except OSError as e:
+            # Cache désactivé (dossier non accessible en écriture...)
+            print(f"Cache miniatures indisponible: {e}")
+            self._pack = None
+
+    @staticmethod
+    def make_key(file_path, width, height):
+        """Clé de cache ; lève OSError si le fichier n'existe pas"""
+        st = os.stat(file_path)
+        path = os.path.normcase(os.path.abspath(file_path))
+        return f"{path}|{width}x{height}|{st.st_mtime_ns}|{st.st_size}"
+
+    @property
+    def enabled(self):
+        return self._pack is not None
+
+    def _load_index(self):
+        if not os.path.exists(self.index_path):
+            return
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if data.get('version') != self.INDEX_VERSION:
+            return
+
+        # Ignorer les entrées qui pointent au-delà du pack (arrêt brutal)
+        pack_size = os.path.getsize(self.pack_path)
+        self._index = {
+            key: entry for key, entry in data.get('entries', {}).items()
+            if entry[0] + entry[1] <= pack_size
+        }
+        self._live_bytes = sum(entry[1] for entry in self._index.values())
+
+    def get(self, key):
+        """Retourne les octets encodés de la miniature ou None"""
+        if self._pack is None:
+            return None
+        with self._lock:
+            entry = self._index.get(key)
+            if entry is None:
+                return None
+            offset, length, _ = entry
+            try:
+                self._pack.seek(offset)
+                data = self._pack.read(length)
+            except OSError:
+                return None
+            if len(data) != length:
+                del self._index[key]
+                self._live_bytes -= length
+                self._dirty = True
+                return None
+            entry[2] = time.time()
+            self._dirty = True
+            return data
+
+    def put(self, key, data):
+        """Ajoute une miniature encodée à la fin du pack ; lance le compactage
+        en arrière-plan si le pack est devenu trop gros ou trop creux"""
+        if self._pack is None or not data:
+            return
+        with self._lock:
+            try:
+                self._pack.seek(0, os.SEEK_END)
+                offset = self._pack.tell()
+                self._pack.write(data)
+                self._pack.flush()
+            except OSError as e:
+                print(f"Erreur écriture cache miniatures: {e}")
+                return
+            previous = self._index.get(key)
+            if previous is not None:
+                self._live_bytes -= previous[1]
+            self._index[key] = [offset, len(data), time.time()]
+            self._live_bytes += len(data)
+            self._dirty = True
+            end = offset + len(data)
+            wanted = end > self.max_bytes or (
+                end > self.GARBAGE_MIN_BYTES and end - self._live_bytes > end * self.GARBAGE_RATIO)
+            if wanted and self._gc_thread is None:
+                self._gc_thread = threading.Thread(target=self._collect_in_background, daemon=True)
+                self._gc_thread.start()
+
+    def _collect_in_background(self):
+        try:
+            self.collect_garbage()
+        finally:
+            with self._lock:
+                self._gc_thread = None
+
+    def pack_size(self):
+        try:
+            return os.path.getsize(self.pack_path)
+        except OSError:
+            return 0
+
+    def save_index(self):
+        """Écrit l'index de façon atomique (fichier temporaire + rename)"""
+        if self._pack is None:
+            return
+        with self._lock:
+            if not self._dirty:
+                return
+            # Copie : le compactage en arrière-plan peut modifier l'index pendant l'écriture
+            payload = {'version': self.INDEX_VERSION, 'entries': dict(self._index)}
+            self._dirty = False
+        tmp_path = self.index_path + '.tmp'
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(payload, f)
+            os.replace(tmp_path, self.index_path)
+        except OSError as e:
+            print(f"Erreur sauvegarde index miniatures: {e}")
+
+    @staticmethod
+    def _is_stale(key):
+        """Vrai si le fichier source a disparu ou changé depuis la mise en cache"""
+        try:
+            path, _, mtime_ns, size = key.rsplit('|', 3)
+            st = os.stat(path)
+        except (OSError, ValueError):
+            return True
+        return st.st_mtime_ns != int(mtime_ns) or st.st_size != int(size)
+
+    def collect_garbage(self, target_ratio=0.75):
+        """Compacte le pack : supprime les entrées obsolètes puis les moins
+        récemment utilisées jusqu'à passer sous target_ratio * max_bytes.
+        La copie se fait hors verrou (get / put restent servis) ; les
+        entrées ajoutées pendant la copie sont reprises à la fin"""
+        if self._pack is None:
+            return
+        with self._lock:
+            snapshot = list(self._index.items())
+            self._pack.seek(0, os.SEEK_END)
+            copied_end = self._pack.tell()
+
+        live = [(key, entry) for key, entry in snapshot if not self._is_stale(key)]
+        live.sort(key=lambda item: item[1][2], reverse=True)
+        budget = int(self.max_bytes * target_ratio)
+        kept = []
+        total = 0
+        for key, entry in live:
+            if total + entry[1] > budget:
+                break
+            kept.append((key, entry))
+            total += entry[1]
+
+        # Réécriture dans l'ordre des offsets (lecture séquentielle)
+        kept.sort(key=lambda item: item[1][0])
+        tmp_path = self.pack_path + '.tmp'
+        new_index = {}
+        try:
+            with open(self.pack_path, 'rb') as source, open(tmp_path, 'wb') as out:
+                for key, (offset, length, last_access) in kept:
+                    source.seek(offset)
+                    data = source.read(length)
+                    if len(data) != length:
+                        continue
+                    new_index[key] = [out.tell(), length, last_access]
+                    out.write(data)
+        except OSError as e:
+            print(f"Erreur compactage cache miniatures: {e}")
+            return
+
+        with self._lock:
+            try:
+                with open(tmp_path, 'ab') as out:
+                    for key, (offset, length, last_access) in list(self._index.items()):
+                        if offset < copied_end:
+                            # Entrée copiée : garder le dernier accès, oublier si retirée entre-temps
+                            if key in new_index and new_index[key][1] == length:
+                                new_index[key][2] = last_access
+                            continue
+                        self._pack.seek(offset)
+                        data = self._pack.read(length)
+                        if len(data) == length:
+                            new_index[key] = [out.tell(), length, last_access]
+                            out.write(data)
+                new_index = {key: entry for key, entry in new_index.items() if key in self._index}
+                self._pack.close()
+                os.replace(tmp_path, self.pack_path)
+            except OSError as e:
+                print(f"Erreur compactage cache miniatures: {e}")
+                if self._pack.closed:
+                    self._pack = open(self.pack_path, 'a+b')
+                return
+            self._pack = open(self.pack_path, 'a+b')
+            self._index = new_index
+            self._live_bytes = sum(entry[1] for entry in new_index.values())
+            self._dirty = True
+        self.save_index()
+
+    def close(self):
+        """Compacte si la limite est dépassée, sauvegarde l'index et ferme le pack"""
+        if self._pack is None:
+            return
+        gc_thread = self._gc_thread
+        if gc_thread is not None:
+            gc_thread.join()
+        if self.pack_size() > self.max_bytes:
+            self.collect_garbage()
+        self.save_index()
+        with self._lock:
+            self._pack.close()
+            self._pack = None
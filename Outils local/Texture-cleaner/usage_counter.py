@@ -0,0 +1,141 @@
+"""
+Comptage des références de toutes les textures en une passe par source
+Tous les noms cherchés finissent par une extension d'image : chaque extension
+trouvée dans le texte est une fin d'occurrence possible, vérifiée en
+remontant un trie des noms inversés. Toutes les occurrences (y compris
+imbriquées, « a.png » dans « data.png ») sont trouvées en un seul parcours,
+comme avec un automate d'Aho-Corasick, sans boucle Python par octet.
+Les sources sont traitées en parallèle dans le pool de processus
+"""
+
+import os
+import re
+import mmap
+import threading
+from concurrent.futures.process import BrokenProcessPool
+from PyQt6.QtCore import QObject, pyqtSignal
+
+from numpy_resampler import process_pool
+
+SCAN_CHUNK = 16 * 1024 * 1024
+IMAGE_EXTENSIONS = (b'.jpg', b'.jpeg', b'.png', b'.gif', b'.bmp', b'.webp', b'.tiff', b'.tif')
+_EXTENSION_START = re.compile(rb'\.(?=jpe?g|png|gif|bmp|webp|tif)')
+
+_END = ''  # Clé de fin de nom dans le trie (les autres clés sont des octets)
+
+
+def build_reverse_trie(names):
+    """Trie des noms (minuscules, UTF-8) lus de la fin vers le début"""
+    trie = {}
+    for name in names:
+        node = trie
+        for byte in reversed(name.encode('utf-8').lower()):
+            node = node.setdefault(byte, {})
+        node[_END] = name
+    return trie
+
+
+def count_in_buffer(data, trie, max_length, counts, start=0, end=None):
+    """Ajoute à counts les occurrences finissant dans data[start:end]
+    (data en minuscules ; les noms peuvent commencer avant start)"""
+    end = len(data) if end is None else end
+    # Extensions candidates par 1re lettre (seules celles qui terminent un nom)
+    extensions = {}
+    for ext in IMAGE_EXTENSIONS:
+        if ext[-1] in trie:
+            extensions.setdefault(ext[1], []).append(ext)
+    for match in _EXTENSION_START.finditer(data, max(start - 5, 0), end):
+        dot = match.start()
+        for ext in extensions.get(data[dot + 1], ()):
+            stop = dot + len(ext)
+            if stop <= start or stop > end or not data.startswith(ext, dot):
+                continue
+            node = trie
+            position = stop - 1
+            limit = max(stop - max_length, 0)
+            while position >= limit:
+                node = node.get(data[position])
+                if node is None:
+                    break
+                if _END in node:
+                    counts[node[_END]] = counts.get(node[_END], 0) + 1
+                position -= 1
+
+
+def count_in_file(path, names):
+    """{nom: nombre d'occurrences} (insensible à la casse ASCII) dans un fichier"""
+    trie = build_reverse_trie(names)
+    max_length = max((len(name.encode('utf-8')) for name in names), default=0)
+    counts = {}
+    with open(path, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        if not size or not max_length:
+            return counts
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            for start in range(0, size, SCAN_CHUNK):
+                end = min(start + SCAN_CHUNK, size)
+                # Marge avant (noms à cheval) et après (extension à cheval)
+                base = max(start - max_length, 0)
+                chunk = data[base:min(end + 5, size)].lower()
+                count_in_buffer(chunk, trie, max_length, counts, start - base, end - base)
+    return counts
+
+
+class UsageCounter(QObject):
+    """Compte en arrière-plan les références de chaque nom dans chaque source.
+    finished(totaux {nom: n}, par fichier {chemin: {nom: n}}, erreurs
+    {chemin: message}) ; un nouveau start() rend muet le précédent"""
+    finished = pyqtSignal(object, object, object)
+
+    _finished = pyqtSignal(int, object, object, object)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._generation = 0
+        self._running = False
+        self._finished.connect(self._on_finished)
+
+    def is_running(self):
+        return self._running
+
+    def start(self, paths, names):
+        self._generation += 1
+        self._running = True
+        threading.Thread(target=self._run, daemon=True,
+                         args=(self._generation, list(paths), list(names))).start()
+
+    def _run(self, generation, paths, names):
+        per_file, errors, totals = {}, {}, {}
+        try:
+            try:
+                futures = {path: process_pool().submit(count_in_file, path, names) for path in paths}
+                for path, future in futures.items():
+                    try:
+                        per_file[path] = future.result()
+                    except OSError as e:
+                        errors[path] = str(e)
+            except (BrokenProcessPool, OSError, RuntimeError):
+                # Pool inutilisable : comptage dans ce thread
+                for path in paths:
+                    if path in per_file or path in errors:
+                        continue
+                    try:
+                        per_file[path] = count_in_file(path, names)
+                    except OSError as e:
+                        errors[path] = str(e)
+            for counts in per_file.values():
+                for name, count in counts.items():
+                    totals[name] = totals.get(name, 0) + count
+        except Exception as e:
+            # Erreur imprévue : les sources non comptées sont signalées en erreur
+            for path in paths:
+                if path not in per_file:
+                    errors.setdefault(path, str(e))
+        finally:
+            # Toujours émis : le compteur ne reste jamais « en cours »
+            self._finished.emit(generation, totals, per_file, errors)
+
+    def _on_finished(self, generation, totals, per_file, errors):
+        if generation == self._generation:
+            self._running = False
+            self.finished.emit(totals, per_file, errors)